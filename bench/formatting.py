@@ -0,0 +1,154 @@
+"""
+表示用の整形（金額の文字列化・条件付きの色付け）を、行ごとの apply による旧実装と
+components.formatting の列単位の実装とで比較するベンチマーク
+
+合成データの行数ごとに、同じ入力から同じ文字列・CSSができることを確かめたうえで
+両方の処理時間を計測する。
+
+使い方:
+    python -m bench.formatting --sizes 10000 100000 1000000
+    python -m bench.formatting --sizes 1000000 --output bench/results/formatting.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from bench.synthetic import generate_ledger
+from components.formatting import ALERT_STYLE, styled_by, yen
+from components.monthly_list import detail_table
+
+
+def _legacy_yen(amounts):
+    """旧実装: 1行ずつ f-string で整形する"""
+    return amounts.apply(lambda x: f"¥{x:,}")
+
+
+def _legacy_detail(summary):
+    """旧実装: 金額を1行ずつ整形し、apply(axis=1) で「平均 × 回数 = 合計」を作る"""
+    summary = summary.copy()
+    summary['平均金額'] = summary['平均金額'].apply(lambda x: f"¥{x:,.0f}")
+    summary['合計金額'] = summary['合計金額'].apply(lambda x: f"¥{x:,.0f}")
+    summary['月'] = summary['月'].apply(lambda x: f"{x.year}年{x.month}月")
+    summary['詳細'] = summary.apply(
+        lambda row: f"{row['平均金額']} × {row['購入回数']} = {row['合計金額']}", axis=1
+    )
+    return summary[['月', '詳細']]
+
+
+def _legacy_styles(remain):
+    """旧実装: 整形済みの文字列の先頭を見て Styler.applymap で色を付ける"""
+    table = pd.DataFrame({'残予算': remain.apply(lambda x: f"¥{x:,}")})
+
+    def color_negative(val):
+        if isinstance(val, str) and val.startswith('¥-'):
+            return ALERT_STYLE
+        return ''
+
+    with warnings.catch_warnings():
+        # applymap は pandas 2.1 以降で非推奨
+        warnings.simplefilter('ignore', FutureWarning)
+        styler = table.style.applymap(color_negative, subset=['残予算'])
+    styler._compute()
+    return styler
+
+
+def _styles(remain):
+    """新実装: 整形前の数値の符号から Styler.apply で色を付ける"""
+    table = pd.DataFrame({'残予算': yen(remain)})
+    styler = table.style.apply(styled_by(remain), subset=['残予算'])
+    styler._compute()
+    return styler
+
+
+def _cases(rows):
+    """計測する (名前, 旧実装, 新実装, 結果を比較できる形にする関数) の一覧"""
+    df = generate_ledger(rows)
+    amounts = df['金額'].astype(np.int64)
+    # 月別集計と同じ形の表（行数を揃えるため、月は行ごとに循環させる）
+    months = pd.period_range('2000-01', periods=600, freq='M')[np.arange(rows) % 600]
+    counts = np.maximum(1, (amounts.to_numpy() % 40))
+    summary = pd.DataFrame({
+        '月': months,
+        '購入回数': counts,
+        '合計金額': amounts.to_numpy(),
+        '平均金額': amounts.to_numpy() / counts,
+    })
+    remain = amounts - int(amounts.median())
+
+    as_list = lambda result: list(result)
+    return [
+        ('yen', lambda: _legacy_yen(amounts), lambda: yen(amounts), as_list),
+        ('monthly_detail', lambda: _legacy_detail(summary), lambda: detail_table(summary),
+         lambda result: result.to_numpy().tolist()),
+        ('negative_style', lambda: _legacy_styles(remain), lambda: _styles(remain),
+         lambda styler: sorted(styler.ctx.items())),
+    ]
+
+
+def _best(func, repeat):
+    """func を repeat 回実行した最短時間（秒）と、最後の結果"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(sizes, repeat=3):
+    """
+    行数ごとに旧実装と新実装を計測する
+
+    Parameters:
+    - sizes: list[int], 合成データの行数
+    - repeat: int, 各計測の繰り返し回数（最短時間を採用）
+
+    Returns:
+    - list[dict]: case / rows / legacy / vectorized / speedup
+    """
+    results = []
+    print(f"{'case':<16} {'rows':>10} {'legacy ms':>12} {'vectorized ms':>14} {'speedup':>8}")
+    for rows in sizes:
+        for name, legacy, vectorized, comparable in _cases(rows):
+            legacy_seconds, expected = _best(legacy, repeat)
+            seconds, actual = _best(vectorized, repeat)
+            if comparable(expected) != comparable(actual):
+                raise AssertionError(f"{name} ({rows:,} 行): 旧実装と結果が一致しません")
+            speedup = legacy_seconds / seconds if seconds > 0 else None
+            results.append({
+                'case': name,
+                'rows': rows,
+                'legacy': round(legacy_seconds, 6),
+                'vectorized': round(seconds, 6),
+                'speedup': round(speedup, 2) if speedup else None,
+            })
+            print(f"{name:<16} {rows:>10,} {legacy_seconds * 1000:>12.2f} "
+                  f"{seconds * 1000:>14.2f} {speedup:>7.1f}x", flush=True)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                        help='合成データの行数')
+    parser.add_argument('--repeat', type=int, default=3, help='各計測の繰り返し回数')
+    parser.add_argument('--output', help='結果の保存先（JSON、省略時は保存しない）')
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, repeat=args.repeat)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"\n結果を保存しました: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
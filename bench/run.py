@@ -0,0 +1,292 @@
+"""
+ダッシュボードのデータ処理をブラウザなしで計測するベンチマーク
+
+Streamlit の描画関数を何もしない関数に差し替えたうえで、読み込み（CSVパース・正規化・
+集計）と各 display_* 関数・月末の予測を合成データの行数ごとに実行し、処理時間・スループット・
+ピークメモリを記録する。検索・明細の閲覧は入力ウィジェットに値を入れた状態で計測する。結果はJSONに保存し、別の版の結果と比較できる。
+
+使い方:
+    python -m bench.run --sizes 10000 100000 1000000 --output bench/results/current.json
+    python -m bench.run --compare bench/results/baseline.json
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from bench.synthetic import CATEGORY_MIX, generate_ledger, to_csv_bytes
+from components import render_cache
+from components.Interval import display_interval_card
+from components.comparison import display_comparison_table, display_sparklines
+from components.daily_budget import display_daily_budget
+from components.explorer import display_explorer
+from components.list import display_filtered_data
+from components.monthly_list import display_monthly_list
+from components.search import display_memo_search
+from components.stacked_bar import display_stacked_bar
+from components.timeline import display_timeline
+from ledger.forecast import forecast_categories, forecast_month
+from ledger.model import build_ledger
+from ledger.schema import normalize_ledger, read_ledger_csv
+
+ALL_CATEGORIES = [c for c, _, _ in CATEGORY_MIX]
+OTHER_CATEGORIES = ['医療費', '日用品', '交通費', '交際費', '本・教材', '美容', 'イベント']
+
+# 比較時に悪化とみなす時間の増加率
+DEFAULT_THRESHOLD = 0.25
+
+# 計測中の入力ウィジェットの値（ウィジェットの key → 値）。headless() の中で使う
+_inputs = {}
+
+
+def _with_inputs(inputs, func, *args, **kwargs):
+    """入力ウィジェットに inputs の値が入っている状態で func を実行する"""
+    _inputs.update(inputs)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _inputs.clear()
+
+
+def _components():
+    """計測対象の (名前, ledger を受け取る関数) の一覧。引数は既定のダッシュボードと同じ"""
+    today = pd.Timestamp.today().normalize()
+    return [
+        ('display_timeline[全体]', lambda l: display_timeline(l, ALL_CATEGORIES, 1, 110000)),
+        ('display_timeline[趣味,3か月]', lambda l: display_timeline(l, '趣味', 3, 9000)),
+        # 長い期間の折れ線は点の上限まで間引く。間引かない場合と比べる
+        ('display_timeline[全体,12か月]', lambda l: display_timeline(l, ALL_CATEGORIES, 12, 110000)),
+        ('display_timeline[全体,12か月,間引きなし]',
+         lambda l: display_timeline(l, ALL_CATEGORIES, 12, 110000, max_points=0)),
+        ('forecast_categories', lambda l: forecast_categories(l.cube, today)),
+        ('forecast_month[全体]', lambda l: forecast_month(l.cube, ALL_CATEGORIES, today)),
+        ('display_stacked_bar', lambda l: display_stacked_bar(l, OTHER_CATEGORIES, months=5)),
+        ('display_monthly_list', lambda l: display_monthly_list(l, '食料', 3)),
+        ('display_filtered_data', lambda l: display_filtered_data(l, '趣味', 3)),
+        ('display_interval_card', lambda l: display_interval_card(l, '食料', 2)),
+        ('display_daily_budget', lambda l: display_daily_budget(l, '食料', 30000)),
+        ('display_comparison_table', lambda l: display_comparison_table(l)),
+        ('display_sparklines', lambda l: display_sparklines(l, months=12)),
+        ('display_explorer[全件]', lambda l: display_explorer(l, ALL_CATEGORIES)),
+        ('display_explorer[食料,メモ,金額順]',
+         lambda l: _with_inputs({'explorer-categories': ['食料'], 'explorer-memo': '食料1',
+                                 'explorer-sort': 'amount_desc'}, display_explorer, l, ALL_CATEGORIES)),
+        ('display_memo_search', lambda l: _with_inputs({'memo-search': '食料1'}, display_memo_search, l)),
+    ]
+
+
+def _widget(default):
+    """key に対応する _inputs の値（なければ default(引数)）を返す入力ウィジェットの代わり"""
+    def widget(label, *args, key=None, **kwargs):
+        return _inputs[key] if key in _inputs else default(*args, **kwargs)
+    return widget
+
+
+@contextlib.contextmanager
+def headless():
+    """
+    Streamlit の出力関数を無効化する（データ処理だけを計測するため）。
+    入力ウィジェットは _inputs の値（なければ初期値）を返し、列は st そのものを返す
+    """
+    noop = lambda *args, **kwargs: None
+    names = ['markdown', 'info', 'warning', 'caption', 'dataframe', 'altair_chart', 'vega_lite_chart']
+    widgets = {
+        'text_input': _widget(lambda *args, **kwargs: ''),
+        'multiselect': _widget(lambda *args, **kwargs: []),
+        'selectbox': _widget(lambda options, *args, **kwargs: list(options)[0]),
+        'button': _widget(lambda *args, **kwargs: False),
+        'columns': lambda spec, *args, **kwargs: [st] * (spec if isinstance(spec, int) else len(spec)),
+    }
+    # ScriptRunContext がない旨の警告を抑止する
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith('streamlit'):
+            logging.getLogger(name).setLevel(logging.ERROR)
+    with contextlib.ExitStack() as stack:
+        for name in names:
+            stack.enter_context(mock.patch.object(st, name, noop))
+        for name, widget in widgets.items():
+            stack.enter_context(mock.patch.object(st, name, widget))
+        yield
+
+
+def _measure(func, repeat):
+    """
+    func を repeat 回実行した最短時間（秒）と、1回分のピークメモリ（MB）を返す。
+    描画キャッシュは毎回空にして、データ処理そのものを計測する
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        render_cache.clear()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    render_cache.clear()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak / 1024 ** 2
+
+
+def run(sizes, repeat=3, parse_limit=1_000_000):
+    """
+    行数ごとに全コンポーネントを計測する
+
+    Parameters:
+    - sizes: list[int], 合成データの行数
+    - repeat: int, 各計測の繰り返し回数（最短時間を採用）
+    - parse_limit: int, CSVパースを計測する最大行数（巨大なCSV文字列の生成を避ける）
+
+    Returns:
+    - list[dict]: component / rows / seconds / rows_per_sec / peak_mb
+    """
+    results = []
+
+    def record(component, rows, seconds, peak_mb):
+        results.append({
+            'component': component,
+            'rows': rows,
+            'seconds': round(seconds, 6),
+            'rows_per_sec': round(rows / seconds) if seconds > 0 else None,
+            'peak_mb': round(peak_mb, 2),
+        })
+        print(f"{component:<32} {rows:>10,} rows {seconds * 1000:>10.2f} ms {peak_mb:>9.1f} MB", flush=True)
+
+    with headless():
+        for rows in sizes:
+            raw = generate_ledger(rows)
+            if rows <= parse_limit:
+                body = to_csv_bytes(raw)
+                record('read_csv', rows, *_measure(lambda: read_ledger_csv(body), repeat))
+            record('normalize_ledger', rows, *_measure(lambda: normalize_ledger(raw), repeat))
+            df = normalize_ledger(raw)
+            record('build_ledger', rows, *_measure(lambda: build_ledger(df, 'bench'), repeat))
+            ledger = build_ledger(df, f'bench-{rows}')
+            for name, func in _components():
+                record(name, rows, *_measure(lambda: func(ledger), repeat))
+    return results
+
+
+def scaling(results):
+    """
+    コンポーネントごとの計算量の傾き（log(時間) と log(行数) の回帰係数）を求める。
+    1.0 なら行数に比例、0 に近いほど行数に依存しない
+
+    Returns:
+    - dict[str, float]
+    """
+    curves = {}
+    for r in results:
+        if r['seconds'] > 0:
+            curves.setdefault(r['component'], []).append((r['rows'], r['seconds']))
+    slopes = {}
+    for component, points in curves.items():
+        if len({rows for rows, _ in points}) < 2:
+            continue
+        x = np.log([rows for rows, _ in points])
+        y = np.log([seconds for _, seconds in points])
+        slopes[component] = round(float(np.polyfit(x, y, 1)[0]), 3)
+    return slopes
+
+
+def _git_revision():
+    """現在のコミット（取得できなければ None）"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save(results, path):
+    """計測結果を環境情報とともにJSONで保存する"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    report = {
+        'meta': {
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'revision': _git_revision(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+        },
+        'results': results,
+        'scaling': scaling(results),
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def compare(results, baseline_path, threshold=DEFAULT_THRESHOLD):
+    """
+    基準の結果と比較し、時間が threshold 以上増えた計測を列挙する
+
+    Returns:
+    - list[dict]: 悪化した計測（component / rows / baseline / current / ratio）
+    """
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(r['component'], r['rows']): r for r in json.load(f)['results']}
+
+    regressions = []
+    print(f"\n{'component':<32} {'rows':>10} {'baseline ms':>12} {'current ms':>12} {'ratio':>7}")
+    for r in results:
+        base = baseline.get((r['component'], r['rows']))
+        if base is None or not base['seconds']:
+            continue
+        ratio = r['seconds'] / base['seconds']
+        flag = ' !' if ratio > 1 + threshold else ''
+        print(f"{r['component']:<32} {r['rows']:>10,} {base['seconds'] * 1000:>12.2f} "
+              f"{r['seconds'] * 1000:>12.2f} {ratio:>7.2f}{flag}")
+        if flag:
+            regressions.append({'component': r['component'], 'rows': r['rows'],
+                                'baseline': base['seconds'], 'current': r['seconds'], 'ratio': ratio})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                        help='合成データの行数（例: 10000 100000 10000000）')
+    parser.add_argument('--repeat', type=int, default=3, help='各計測の繰り返し回数')
+    parser.add_argument('--parse-limit', type=int, default=1_000_000, help='CSVパースを計測する最大行数')
+    parser.add_argument('--output', default=os.path.join('bench', 'results', 'current.json'),
+                        help='結果の保存先（JSON）')
+    parser.add_argument('--compare', help='比較する基準の結果（JSON）')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='悪化とみなす時間の増加率（0.25 なら25%%）')
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, repeat=args.repeat, parse_limit=args.parse_limit)
+    save(results, args.output)
+    slopes = scaling(results)
+    if slopes:
+        print("\n行数に対する計算量の傾き（1.0 で線形）")
+        for component, slope in slopes.items():
+            print(f"{component:<32} {slope:>6.2f}")
+    print(f"\n結果を保存しました: {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} 件の計測が {args.threshold:.0%} 以上悪化しました")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
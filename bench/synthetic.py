@@ -0,0 +1,78 @@
+"""
+ベンチマーク用の合成家計簿データを生成する
+
+app.py のカテゴリ構成に合わせたカテゴリ比率・金額分布で、
+直近ほど入力が多い（日付が偏った）明細を作る。
+"""
+import io
+
+import numpy as np
+import pandas as pd
+
+# (カテゴリ, 出現比率, 金額の中央値)
+CATEGORY_MIX = [
+    ('食料', 0.30, 1200),
+    ('飲料・軽食', 0.14, 250),
+    ('晩酌・外食・カフェ', 0.10, 1500),
+    ('日用品', 0.08, 700),
+    ('交通費', 0.08, 600),
+    ('趣味', 0.06, 2500),
+    ('交際費', 0.05, 5000),
+    ('本・教材', 0.04, 1800),
+    ('医療費', 0.03, 3000),
+    ('美容', 0.03, 4000),
+    ('設備', 0.03, 3000),
+    ('イベント', 0.02, 8000),
+    ('その他', 0.04, 1000),
+]
+
+# カテゴリごとのメモの種類数
+MEMO_VARIANTS = 50
+
+
+def generate_ledger(rows, years=5, end=None, seed=0):
+    """
+    CSVを読み込んだ直後と同じ形（日付は文字列）の合成家計簿を作る
+
+    Parameters:
+    - rows: int, 行数
+    - years: int, 期間（年）。日付は直近ほど多くなるよう指数分布で偏らせる
+    - end: 日付 or None, 最終日（None なら今日）
+    - seed: int, 乱数シード
+
+    Returns:
+    - pandas DataFrame（列: 日付, カテゴリ, 金額, メモ）
+    """
+    rng = np.random.default_rng(seed)
+    end = np.datetime64(pd.Timestamp(end or pd.Timestamp.today()).normalize(), 'D')
+    span = years * 365
+
+    # 直近ほど多い日付（平均は期間の1/3ほど前）
+    days_back = np.minimum(rng.exponential(span / 3, rows).astype(np.int64), span - 1)
+    dates = np.sort(end - days_back)
+
+    names = [c for c, _, _ in CATEGORY_MIX]
+    weights = np.array([w for _, w, _ in CATEGORY_MIX])
+    medians = np.array([m for _, _, m in CATEGORY_MIX], dtype=float)
+    cat_idx = rng.choice(len(names), size=rows, p=weights / weights.sum())
+
+    # 金額は対数正規分布（10円単位）
+    amounts = np.round(medians[cat_idx] * rng.lognormal(0, 0.6, rows), -1).astype(np.int64)
+    amounts = np.maximum(amounts, 10)
+
+    memo_pool = np.array([f"{name}{i}" for name in names for i in range(MEMO_VARIANTS)], dtype=object)
+    memos = memo_pool[cat_idx * MEMO_VARIANTS + rng.integers(0, MEMO_VARIANTS, rows)]
+
+    return pd.DataFrame({
+        '日付': np.char.replace(np.datetime_as_string(dates, unit='D'), '-', '/'),
+        'カテゴリ': np.array(names, dtype=object)[cat_idx],
+        '金額': amounts,
+        'メモ': memos,
+    })
+
+
+def to_csv_bytes(raw):
+    """合成データをウェブ公開CSVと同じ形式のバイト列にする"""
+    buffer = io.StringIO()
+    raw.to_csv(buffer, index=False)
+    return buffer.getvalue().encode('utf-8')
@@ -0,0 +1,124 @@
+import datetime
+
+import altair as alt
+import pandas as pd
+import streamlit as st
+
+from ledger.compare import compare_months
+from .formatting import ALERT_STYLE, DECREASE_STYLE, percent_change, signed, styled_by, yen
+from .profiler import profiled, touch
+from .render_cache import cached, chart_json, show_chart, show_table
+from .styles import style_amount_table
+
+
+def _anchor(period):
+    """比較の基準月（分析期間の指定があれば期間の最後の月、なければ今月）"""
+    if period is not None:
+        return period.last_month
+    return pd.Period(datetime.date.today(), freq='M')
+
+
+@profiled
+def display_comparison_table(ledger, categories=None, period=None):
+    """
+    全カテゴリの当月・移動平均（3/6/12か月）・前年差・前年比・傾きを1つの表で表示する
+
+    Parameters:
+    - ledger: Ledger, 家計簿データ（集計を利用）
+    - categories: list[str] or None, 表示するカテゴリ（None なら全カテゴリ）
+    - period: AnalysisPeriod or None, 分析期間（指定時は期間の最後の月を基準にする）
+    """
+    month = _anchor(period)
+    styled = cached('comparison_table', (categories, month), ledger.version,
+                    lambda: _build_table(ledger, categories, month))
+    show_table(styled)
+
+
+@profiled
+def display_sparklines(ledger, categories=None, months=12, period=None):
+    """
+    カテゴリごとの月別合計金額の推移を、小さな折れ線（スパークライン）で並べて表示する
+
+    Parameters:
+    - ledger: Ledger, 家計簿データ（集計を利用）
+    - categories: list[str] or None, 表示するカテゴリ（None なら全カテゴリ）
+    - months: int, 表示する月数
+    - period: AnalysisPeriod or None, 分析期間（指定時は期間の最後の月まで）
+    """
+    month = _anchor(period)
+    spec = cached('sparklines', (categories, months, month), ledger.version,
+                  lambda: _build_chart(ledger, categories, months, month))
+    if spec is None:
+        st.info("該当カテゴリのデータがありません。")
+        return
+    show_chart(spec)
+
+
+def _build_table(ledger, categories, month):
+    """比較表を作り、スタイル付きで返す"""
+    comparison = compare_months(ledger.cube, month, categories)
+    table = comparison.table
+    touch(table.size)
+
+    display_df = pd.DataFrame({
+        'カテゴリ': table.index,
+        '当月': yen(table['当月']),
+        '3か月平均': yen(table['3か月平均']),
+        '6か月平均': yen(table['6か月平均']),
+        '12か月平均': yen(table['12か月平均']),
+        '前年差': signed(table['前年差']),
+        '前年比': percent_change(table['前年比']),
+        '傾き(円/月)': signed(table['傾き']),
+    })
+    # 前年同月のデータがない月は、前年比と同じく「-」
+    display_df.loc[table['前年差'].isna().to_numpy(), '前年差'] = '-'
+
+    # 前年より増えたカテゴリは赤、減ったカテゴリは青（整形前の数値で判定する）
+    colors = {'positive': ALERT_STYLE, 'negative': DECREASE_STYLE}
+    styled = style_amount_table(display_df.style.apply(
+        styled_by(table['前年差'], **colors), subset=['前年差']
+    ).apply(
+        styled_by(table['前年比'].round(2), **colors), subset=['前年比']
+    ).apply(
+        styled_by(table['傾き'], **colors), subset=['傾き(円/月)']
+    ))
+
+    return styled
+
+
+def _build_chart(ledger, categories, months, month):
+    """スパークラインを作り、Vega-Lite仕様のJSONで返す（データがなければ None）"""
+    history = compare_months(ledger.cube, month, categories, history=months).history
+    touch(history.size)
+    if history.empty or not history.to_numpy().any():
+        return None
+
+    history.index = history.index.to_timestamp()
+    data = history.rename_axis(index='月', columns='カテゴリ').stack().rename('金額').reset_index()
+
+    chart = alt.Chart(data).mark_line(
+        color='#769CDF',
+        strokeWidth=2,
+        point=alt.OverlayMarkDef(size=12, color='#769CDF')
+    ).encode(
+        x=alt.X('月:T', axis=None),
+        y=alt.Y('金額:Q', axis=None, scale=alt.Scale(zero=False)),
+        tooltip=[
+            alt.Tooltip('月:T', title='月', format='%Y-%m'),
+            alt.Tooltip('金額:Q', title='合計', format=',.0f')
+        ]
+    ).properties(
+        width=240,
+        height=36
+    ).facet(
+        row=alt.Row('カテゴリ:N', title=None, sort=list(history.columns),
+                    header=alt.Header(labelAngle=0, labelAlign='left', labelFontSize=12))
+    ).resolve_scale(
+        y='independent'
+    ).configure_view(
+        strokeWidth=0
+    ).configure_facet(
+        spacing=6
+    )
+
+    return chart_json(chart)
@@ -2,16 +2,22 @@ import pandas as pd
 import streamlit as st
 from datetime import datetime
 import calendar
+
+from ledger.budget import monthly_budgets
+from ledger.forecast import forecast_categories
+from .profiler import payload, profiled, touch
+from .render_cache import cached
 from .styles import get_metric_card_style, get_number_style
 
-def display_daily_budget(df, category, monthly_budget):
+@profiled
+def display_daily_budget(ledger, category, monthly_budget):
     """
     指定カテゴリの今月の1日あたりの残予算をカード形式で表示する
     
     Parameters:
-    - df: pandas DataFrame, データフレーム
+    - ledger: Ledger, 家計簿データ（集計を利用）
     - category: str, 表示したいカテゴリ名
-    - monthly_budget: int, 月間予算（円）
+    - monthly_budget: int or BudgetHistory, 月間予算（円）。BudgetHistory なら今月に有効な予算
     """
     # 今日の日付情報を取得
     today = datetime.now()
@@ -19,16 +25,13 @@ def display_daily_budget(df, category, monthly_budget):
     current_month = today.month
     current_day = today.day
     
-    # 今月のデータをフィルタリング
-    df['日付'] = pd.to_datetime(df['日付'], errors='coerce')
-    df_this_month = df[
-        (df['日付'].dt.year == current_year) &
-        (df['日付'].dt.month == current_month) &
-        (df['カテゴリ'] == category)
-    ]
-    
-    # 累計金額を計算
-    total_spent = df_this_month['金額'].sum()
+    # 今月の累計金額を集計から取得
+    this_period = pd.Period(year=current_year, month=current_month, freq='M')
+    total_spent = ledger.cube.total(this_period, category)
+    touch(1)
+
+    # 今月に有効な予算
+    monthly_budget = int(monthly_budgets(monthly_budget, [this_period], category).iloc[0])
     
     # 残予算を計算
     remaining_budget = monthly_budget - total_spent
@@ -47,6 +50,18 @@ def display_daily_budget(df, category, monthly_budget):
         daily_budget = remaining_budget
         remaining_days = 1
     
+    # 月末の支出予測（全カテゴリ分をまとめて計算し、データの版・日付ごとに使い回す）
+    forecasts = cached('forecast', (), ledger.version,
+                       lambda: forecast_categories(ledger.cube, today))
+    forecast_html = ""
+    if category in forecasts.index:
+        forecast = forecasts.loc[category]
+        forecast_color = "#EA4335" if forecast['予測'] > monthly_budget else "#5F6368"
+        forecast_html = f"""
+            <div style="color: {forecast_color}; font-size: 0.875rem; margin-top: 6px;">
+                月末予測: ¥{int(forecast['予測']):,}（¥{int(forecast['下限']):,} 〜 ¥{int(forecast['上限']):,}）
+            </div>"""
+
     # 色の設定（残予算がマイナスの場合は赤、プラスの場合は青）
     if remaining_budget < 0:
         status_color = "#EA4335"
@@ -56,8 +71,7 @@ def display_daily_budget(df, category, monthly_budget):
         card_color = "#769CDF"
     
     # カード形式で表示
-    st.markdown(
-        f"""
+    html = f"""
         <div style="{get_metric_card_style(card_color)}">
             <div style="display: flex; align-items: baseline; gap: 8px; margin-bottom: 12px;">
                 <span style="font-size: 2.5rem; font-weight: 600; color: {status_color}; {get_number_style()}">
@@ -68,8 +82,8 @@ def display_daily_budget(df, category, monthly_budget):
             <div style="color: #5F6368; font-size: 0.875rem;">
                 <span style="margin-right: 12px;">残予算: ¥{int(remaining_budget):,}</span>
                 <span>残り{remaining_days}日</span>
-            </div>
+            </div>{forecast_html}
         </div>
-        """,
-        unsafe_allow_html=True
-    )
\ No newline at end of file
+        """
+    payload(len(html.encode()))
+    st.markdown(html, unsafe_allow_html=True)
\ No newline at end of file
@@ -0,0 +1,317 @@
+import datetime
+import os
+import threading
+import tomllib
+from dataclasses import dataclass
+
+import pandas as pd
+import streamlit as st
+
+from ledger.alerts import RULE_KINDS, Rule
+from ledger.budget import BudgetHistory
+from ledger.downsample import POINT_BUDGET
+
+from .Interval import display_interval_card
+from .comparison import display_comparison_table, display_sparklines
+from .explorer import display_explorer
+from .daily_budget import display_daily_budget
+from .list import display_filtered_data
+from .monthly_list import display_monthly_list
+from .search import display_memo_search
+from .stacked_bar import display_stacked_bar
+from .summary import display_budget_table, display_month_totals
+from .timeline import display_timeline
+
+LAYOUTS = ('inline', 'expander', 'tab')
+# ペースのアラートで、計画の支出をどれだけ上回ったら知らせるかの既定値
+PACE_TOLERANCE = 0.2
+
+
+@dataclass(frozen=True)
+class Section:
+    """
+    描画計画の1セクション
+
+    Attributes:
+    - title: str, 見出し（expander・tab ではラベル）
+    - layout: str, 'inline' / 'expander' / 'tab'
+    - expanded: bool, expander の初期状態
+    - widgets: tuple, (ledger, period) を受け取って描画する関数。横並びの行は関数のタプル
+    """
+    title: str
+    layout: str
+    expanded: bool
+    widgets: tuple
+
+
+def _category(spec, section):
+    """ウィジェットの対象カテゴリ（省略時はセクションのカテゴリ）"""
+    category = spec.get('category', section.get('category'))
+    if category is None:
+        raise ValueError(f"セクション「{section.get('title')}」の {spec['type']} にカテゴリがありません")
+    return category
+
+
+def _categories(spec, section):
+    """ウィジェットの対象カテゴリ群（categories 優先、なければ単一カテゴリ）"""
+    if 'categories' in spec:
+        return list(spec['categories'])
+    return [_category(spec, section)]
+
+
+def _budget(spec, budgets):
+    """
+    ウィジェットの月間予算。budget を指定すれば毎月その額、
+    省略時は予算の改定履歴（各月に有効だった対象カテゴリの予算）
+    """
+    if 'budget' in spec:
+        return spec['budget']
+    return budgets
+
+
+def _compile_widget(spec, section, config, budgets):
+    """
+    ウィジェット定義を、(ledger, period) を受け取って描画する関数に変換する。
+    period（分析期間）が None のときは各ウィジェットが今日を基準に期間を決める。
+    現在の状況を示すカード（interval_card / daily_budget）は常に今日が基準。
+    budgets は [budgets] と [[budget_history]] から作った予算の改定履歴
+    """
+    kind = spec.get('type')
+    if kind == 'timeline':
+        categories = _categories(spec, section)
+        args = (categories if 'categories' in spec else categories[0],
+                spec.get('months', 1), _budget(spec, budgets))
+        points = spec.get('points', POINT_BUDGET)
+        return lambda ledger, period: display_timeline(ledger, *args, period=period, max_points=points)
+    if kind == 'interval_card':
+        category, days = _category(spec, section), spec['days']
+        return lambda ledger, period: display_interval_card(ledger, category, days)
+    if kind == 'daily_budget':
+        category, budget = _category(spec, section), _budget(spec, budgets)
+        return lambda ledger, period: display_daily_budget(ledger, category, budget)
+    if kind == 'monthly_list':
+        category, months = _category(spec, section), spec.get('months', 3)
+        return lambda ledger, period: display_monthly_list(ledger, category, months, period=period)
+    if kind == 'filtered_data':
+        categories, items = _categories(spec, section), spec.get('items', 3)
+        return lambda ledger, period: display_filtered_data(ledger, categories, items, period=period)
+    if kind == 'stacked_bar':
+        categories, months = _categories(spec, section), spec.get('months', 6)
+        colors = dict(config.get('colors', {}))
+        return lambda ledger, period: display_stacked_bar(ledger, categories, months=months,
+                                                          color_map=colors, period=period)
+    if kind == 'month_totals':
+        months = spec.get('months', 5)
+        return lambda ledger, period: display_month_totals(ledger, months, period=period)
+    if kind == 'budget_table':
+        categories = list(spec.get('categories', budgets.categories))
+        default = spec.get('default')
+        return lambda ledger, period: display_budget_table(ledger, categories, budgets, default,
+                                                           period=period)
+    if kind == 'comparison_table':
+        categories = list(spec['categories']) if 'categories' in spec else None
+        return lambda ledger, period: display_comparison_table(ledger, categories, period=period)
+    if kind == 'sparklines':
+        categories = list(spec['categories']) if 'categories' in spec else None
+        months = spec.get('months', 12)
+        return lambda ledger, period: display_sparklines(ledger, categories, months, period=period)
+    if kind == 'explorer':
+        categories = list(spec.get('categories', budgets.categories))
+        size = spec.get('page_size', 50)
+        return lambda ledger, period: display_explorer(ledger, categories, size, period=period)
+    if kind == 'memo_search':
+        items = spec.get('items', 20)
+        return lambda ledger, period: display_memo_search(ledger, items, period=period)
+    raise ValueError(f"セクション「{section.get('title')}」に未知のウィジェットがあります: {kind}")
+
+
+def compile_plan(config):
+    """
+    ダッシュボード定義（TOMLを読み込んだ辞書）を描画計画に変換する。
+    定義の誤りはここで ValueError として検出し、描画中には失敗しないようにする
+
+    Returns:
+    - list[Section]
+    """
+    budgets = BudgetHistory.from_config(config)
+    plan = []
+    for section in config.get('sections', []):
+        layout = section.get('layout', 'inline')
+        if layout not in LAYOUTS:
+            raise ValueError(f"セクション「{section.get('title')}」の layout が不正です: {layout}")
+        widgets = []
+        for spec in section.get('widgets', []):
+            if 'row' in spec:
+                widgets.append(tuple(_compile_widget(s, section, config, budgets) for s in spec['row']))
+            else:
+                widgets.append(_compile_widget(spec, section, config, budgets))
+        plan.append(Section(
+            title=section.get('title', ''),
+            layout=layout,
+            expanded=bool(section.get('expanded', False)),
+            widgets=tuple(widgets),
+        ))
+    return plan
+
+
+def compile_alerts(config, month=None):
+    """
+    ダッシュボード定義からアラートのルールを作る。
+    予算のある各カテゴリに予算超過とペース超過、interval_card の推奨日数に頻度のルールを作り、
+    [alerts] の rules に書いたルールを加える。enabled = false なら作らない
+
+    Parameters:
+    - config: dict, ダッシュボード定義
+    - month: pandas Period or None, 予算の基準月（None なら今月）。その月に有効な予算を使う
+
+    Returns:
+    - tuple[Rule]
+    """
+    settings = config.get('alerts', {})
+    if not settings.get('enabled', True):
+        return ()
+    tolerance = float(settings.get('pace_tolerance', PACE_TOLERANCE))
+
+    if month is None:
+        month = pd.Period(datetime.date.today(), freq='M')
+    budgets = BudgetHistory.from_config(config).matrix([month]).iloc[0]
+
+    rules = []
+    for category, budget in budgets.items():
+        # その月にまだ予算のない（適用前の）カテゴリは除く
+        if budget <= 0:
+            continue
+        rules.append(Rule('over_budget', category, int(budget)))
+        rules.append(Rule('pace', category, int(budget), tolerance))
+    for section in config.get('sections', []):
+        for spec in section.get('widgets', []):
+            for cell in spec.get('row', [spec]):
+                if cell.get('type') == 'interval_card':
+                    rules.append(Rule('frequency', _category(cell, section), int(cell['days'])))
+    for spec in settings.get('rules', []):
+        kind = spec.get('type')
+        if kind not in RULE_KINDS:
+            raise ValueError(f"アラートのルールの type が不正です: {kind}")
+        if 'category' not in spec or 'threshold' not in spec:
+            raise ValueError(f"アラートのルール（{kind}）には category と threshold が必要です")
+        rules.append(Rule(kind, spec['category'], int(spec['threshold']),
+                          float(spec.get('tolerance', tolerance if kind == 'pace' else 0.0))))
+    # 同じルールが重複していれば1つにまとめる
+    return tuple(dict.fromkeys(rules))
+
+
+# 定義ファイルごとの (更新時刻, 定義, 描画計画)。更新時刻が変わったら作り直す
+_plans = {}
+# 定義ファイルごとの ((更新時刻, 基準月), アラートのルール)。月が変わったらその月に有効な予算で作り直す
+_rules = {}
+_plans_lock = threading.Lock()
+
+
+def _load(path):
+    """定義ファイルを読み込み (更新時刻, 定義, 描画計画) を返す"""
+    mtime = os.path.getmtime(path)
+    with _plans_lock:
+        cached = _plans.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached
+    with open(path, 'rb') as f:
+        config = tomllib.load(f)
+    loaded = (mtime, config, compile_plan(config))
+    with _plans_lock:
+        _plans[path] = loaded
+    return loaded
+
+
+def load_dashboard(path):
+    """
+    ダッシュボード定義ファイル（TOML）を読み込み、描画計画を返す
+
+    Parameters:
+    - path: str, 定義ファイルのパス
+    """
+    return _load(path)[2]
+
+
+def load_alert_rules(path, month=None):
+    """
+    ダッシュボード定義ファイル（TOML）から、アラートのルールを返す
+
+    Parameters:
+    - path: str, 定義ファイルのパス
+    - month: pandas Period or None, 予算の基準月（None なら今月）
+    """
+    if month is None:
+        month = pd.Period(datetime.date.today(), freq='M')
+    mtime, config, _ = _load(path)
+    stamp = (mtime, pd.Period(month, freq='M'))
+    with _plans_lock:
+        cached = _rules.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+    rules = compile_alerts(config, stamp[1])
+    with _plans_lock:
+        _rules[path] = (stamp, rules)
+    return rules
+
+
+def _render_widgets(section, ledger, period):
+    """セクション内のウィジェットを順に描画する"""
+    for widget in section.widgets:
+        if isinstance(widget, tuple):
+            for column, cell in zip(st.columns(len(widget)), widget):
+                with column:
+                    cell(ledger, period)
+        else:
+            widget(ledger, period)
+
+
+def _lazy_expander(section, key):
+    """開閉状態を追跡する expander（古い Streamlit では常に計算する expander）"""
+    try:
+        return st.expander(section.title, expanded=section.expanded, key=key, on_change='rerun')
+    except TypeError:
+        return st.expander(section.title, expanded=section.expanded)
+
+
+def _lazy_tabs(sections, key):
+    """選択状態を追跡するタブ（古い Streamlit では全タブを計算するタブ）"""
+    titles = [section.title for section in sections]
+    try:
+        return st.tabs(titles, key=key, on_change='rerun')
+    except TypeError:
+        return st.tabs(titles)
+
+
+def render_dashboard(plan, ledger, period=None):
+    """
+    描画計画に従ってダッシュボードを表示する。閉じている expander と
+    選択されていないタブの中身は計算しない
+
+    Parameters:
+    - plan: list[Section], load_dashboard の返り値
+    - ledger: Ledger, 家計簿データ
+    - period: AnalysisPeriod or None, 分析期間（None なら今日を基準にする）
+    """
+    index = 0
+    while index < len(plan):
+        section = plan[index]
+        if section.layout == 'tab':
+            group = [section]
+            while index + len(group) < len(plan) and plan[index + len(group)].layout == 'tab':
+                group.append(plan[index + len(group)])
+            for tab, tab_section in zip(_lazy_tabs(group, key=f"dashboard-tabs-{index}"), group):
+                with tab:
+                    if getattr(tab, 'open', None) is not False:
+                        _render_widgets(tab_section, ledger, period)
+            index += len(group)
+            continue
+
+        if section.layout == 'expander':
+            expander = _lazy_expander(section, key=f"dashboard-section-{index}")
+            with expander:
+                if getattr(expander, 'open', None) is not False:
+                    _render_widgets(section, ledger, period)
+        else:
+            st.subheader(section.title)
+            _render_widgets(section, ledger, period)
+        index += 1
@@ -0,0 +1,123 @@
+import os
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+from ledger import plane
+from ledger.explorer import SORTS, page_after, select_rows
+from .formatting import yen
+from .profiler import payload, profiled, touch
+from .render_cache import show_table
+from .styles import style_entry_table
+
+# 保持する絞り込み結果の最大件数。環境変数 EXPLORER_CACHE_SIZE で上書きできる。
+# 絞り込み結果は該当する全明細の行位置を持ち、メモの入力ごとに作られるため、
+# 描画キャッシュとは分けて少数だけ保持する
+SELECTION_CACHE_SIZE = int(os.getenv("EXPLORER_CACHE_SIZE", "8"))
+
+# (データの版, 絞り込み条件) → 絞り込み結果（LRU）
+_selections = OrderedDict()
+_selections_lock = threading.Lock()
+
+# 並べ替えの表示名
+SORT_LABELS = {
+    'date_desc': '日付（新しい順）',
+    'date_asc': '日付（古い順）',
+    'amount_desc': '金額（高い順）',
+    'amount_asc': '金額（安い順）',
+}
+
+
+@profiled
+def display_explorer(ledger, categories, page_size=50, period=None):
+    """
+    全明細を絞り込み・並べ替え・ページ送りしながら閲覧する
+
+    絞り込みと並べ替えは行位置の配列だけで行い、文字列に整形するのは
+    表示中のページの明細だけなので、全件を閲覧しても1ページ分の時間で済む。
+    ページの位置（カーソル）はセッションごとのUIの状態として保持する。
+
+    Parameters:
+    - ledger: Ledger, 家計簿データ
+    - categories: list[str], カテゴリの選択肢
+    - page_size: int, 1ページの件数
+    - period: AnalysisPeriod or None, 分析期間（指定時はこの期間の明細だけを表示する）
+    """
+    columns = st.columns([3, 2, 2])
+    selected = columns[0].multiselect("カテゴリ", categories, key='explorer-categories')
+    memo = columns[1].text_input("メモ", key='explorer-memo').strip()
+    sort = columns[2].selectbox("並べ替え", list(SORTS), format_func=SORT_LABELS.get, key='explorer-sort')
+
+    filters = (tuple(selected), memo, sort, period)
+    selection = _select(ledger, filters)
+
+    # 絞り込みが変わったら先頭のページに戻る。cursors は表示したページのカーソルの履歴
+    state = st.session_state.setdefault('explorer-pages', {'filters': None, 'cursors': [None]})
+    if state['filters'] != (filters, ledger.version):
+        state['filters'] = (filters, ledger.version)
+        state['cursors'] = [None]
+
+    page = page_after(selection, state['cursors'][-1], page_size)
+    touch(len(page.rows))
+
+    if len(selection) == 0:
+        st.info("条件に一致する明細はありません。")
+        return
+    show_table(_build_page(ledger, page.rows))
+
+    caption = f"全 {len(selection):,} 件中 {page.offset + 1:,}〜{page.offset + len(page.rows):,} 件目"
+    payload(len(caption.encode()))
+    buttons = st.columns([1, 1, 1, 4])
+    if buttons[0].button("最初", key='explorer-first', disabled=len(state['cursors']) == 1):
+        state['cursors'] = [None]
+        st.rerun()
+    if buttons[1].button("前へ", key='explorer-prev', disabled=len(state['cursors']) == 1):
+        state['cursors'].pop()
+        st.rerun()
+    if buttons[2].button("次へ", key='explorer-next', disabled=page.next_cursor is None):
+        state['cursors'].append(page.next_cursor)
+        st.rerun()
+    buttons[3].caption(caption)
+
+
+def _select(ledger, filters):
+    """絞り込み結果を返す（同じ版・同じ条件なら保持している結果を使う）"""
+    key = (ledger.version, filters)
+    with _selections_lock:
+        if key in _selections:
+            _selections.move_to_end(key)
+            return _selections[key]
+
+    selected, memo, sort, period = filters
+    selection = select_rows(ledger, list(selected) or None,
+                            period.start if period is not None else None,
+                            period.end if period is not None else None,
+                            memo or None, sort)
+
+    with _selections_lock:
+        _selections[key] = selection
+        _selections.move_to_end(key)
+        while len(_selections) > SELECTION_CACHE_SIZE:
+            _selections.popitem(last=False)
+    return selection
+
+
+def _forget(version):
+    """どのセッションも表示しなくなった版の絞り込み結果を破棄する"""
+    with _selections_lock:
+        for key in [key for key in _selections if key[0] == version]:
+            del _selections[key]
+
+
+plane.on_evict(_forget)
+
+
+def _build_page(ledger, rows):
+    """表示するページの明細だけを整形し、スタイル付きで返す"""
+    page = ledger.df.take(rows)
+    display_df = page[['日付', 'カテゴリ', 'メモ', '金額']].assign(
+        日付=page['日付'].dt.strftime('%Y-%m-%d'),
+        金額=yen(page['金額']),
+    )
+    return style_entry_table(display_df.style)
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+# 強調の色（予算超過・増加は赤、減少は青）
+ALERT_STYLE = 'color: #EA4335; font-weight: 600;'
+DECREASE_STYLE = 'color: #769CDF;'
+
+
+def _format_column(values, fmt):
+    """
+    列の値を文字列にした object 配列を返す。
+    金額は同じ値が繰り返し現れるため、異なる値だけを整形して行位置に配る
+
+    Parameters:
+    - values: 配列 or pandas Series, 整形する値
+    - fmt: 1つの値を文字列にする関数
+    """
+    codes, uniques = pd.factorize(np.asarray(values))
+    # 欠損のコード -1 は末尾の空文字を指す
+    labels = np.array([fmt(value) for value in uniques] + [''], dtype=object)
+    return labels[codes]
+
+
+def _rounded(values):
+    """
+    小数を円単位に丸めた配列（f"{x:,.0f}" と同じ偶数丸め）。
+    丸めた値ごとに整形できるよう先に丸め、-0 は 0 にそろえる。欠損は NaN のまま
+    """
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.integer):
+        return values
+    return np.round(values.astype(np.float64)) + 0.0
+
+
+def yen(values):
+    """
+    金額の列を「¥1,234」形式の文字列にする（小数は円単位に丸める）
+
+    Parameters:
+    - values: 配列 or pandas Series, 金額（欠損は空文字）
+
+    Returns:
+    - numpy.ndarray[object]
+    """
+    return _format_column(_rounded(values), lambda x: f"¥{x:,.0f}")
+
+
+def signed(values):
+    """
+    増減の列を「+1,234」「-1,234」形式の文字列にする（小数は丸める）
+
+    Parameters:
+    - values: 配列 or pandas Series, 増減額
+    """
+    return _format_column(_rounded(values), lambda x: f"{x:+,.0f}")
+
+
+def percent_change(values):
+    """
+    比率の列を「+12%」形式の文字列にする（欠損は「-」）
+
+    Parameters:
+    - values: 配列 or pandas Series, 比率（0.12 で +12%）
+    """
+    values = np.asarray(values, dtype=np.float64)
+    labels = _format_column(_rounded(values * 100), lambda x: f"{x:+.0f}%")
+    labels[np.isnan(values)] = '-'
+    return labels
+
+
+def month_labels(months):
+    """
+    月の列を「2024年5月」形式の文字列にする
+
+    Parameters:
+    - months: pandas PeriodIndex or Series[period[M]], 月
+    """
+    months = pd.PeriodIndex(months, freq='M')
+    return _format_column(months.year * 100 + months.month, lambda x: f"{x // 100}年{x % 100}月")
+
+
+def sign_styles(values, positive='', negative=ALERT_STYLE):
+    """
+    数値の符号から、セルごとのCSSを返す（Styler.apply 用）。
+    整形後の文字列ではなく元の数値で判定するため、表示形式に依存しない
+
+    Parameters:
+    - values: 配列 or pandas Series, 判定に使う数値（欠損は無色）
+    - positive: str, 正の値のCSS
+    - negative: str, 負の値のCSS
+
+    Returns:
+    - numpy.ndarray[object]: values と同じ長さのCSS
+    """
+    values = np.asarray(values, dtype=np.float64)
+    return np.select([values > 0, values < 0], [positive, negative], default='').astype(object)
+
+
+def styled_by(values, **kwargs):
+    """
+    Styler.apply に渡す、列の数値から sign_styles を返す関数を作る
+
+    Parameters:
+    - values: 配列 or pandas Series, 表示する行と同じ順の数値
+    - kwargs: sign_styles の positive / negative
+    """
+    styles = sign_styles(values, **kwargs)
+    return lambda column: styles
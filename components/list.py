@@ -1,63 +1,49 @@
-import pandas as pd
-import streamlit as st
+from .formatting import yen
+from .profiler import profiled, touch
+from .render_cache import cached, show_table
+from .styles import style_entry_table
 
-def display_filtered_data(df, categories, num_items):
+@profiled
+def display_filtered_data(ledger, categories, num_items, period=None):
     """
     指定されたカテゴリに一致するデータを新しい順で表示し、表示する個数を設定できる関数。
 
     Parameters:
-    - df: pandas DataFrame, データフレーム
+    - ledger: Ledger, 家計簿データ
     - categories: list[str] or str, 表示したいカテゴリ名またはカテゴリ名のリスト
     - num_items: int, 表示するデータの個数
+    - period: AnalysisPeriod or None, 分析期間（指定時はこの期間の明細だけを表示する）
     """
-    # カテゴリでフィルタリング
     if isinstance(categories, str):
         categories = [categories]
-    filtered_df = df[df['カテゴリ'].isin(categories)]
 
-    # 日付でソート（新しい順）
-    filtered_df = filtered_df.sort_values(by='日付', ascending=False)
+    styled = cached('filtered_data', (categories, num_items, period), ledger.version,
+                    lambda: _build_table(ledger, categories, num_items, period))
+    show_table(styled)
 
-    # 必要なカラムだけ抽出
-    filtered_df = filtered_df[['日付', 'メモ', '金額']]
 
-    # 日付のフォーマット変換
-    filtered_df['日付'] = pd.to_datetime(filtered_df['日付']).dt.strftime('%-m月%-d日')
+def _build_table(ledger, categories, num_items, period=None):
+    """最新の明細の表を作り、スタイル付きで返す"""
+    # 索引からカテゴリ（・期間）の行を新しい順に、指定された個数だけ取得
+    if period is not None:
+        rows = ledger.index.rows(categories, period.start, period.end)
+    else:
+        rows = ledger.index.rows(categories)
+    rows = rows[::-1][:num_items]
+    filtered_df = ledger.df.take(rows)
+    touch(len(rows))
 
-    # 金額のフォーマット変換
-    filtered_df['金額'] = filtered_df['金額'].apply(lambda x: f"¥{x:,}")
+    # 必要なカラムだけ抽出し、表示用にフォーマットする（共有の明細は書き換えない）
+    display_df = filtered_df[['日付', 'メモ', '金額']].assign(
+        日付=filtered_df['日付'].dt.strftime('%-m月%-d日'),
+        金額=yen(filtered_df['金額']),
+    )
 
-    # 指定された個数だけ取得
-    display_df = filtered_df.head(num_items).copy()
-    
     # スタイリングを適用
-    styled = display_df.style.set_properties(**{
-        'font-size': '14px',
-        'padding': '8px'
-    }).set_table_styles([
-        {'selector': 'th', 'props': [
-            ('background-color', '#F7F8FA'),
-            ('font-weight', '600'),
-            ('text-align', 'left'),
-            ('padding', '10px'),
-            ('border-bottom', '2px solid #E8EAED'),
-            ('font-size', '13px')
-        ]},
-        {'selector': 'td', 'props': [
-            ('border-bottom', '1px solid #F0F2F4')
-        ]},
-        {'selector': 'tr:hover', 'props': [
-            ('background-color', '#F7F8FA')
-        ]},
-        {'selector': 'td:last-child', 'props': [
-            ('text-align', 'right'),
-            ('font-family', "'SF Mono', Monaco, 'Cascadia Code', 'Roboto Mono', Consolas, monospace")
-        ]}
-    ])
-    
-    # 表示
-    st.dataframe(styled, use_container_width=True, hide_index=True)
+    styled = style_entry_table(display_df.style, hover=True)
+
+    return styled
 
 # 使用例
-# df = load_data(google_sheet_csv_url)  # app.py でデータを読み込む
-# display_filtered_data(df, 'カフェ', 5)  # カフェカテゴリの最新5件を表示
+# ledger = load_data(google_sheet_csv_url)  # app.py でデータを読み込む
+# display_filtered_data(ledger, 'カフェ', 5)  # カフェカテゴリの最新5件を表示
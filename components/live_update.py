@@ -0,0 +1,29 @@
+import os
+
+import streamlit as st
+
+from ledger.federation import current_version
+
+# 表示中のデータが古くなったかを確認する間隔（秒）。ネットワークには触れない
+WATCH_INTERVAL = float(os.getenv("SESSION_WATCH_INTERVAL", "5"))
+
+
+def watch_for_updates(sources, version, interval=WATCH_INTERVAL):
+    """
+    バックグラウンド更新でデータの版が変わったら、このセッションを再実行する
+
+    Streamlit のフラグメントとして一定間隔で実行し、プロセス内のキャッシュの版と
+    表示中の版を比べるだけなので、版が変わらない限り画面は再描画されない。
+
+    Parameters:
+    - sources: list[(str, str)], 取得元の (名前, URL)
+    - version: str, このセッションが表示中のデータの版
+    - interval: float, 確認間隔（秒）
+    """
+    @st.fragment(run_every=interval)
+    def _watch():
+        latest = current_version(sources)
+        if latest is not None and latest != version:
+            st.rerun()
+
+    _watch()
@@ -1,87 +1,72 @@
 import pandas as pd
-import streamlit as st
-import datetime
 
-def display_monthly_list(df, category, num_months):
+from .formatting import month_labels, yen
+from .profiler import profiled, touch
+from .render_cache import cached, show_table
+from .styles import style_amount_table
+
+@profiled
+def display_monthly_list(ledger, category, num_months, period=None):
     """
     指定カテゴリのデータを月ごとに集計して表示
 
     Parameters:
-    - df: pandas DataFrame
+    - ledger: Ledger, 家計簿データ（集計を利用）
     - category: str, 表示したいカテゴリ名
     - num_months: int, 表示する月数
+    - period: AnalysisPeriod or None, 分析期間（指定時は期間の最後の月から遡る）
     """
-    # 日付をdatetime型に変換
-    df['日付'] = pd.to_datetime(df['日付'], errors='coerce')
-    # カテゴリでフィルタ
-    filtered_df = df[df['カテゴリ'] == category].copy()
-    filtered_df = filtered_df.dropna(subset=['日付'])
+    styled = cached('monthly_list', (category, num_months, period), ledger.version,
+                    lambda: _build_table(ledger, category, num_months, period))
+    show_table(styled)
 
-    # 月ごとに集計
-    filtered_df['月'] = filtered_df['日付'].dt.to_period('M')
-    monthly_summary = filtered_df.groupby('月').agg(
-        購入回数=('金額', 'size'),
-        合計金額=('金額', 'sum')
-    ).reset_index()
 
-    # 平均金額を計算
-    monthly_summary['平均金額'] = monthly_summary['合計金額'] / monthly_summary['購入回数']
+def detail_table(summary):
+    """
+    月別集計を「月」と「平均金額 × 購入回数 = 合計金額」形式の「詳細」の2列に、
+    列単位の整形と連結で変換する
 
-    # 金額の表示フォーマット
-    monthly_summary['平均金額'] = monthly_summary['平均金額'].apply(lambda x: f"¥{x:,.0f}")
-    monthly_summary['合計金額'] = monthly_summary['合計金額'].apply(lambda x: f"¥{x:,.0f}")
+    Parameters:
+    - summary: pandas DataFrame, 月 / 購入回数 / 合計金額 / 平均金額 の列を持つ月別集計
 
-    # 「平均金額 × 購入回数 = 合計金額」形式の列を作成
-    monthly_summary['詳細'] = monthly_summary.apply(
-        lambda row: f"{row['平均金額']} × {row['購入回数']} = {row['合計金額']}", axis=1
-    )
+    Returns:
+    - pandas DataFrame
+    """
+    return pd.DataFrame({
+        '月': month_labels(summary['月']),
+        '詳細': (yen(summary['平均金額']) + ' × '
+               + summary['購入回数'].astype(str).to_numpy(dtype=object) + ' = '
+               + yen(summary['合計金額'])),
+    })
 
-    # 月を「YYYY年M月」形式に変換する前に、今月から直近num_month分だけ抽出
-    import datetime
 
-    # 今日の年月
-    today = pd.Timestamp.today()
-    this_month = today.to_period('M')
+def _build_table(ledger, category, num_months, period=None):
+    """月別集計の表を作り、スタイル付きで返す"""
+    # 月ごとの件数・合計・平均を集計から取得
+    monthly_summary = ledger.cube.monthly(category).rename_axis('月').reset_index()
+    touch(len(monthly_summary))
+
+    # 今月から直近num_month分だけ抽出してから整形する
+    # 今日の年月（分析期間の指定があれば期間の最後の月）
+    if period is not None:
+        this_month = period.last_month
+    else:
+        today = pd.Timestamp.today()
+        this_month = today.to_period('M')
 
     # 直近num_month分のPeriodをリストで作成（新しい順）
     recent_months = [(this_month - i) for i in range(num_months)]
     # 古い順に並べ替え
     recent_months = sorted(recent_months)
 
-    # recent_monthsに含まれる月だけ抽出
+    # recent_monthsに含まれる月だけ抽出し、整形前に月（Period）が若い順にソート
     monthly_summary = monthly_summary[monthly_summary['月'].isin(recent_months)]
+    monthly_summary = monthly_summary.sort_values('月')
 
-    # 月を「YYYY年M月」形式に変換
-    monthly_summary['月'] = monthly_summary['月'].apply(lambda x: f"{x.year}年{x.month}月")
-
-    # 月が若い順にソート
-    monthly_summary = monthly_summary.sort_values('月').reset_index(drop=True)
-
-    # 列の順番を指定（「月」と「詳細」だけ表示）
-    monthly_summary = monthly_summary[['月', '詳細']]
+    # 「月」と「詳細」だけの表に整形
+    monthly_summary = detail_table(monthly_summary)
 
     # スタイリングを適用
-    styled = monthly_summary.style.set_properties(**{
-        'text-align': 'right',
-        'font-family': "'SF Mono', Monaco, 'Cascadia Code', 'Roboto Mono', Consolas, monospace",
-        'font-size': '14px',
-        'padding': '10px'
-    }).set_table_styles([
-        {'selector': 'th', 'props': [
-            ('background-color', '#F7F8FA'),
-            ('font-weight', '600'),
-            ('text-align', 'right'),
-            ('padding', '12px'),
-            ('border-bottom', '2px solid #E8EAED'),
-            ('font-size', '14px')
-        ]},
-        {'selector': 'td', 'props': [
-            ('border-bottom', '1px solid #F0F2F4')
-        ]},
-        {'selector': 'tr:hover', 'props': [
-            ('background-color', '#F7F8FA')
-        ]}
-    ])
+    styled = style_amount_table(monthly_summary.style, header_align='right', label_column=False)
 
-    # 表を表示（st.dataframeでStylerを使う）
-    st.dataframe(styled, use_container_width=True, hide_index=True)
+    return styled
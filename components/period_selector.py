@@ -0,0 +1,64 @@
+import datetime
+
+import pandas as pd
+import streamlit as st
+
+from ledger.period import month_period, quarter_period, range_period, year_period
+
+# 期間の種類（表示名 → 内部の種類）。None は「今日」を基準にした通常の表示
+PERIOD_OPTIONS = {
+    '今日まで': None,
+    '月': 'month',
+    '四半期': 'quarter',
+    '年': 'year',
+    '期間指定': 'range',
+}
+
+
+def select_period(ledger):
+    """
+    サイドバーに分析期間の選択ウィジェットを表示し、選ばれた期間を返す
+
+    選べる月・年はデータのある範囲に限る。選択状態はウィジェットとして
+    セッションごとに保持し、期間の合計は集計（AggregateCube）から引くため
+    期間を切り替えても明細は走査しない。
+
+    Parameters:
+    - ledger: Ledger, 家計簿データ
+
+    Returns:
+    - AnalysisPeriod or None: 「今日まで」を選んだ場合は None
+    """
+    sidebar = st.sidebar
+    kind = PERIOD_OPTIONS[sidebar.radio("分析期間", list(PERIOD_OPTIONS), horizontal=True,
+                                        key='period-kind')]
+    if kind is None:
+        return None
+
+    months = ledger.cube.sums.index
+    if len(months) == 0:
+        sidebar.caption("データがないため期間を選べません")
+        return None
+    years = sorted(set(months.year), reverse=True)
+
+    if kind == 'month':
+        month = sidebar.selectbox("月", list(reversed(months)), key='period-month',
+                                  format_func=lambda p: f"{p.year}年{p.month}月")
+        return month_period(month)
+    if kind == 'quarter':
+        year = sidebar.selectbox("年", years, key='period-quarter-year')
+        quarter = sidebar.selectbox("四半期", [1, 2, 3, 4], key='period-quarter',
+                                    format_func=lambda q: f"第{q}四半期")
+        return quarter_period(year, quarter)
+    if kind == 'year':
+        return year_period(sidebar.selectbox("年", years, key='period-year'))
+
+    first = months[0].start_time.date()
+    last = max(months[-1].end_time.date(), datetime.date.today())
+    default = (max(first, (pd.Timestamp.today() - pd.DateOffset(months=1)).date()), datetime.date.today())
+    selected = sidebar.date_input("期間", value=default, min_value=first, max_value=last,
+                                  key='period-range')
+    # 初日だけ選んだ途中の状態では期間が確定しない
+    if not isinstance(selected, (tuple, list)) or len(selected) != 2:
+        return None
+    return range_period(*selected)
@@ -0,0 +1,136 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import pandas as pd
+import streamlit as st
+
+from ledger import loader, plane
+
+# 環境変数 KAKEIBO_PROFILE=1 または URL の ?profile=1 で計測を有効にする
+ENV_ENABLED = os.getenv("KAKEIBO_PROFILE", "0") == "1"
+# セッションごとに保持する再実行の履歴数
+HISTORY_SIZE = 50
+
+# 再実行中の計測結果（Streamlitは再実行ごとにスクリプトスレッドを割り当てる）
+_local = threading.local()
+# 計測パネルに表示するキャッシュの利用状況（表示名 → 回数の辞書）
+_counters = {'取得元のキャッシュ': loader.stats}
+
+
+def enabled():
+    """計測が有効か"""
+    if ENV_ENABLED:
+        return True
+    try:
+        return st.query_params.get('profile') == '1'
+    except Exception:
+        return False
+
+
+def begin_run():
+    """再実行の開始時に呼び、計測結果を初期化する"""
+    _local.records = []
+    _local.stack = []
+    _local.started = time.perf_counter()
+
+
+def _summarize(args):
+    """計測表に出す引数の要約（カテゴリ名など先頭の引数）"""
+    if len(args) < 2:
+        return ''
+    value = args[1]
+    if isinstance(value, (list, tuple)):
+        value = ','.join(map(str, value))
+    text = str(value)
+    return text if len(text) <= 40 else text[:37] + '...'
+
+
+def profiled(func):
+    """表示関数・読み込み関数を包み、実行時間・処理行数・出力サイズを記録する"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not enabled() or not hasattr(_local, 'records'):
+            return func(*args, **kwargs)
+        record = {'コンポーネント': func.__name__, '引数': _summarize(args),
+                  '時間(ms)': 0.0, '行数': 0, '出力(byte)': 0}
+        _local.stack.append(record)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record['時間(ms)'] = round((time.perf_counter() - start) * 1000, 2)
+            _local.stack.pop()
+            _local.records.append(record)
+    return wrapper
+
+
+def watch_counters(label, counts):
+    """
+    計測パネルに表示する利用状況のカウンタを登録する
+
+    Parameters:
+    - label: str, 表示名
+    - counts: dict, 名前 → 回数（登録元が更新する辞書をそのまま渡す）
+    """
+    _counters[label] = counts
+
+
+def touch(rows):
+    """実行中のコンポーネントが処理した行数を加算する（計測無効時は何もしない）"""
+    stack = getattr(_local, 'stack', None)
+    if stack:
+        stack[-1]['行数'] += int(rows)
+
+
+def payload(size):
+    """実行中のコンポーネントがブラウザへ送る出力のサイズ（バイト）を加算する"""
+    stack = getattr(_local, 'stack', None)
+    if stack:
+        stack[-1]['出力(byte)'] += int(size)
+
+
+def _history():
+    """セッションごとの計測履歴"""
+    if '_profile_history' not in st.session_state:
+        st.session_state['_profile_history'] = deque(maxlen=HISTORY_SIZE)
+    return st.session_state['_profile_history']
+
+
+def render_panel():
+    """
+    再実行の最後に呼び、サイドバーに計測表と履歴のエクスポートを表示する
+    """
+    if not enabled() or not hasattr(_local, 'records'):
+        return
+    records = _local.records
+    total_ms = round((time.perf_counter() - _local.started) * 1000, 2)
+    history = _history()
+    history.append({
+        'timestamp': pd.Timestamp.now().isoformat(timespec='seconds'),
+        'total_ms': total_ms,
+        'records': records,
+    })
+
+    with st.sidebar.expander("描画時間の計測", expanded=True):
+        st.caption(f"今回の再実行: {total_ms:,.1f} ms（{len(records)} 件）")
+        shared = plane.stats()
+        st.caption(f"共有データ: {shared['versions']} 版 / {shared['sessions']} セッション / "
+                   f"{shared['bytes'] / 1024 / 1024:,.1f} MB")
+        for label, counts in list(_counters.items()):
+            st.caption(f"{label}: " + " / ".join(f"{name} {count:,}" for name, count in counts.items()))
+        table = pd.DataFrame(records, columns=['コンポーネント', '引数', '時間(ms)', '行数', '出力(byte)'])
+        st.dataframe(table.sort_values('時間(ms)', ascending=False),
+                     use_container_width=True, hide_index=True)
+
+        rows = [
+            {'timestamp': run['timestamp'], 'total_ms': run['total_ms'], **record}
+            for run in history for record in run['records']
+        ]
+        st.download_button("履歴をJSONで保存", json.dumps(list(history), ensure_ascii=False, indent=2),
+                           file_name='render_profile.json', mime='application/json')
+        st.download_button("履歴をCSVで保存", pd.DataFrame(rows).to_csv(index=False),
+                           file_name='render_profile.csv', mime='text/csv')
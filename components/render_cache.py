@@ -0,0 +1,98 @@
+import copy
+import datetime
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+from .profiler import payload, watch_counters
+
+# 保持する描画結果の最大件数。環境変数 RENDER_CACHE_SIZE で上書きできる
+MAX_ENTRIES = int(os.getenv("RENDER_CACHE_SIZE", "256"))
+
+# プロセス内で全セッションが共有する描画結果（LRU）
+_entries = OrderedDict()
+_lock = threading.Lock()
+
+# キャッシュの利用状況（計測パネルに表示する）
+stats = {'hit': 0, 'miss': 0, 'evicted': 0}
+watch_counters('描画キャッシュ', stats)
+
+
+def _freeze(value):
+    """リストや辞書を含む引数を、キャッシュキーに使えるハッシュ可能な値に変換する"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def cached(component, params, version, build):
+    """
+    (データの版, コンポーネント, 引数, 今日の日付) をキーに描画結果をメモ化する
+
+    データも引数も変わっていないウィジェットは、再実行時にキャッシュから再生される。
+    日付をキーに含めるのは、各コンポーネントが「今日」を基準に期間を決めるため。
+
+    Parameters:
+    - component: str, コンポーネント名
+    - params: コンポーネントの引数（リスト・辞書を含んでよい）
+    - version: str, データの版（Ledger.version）
+    - build: callable, キャッシュにない場合に描画結果を作る関数
+
+    Returns:
+    - build() の返り値（None も含めてキャッシュする）
+    """
+    key = (component, version, _freeze(params), datetime.date.today())
+    with _lock:
+        if key in _entries:
+            _entries.move_to_end(key)
+            stats['hit'] += 1
+            return _entries[key]
+
+    value = build()
+
+    with _lock:
+        stats['miss'] += 1
+        _entries[key] = value
+        _entries.move_to_end(key)
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
+            stats['evicted'] += 1
+    return value
+
+
+def chart_json(chart):
+    """Altairチャートを Vega-Lite 仕様のJSON文字列に変換する"""
+    return json.dumps(chart.to_dict(), ensure_ascii=False)
+
+
+def show_chart(spec):
+    """chart_json で作った仕様を表示する（Streamlitが仕様を書き換えるため毎回デコードする）"""
+    payload(len(spec.encode()))
+    st.vega_lite_chart(json.loads(spec), use_container_width=True)
+
+
+def show_table(styler):
+    """
+    キャッシュした Styler を表示する。Streamlit は表示時に Styler の状態を
+    書き換えるため、セッション間で共有しないよう複製してから渡す
+    """
+    payload(styler.data.memory_usage(deep=True).sum())
+    st.dataframe(copy.deepcopy(styler), use_container_width=True, hide_index=True)
+
+
+def clear():
+    """キャッシュを空にする"""
+    with _lock:
+        _entries.clear()
+
+
+def drop_version(version):
+    """指定した版の描画結果を破棄する（どのセッションも表示しなくなった版の解放用）"""
+    with _lock:
+        for key in [key for key in _entries if key[1] == version]:
+            del _entries[key]
@@ -0,0 +1,55 @@
+import streamlit as st
+
+from ledger.search import search_memos
+from .formatting import yen
+from .profiler import payload, profiled, touch
+from .render_cache import cached, show_table
+from .styles import style_entry_table
+
+
+@profiled
+def display_memo_search(ledger, num_items=20, period=None):
+    """
+    メモの検索ボックスと、一致した明細・メモごとの合計を表示する
+
+    Parameters:
+    - ledger: Ledger, 家計簿データ
+    - num_items: int, 表示する明細の最大件数（新しい順）
+    - period: AnalysisPeriod or None, 分析期間（指定時はこの期間の明細だけを検索する）
+    """
+    query = st.text_input("メモを検索", key='memo-search', placeholder="例: コーヒー 豆").strip()
+    if not query:
+        return
+
+    summary, by_memo, entries = cached('memo_search', (query, num_items, period), ledger.version,
+                                       lambda: _build_tables(ledger, query, num_items, period))
+    payload(len(summary.encode()))
+    st.caption(summary)
+    if by_memo is not None:
+        show_table(by_memo)
+        show_table(entries)
+
+
+def _build_tables(ledger, query, num_items, period):
+    """検索結果の要約と、メモごとの合計・一致した明細の表を作る（一致なしなら表は None）"""
+    start, end = (period.start, period.end) if period is not None else (None, None)
+    result = search_memos(ledger, query, start, end)
+    touch(result.count)
+    if result.count == 0:
+        return f"「{query}」に一致する明細はありません", None, None
+
+    summary = f"「{query}」: {result.count:,} 件 / 合計 ¥{result.total:,}"
+
+    by_memo = result.by_memo.assign(合計金額=yen(result.by_memo['合計金額']))
+
+    rows = ledger.df.take(result.rows[:num_items])
+    entries = rows[['日付', 'カテゴリ', 'メモ', '金額']].assign(
+        日付=rows['日付'].dt.strftime('%Y-%m-%d'),
+        金額=yen(rows['金額']),
+    )
+
+    return (
+        summary,
+        style_entry_table(by_memo.style),
+        style_entry_table(entries.style),
+    )
@@ -0,0 +1,34 @@
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from ledger import plane
+from .render_cache import drop_version
+
+# 表示されなくなった版の描画結果も一緒に解放する
+plane.on_evict(drop_version)
+
+
+def _is_alive(session_id):
+    """セッションがまだ接続中か"""
+    return Runtime.instance().is_active_session(session_id)
+
+
+def share_ledger(ledger):
+    """
+    このセッションが表示する Ledger をプロセス共有のデータプレーンに登録し、
+    共有インスタンスを返す。セッションごとに持つのはUIの選択状態だけにする
+
+    Streamlit の実行環境の外（ベンチマークなど）では渡された Ledger をそのまま返す。
+
+    Parameters:
+    - ledger: Ledger, 読み込んだデータ
+
+    Returns:
+    - Ledger
+    """
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is None or not Runtime.exists():
+        return ledger
+    # 閉じられたセッションが持っていた版を解放してから登録する
+    plane.sweep(_is_alive)
+    return plane.acquire(ctx.session_id, ledger)
@@ -2,39 +2,52 @@ import streamlit as st
 import pandas as pd
 import altair as alt
 
-def display_stacked_bar(df, categories, months=6, color_map=None):
+from .profiler import profiled, touch
+from .render_cache import cached, chart_json, show_chart
+
+@profiled
+def display_stacked_bar(ledger, categories, months=6, color_map=None, period=None):
     """
     指定カテゴリ群のデータを月ごとに積み上げ棒グラフで表示する
 
     Parameters
     ----------
-    df : pd.DataFrame
-        データフレーム（'カテゴリ', '日付', '金額' などのカラムが必要）
+    ledger : Ledger
+        家計簿データ（カテゴリ×月の集計を利用）
     categories : list[str]
         表示するカテゴリのリスト
     months : int
         遡って表示する月数
     color_map : dict
         カテゴリごとの色指定（例: {'カフェ': '#ff7f0e', 'ランチ': '#1f77b4'}）
+    period : AnalysisPeriod or None
+        分析期間（指定時は期間の最後の月から遡る）
     """
-    df = df.copy()
-    df['日付'] = pd.to_datetime(df['日付'])
-
-    # 指定カテゴリ群のみ抽出
-    df = df[df['カテゴリ'].isin(categories)]
-
-    # 最新月を取得し、months分だけ遡る
-    latest_month = df['日付'].max().to_period('M')
-    month_list = [(latest_month - i).strftime('%Y-%m') for i in reversed(range(months))]
+    spec = cached('stacked_bar', (categories, months, color_map, period), ledger.version,
+                  lambda: _build_chart(ledger, categories, months, color_map, period))
+    if spec is None:
+        st.info("該当カテゴリのデータがありません。")
+        return
+    show_chart(spec)
 
-    # 月カラムを追加
-    df['月'] = df['日付'].dt.strftime('%Y-%m')
 
-    # 月リストに含まれるデータのみ
-    df = df[df['月'].isin(month_list)]
+def _build_chart(ledger, categories, months, color_map, period=None):
+    """積み上げ棒グラフを作り、Vega-Lite仕様のJSONで返す（データがなければ None）"""
+    # 指定カテゴリ群の最新月（分析期間の指定があれば期間の最後の月）を取得し、months分だけ遡る
+    latest_month = ledger.cube.latest_period(categories)
+    if latest_month is None:
+        return None
+    if period is not None:
+        latest_month = period.last_month
+    periods = [latest_month - i for i in reversed(range(months))]
+    month_list = [p.strftime('%Y-%m') for p in periods]
 
-    # 積み上げ棒グラフ用にカテゴリごとに集計
-    grouped = df.groupby(['月', 'カテゴリ'])['金額'].sum().reset_index()
+    # 積み上げ棒グラフ用に月×カテゴリの集計を縦持ちに変換
+    matrix = ledger.cube.month_matrix(periods, categories)
+    touch(matrix.size)
+    matrix.index = month_list
+    grouped = matrix.rename_axis(index='月', columns='カテゴリ').stack().rename('金額').reset_index()
+    grouped = grouped[grouped['金額'] != 0].sort_values(['月', 'カテゴリ']).reset_index(drop=True)
 
     # 月の順序を左が古いように設定
     grouped['月'] = pd.Categorical(grouped['月'], categories=month_list, ordered=True)
@@ -103,4 +116,4 @@ def display_stacked_bar(df, categories, months=6, color_map=None):
         titleFont='sans-serif'
     )
 
-    st.altair_chart(chart, use_container_width=True)
+    return chart_json(chart)
@@ -30,6 +30,80 @@ def get_number_style():
         font-weight: 500;
     """
 
+# 数値の表示に使う等幅フォント
+MONOSPACE_FONT = "'SF Mono', Monaco, 'Cascadia Code', 'Roboto Mono', Consolas, monospace"
+
+def style_amount_table(styler, header_align='center', label_column=True):
+    """
+    金額の表（全列を右寄せ・等幅フォント）のスタイルを Styler に適用する
+
+    Parameters:
+    - styler: pandas Styler, 対象の表
+    - header_align: str, 見出しの寄せ方
+    - label_column: bool, Trueなら最初の列を見出しとして左寄せ・太字にする
+    """
+    table_styles = [
+        {'selector': 'th', 'props': [
+            ('background-color', '#F7F8FA'),
+            ('font-weight', '600'),
+            ('text-align', header_align),
+            ('padding', '12px'),
+            ('border-bottom', '2px solid #E8EAED'),
+            ('font-size', '14px')
+        ]},
+        {'selector': 'td', 'props': [
+            ('border-bottom', '1px solid #F0F2F4')
+        ]},
+        {'selector': 'tr:hover', 'props': [
+            ('background-color', '#F7F8FA')
+        ]}
+    ]
+    if label_column:
+        table_styles.append({'selector': 'td:first-child', 'props': [
+            ('text-align', 'left'),
+            ('font-weight', '500')
+        ]})
+    return styler.set_properties(**{
+        'text-align': 'right',
+        'font-family': MONOSPACE_FONT,
+        'font-size': '14px',
+        'padding': '10px'
+    }).set_table_styles(table_styles)
+
+def style_entry_table(styler, hover=False):
+    """
+    明細の表（最後の列が金額）のスタイルを Styler に適用する
+
+    Parameters:
+    - styler: pandas Styler, 対象の表
+    - hover: bool, Trueならマウスを重ねた行に背景色を付ける
+    """
+    table_styles = [
+        {'selector': 'th', 'props': [
+            ('background-color', '#F7F8FA'),
+            ('font-weight', '600'),
+            ('text-align', 'left'),
+            ('padding', '10px'),
+            ('border-bottom', '2px solid #E8EAED'),
+            ('font-size', '13px')
+        ]},
+        {'selector': 'td', 'props': [
+            ('border-bottom', '1px solid #F0F2F4')
+        ]}
+    ]
+    if hover:
+        table_styles.append({'selector': 'tr:hover', 'props': [
+            ('background-color', '#F7F8FA')
+        ]})
+    table_styles.append({'selector': 'td:last-child', 'props': [
+        ('text-align', 'right'),
+        ('font-family', MONOSPACE_FONT)
+    ]})
+    return styler.set_properties(**{
+        'font-size': '14px',
+        'padding': '8px'
+    }).set_table_styles(table_styles)
+
 def apply_custom_css():
     """カスタムCSSを適用"""
     st.markdown("""
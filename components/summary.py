@@ -0,0 +1,95 @@
+import datetime
+
+import pandas as pd
+import streamlit as st
+from dateutil.relativedelta import relativedelta
+
+from ledger.budget import budget_vs_actual
+from .formatting import styled_by, yen
+from .profiler import profiled
+from .render_cache import cached, show_table
+from .styles import style_amount_table
+
+@profiled
+def display_month_totals(ledger, num_months=5, period=None):
+    """
+    全カテゴリの月別合計金額を、今月から遡って表で表示する
+
+    Parameters:
+    - ledger: Ledger, 家計簿データ（集計を利用）
+    - num_months: int, 表示する月数
+    - period: AnalysisPeriod or None, 分析期間（指定時は期間の最後の月から遡る）
+    """
+    today = period.end.date() if period is not None else datetime.date.today()
+    styled = cached('month_totals', (num_months, period), ledger.version,
+                    lambda: _build_month_table(ledger, today, num_months))
+    show_table(styled)
+
+
+@profiled
+def display_budget_table(ledger, categories, budgets, default=None, period=None):
+    """
+    カテゴリ選択ウィジェットと、選択カテゴリの今月の予算・実績・残予算の表を表示する
+
+    Parameters:
+    - ledger: Ledger, 家計簿データ（集計を利用）
+    - categories: list[str], 選択肢のカテゴリ
+    - budgets: BudgetHistory, カテゴリごとの月間予算の改定履歴（各月に有効だった予算を使う）
+    - default: list[str] or None, 初期選択のカテゴリ
+    - period: AnalysisPeriod or None, 分析期間（指定時は今月の代わりにこの期間の実績と、
+      期間内の各月の予算を合計した予算を表示する）
+    """
+    selected_categories = st.multiselect(
+        "",
+        categories,
+        default=default
+    )
+
+    # 実績計算（分析期間の指定がなければ今月）
+    if period is not None:
+        this_period = period
+    else:
+        today = datetime.date.today()
+        this_period = pd.Period(year=today.year, month=today.month, freq='M')
+
+    styled = cached('budget_table', (selected_categories, budgets, this_period), ledger.version,
+                    lambda: _build_budget_table(ledger, selected_categories, budgets, this_period))
+    show_table(styled)
+
+
+def _build_month_table(ledger, today, num_months):
+    """月別合計金額の表を作り、スタイル付きで返す"""
+    months = [today - relativedelta(months=i) for i in range(num_months - 1, -1, -1)]
+    month_names = [month.strftime("%m月") for month in months]
+    total_amounts = [int(ledger.cube.total(pd.Period(month, 'M'))) for month in months]
+
+    month_data = pd.DataFrame({
+        '月': month_names,
+        '合計金額': yen(total_amounts)
+    })
+
+    # テーブルのスタイリング
+    styled_month_df = style_amount_table(month_data.style)
+
+    return styled_month_df
+
+
+def _build_budget_table(ledger, selected_categories, budgets, this_period):
+    """
+    選択カテゴリの予算・実績・残予算の表を作り、スタイル付きで返す。
+    予算と実績は 年月×カテゴリ の表どうしの引き算で求める（this_period は月または AnalysisPeriod）
+    """
+    table = budget_vs_actual(ledger.cube, budgets, this_period, selected_categories)
+    remain = table['残予算'].to_numpy()
+
+    table_df = pd.DataFrame({
+        'カテゴリ': selected_categories,
+        '予算': yen(table['予算']),
+        '実績': yen(table['実績']),
+        '残予算': yen(remain),
+    }, columns=['カテゴリ', '予算', '実績', '残予算'])
+
+    # テーブルのスタイリング（残予算がマイナスのセルを赤色にする。判定は整形前の数値で行う）
+    styled_df = style_amount_table(table_df.style.apply(styled_by(remain), subset=['残予算']))
+
+    return styled_df
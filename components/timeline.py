@@ -1,100 +1,95 @@
+import numpy as np
 import pandas as pd
 import streamlit as st
 import altair as alt
 from datetime import datetime
 
-def display_timeline(df, categories, months, monthly_budget):
+from ledger.budget import monthly_budgets
+from ledger.downsample import POINT_BUDGET, downsample
+from ledger.forecast import forecast_month
+from ledger.series import cumulative_series
+from .profiler import profiled, touch
+from .render_cache import cached, chart_json, show_chart
+
+@profiled
+def display_timeline(ledger, categories, months, monthly_budget, period=None, max_points=POINT_BUDGET):
     """
     指定カテゴリ・掲載期間・月間予算で時系列折れ線グラフを表示
 
     Parameters:
-    - df: pandas DataFrame
+    - ledger: Ledger, 家計簿データ
     - categories: list[str] or str, 表示したいカテゴリ名またはカテゴリ名のリスト
     - months: int, 掲載期間（月単位、1なら今月のみ、2なら今月と先月をまとめて）
-    - monthly_budget: int, 月間予算（円）
+    - monthly_budget: int or BudgetHistory, 月間予算（円）。BudgetHistory なら各月に有効だった
+      対象カテゴリの予算の合計を使う
+    - period: AnalysisPeriod or None, 分析期間（指定時は months の代わりにこの期間を表示する）
+    - max_points: int, 1本の折れ線に描く点の上限（0 なら間引かない）
     """
-    # 日付をdatetime型に変換
-    df['日付'] = pd.to_datetime(df['日付'], errors='coerce')
-    # カテゴリでフィルタ
     if isinstance(categories, str):
         categories = [categories]
-    filtered_df = df[df['カテゴリ'].isin(categories)].copy()
-    filtered_df = filtered_df.dropna(subset=['日付'])
-
-    # 掲載期間（月単位）でフィルタ
-    now = datetime.now()
-    this_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    start_month = (this_month - pd.DateOffset(months=months-1)).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    end_month = ((this_month + pd.DateOffset(months=1)) - pd.Timedelta(days=1)).replace(hour=23, minute=59, second=59, microsecond=999999)
-    mask = (filtered_df['日付'] >= start_month) & (filtered_df['日付'] <= end_month)
-    period_df = filtered_df[mask].copy()
 
-    if period_df.empty:
+    spec = cached('timeline', (categories, months, monthly_budget, period, max_points), ledger.version,
+                  lambda: _build_chart(ledger, categories, months, monthly_budget, period, max_points))
+    if spec is None:
         st.info("該当期間のデータがありません。")
         return
+    show_chart(spec)
 
-    # 日付でソート
-    period_df = period_df.sort_values('日付')
-    period_df['累積金額'] = period_df['金額'].cumsum()
-    period_df['日付ラベル'] = period_df['日付'].dt.strftime('%Y-%m-%d')
-
-    # 期間内の日付リスト
-    last_date = period_df['日付'].max()
 
-    # months=1の場合は今月固定、それ以外は複数月対応
-    if months == 1:
-        # 今月初日から今月末日まで固定
-        start_of_period = this_month
-        end_of_period = end_month
-    else:
-        # 複数月の場合は期間フィルタと同じ範囲
-        start_of_period = start_month
-        end_of_period = end_month
-
-    all_dates = pd.date_range(start=start_of_period, end=end_of_period)
-
-    # 日ごと累積金額（データがない日は直前の累積値を維持）
-    daily = period_df.groupby('日付').agg({'累積金額':'last'}).reindex(all_dates, method='ffill').reset_index()
-    daily.columns = ['日付', '累積金額']
-    
-    # 最初の日付より前の0値を除去し、最後の入力日以降は最後の累積値を維持
-    if not daily.empty and daily['累積金額'].notna().any():
-        # 最初のデータがある日より前は0のまま
-        first_data_idx = daily['累積金額'].first_valid_index()
-        if first_data_idx is not None:
-            daily.loc[:first_data_idx-1, '累積金額'] = 0
-        
-        # 最後のデータがある日以降は最後の累積値で埋める
-        daily['累積金額'] = daily['累積金額'].fillna(method='ffill').fillna(0)
+def _build_chart(ledger, categories, months, monthly_budget, period=None, max_points=POINT_BUDGET):
+    """累積支出と予算線のチャートを作り、Vega-Lite仕様のJSONで返す（データがなければ None）"""
+    now = datetime.now()
+    if period is not None:
+        # 分析期間が指定されていればその期間を表示する
+        start_of_period, end_of_period = period.start, period.end
     else:
-        daily['累積金額'] = daily['累積金額'].fillna(0)
-    daily['日付ラベル'] = daily['日付'].dt.strftime('%Y-%m-%d')
-
-    # 予算線（全月分合計）
-    total_days = (all_dates[-1] - all_dates[0]).days + 1
-    total_budget = monthly_budget * months
-    daily['予算'] = [(total_budget / total_days) * (i+1) for i in range(total_days)]
-
-    # 今日までの累積支出をプロットする DataFrame
-    today = pd.Timestamp(datetime.now().date())
-    spend_daily = daily[daily['日付'] <= today].copy()
-
+        # 掲載期間（月単位）：months-1 か月前の初日から今月末日まで
+        this_month = pd.Timestamp(now.year, now.month, 1)
+        start_of_period = this_month - pd.DateOffset(months=months-1)
+        end_of_period = this_month + pd.DateOffset(months=1) - pd.Timedelta(days=1)
+
+    # 累積支出と予算線（各月に有効だった予算をその月の日数で按分）を一括計算
+    budgets = monthly_budgets(monthly_budget, pd.period_range(start_of_period, end_of_period, freq='M'),
+                              categories)
+    series = cumulative_series(ledger, categories, start_of_period, end_of_period, budgets)
+    touch(series.rows)
+    if series.rows == 0:
+        return None
+
+    # 累積支出は今日までで止める。どちらの線も形を保ったまま点の上限まで間引く
+    # （横ばいの日や一定の傾きの予算線は両端の点だけで同じ線になる）
+    today = np.datetime64(now.date(), 'D')
+    shown = series.dates <= today
+    dates, actual = series.dates[shown], series.actual[shown]
+    kept = downsample(dates, actual, max_points)
+    actual_df = pd.DataFrame({
+        '日付': dates[kept].astype('datetime64[ns]'),
+        '累積金額': actual[kept],
+    })
+    kept = downsample(series.dates, series.budget, max_points)
+    budget_df = pd.DataFrame({
+        '日付': series.dates[kept].astype('datetime64[ns]'),
+        '予算': series.budget[kept],
+    })
+
+    x = alt.X('日付:T',
+              title='日付',
+              axis=alt.Axis(
+                  format='%m/%d',
+                  labelAngle=-45,
+                  labelFontSize=11,
+                  titleFontSize=12,
+                  grid=False
+              ))
     # 折れ線グラフ（今日までをプロット）
-    line_chart = alt.Chart(spend_daily).mark_line(
-        point=True, 
+    line_chart = alt.Chart(actual_df).mark_line(
+        point=True,
         color='#769CDF',
         strokeWidth=3,
         opacity=0.9
     ).encode(
-        x=alt.X('日付ラベル:O', 
-                title='日付', 
-                axis=alt.Axis(
-                    labelAngle=-45,
-                    labelFontSize=11,
-                    titleFontSize=12,
-                    grid=False
-                )),
-        y=alt.Y('累積金額:Q', 
+        x=x,
+        y=alt.Y('累積金額:Q',
                 title='累積金額（円）',
                 axis=alt.Axis(
                     labelFontSize=11,
@@ -104,28 +99,60 @@ def display_timeline(df, categories, months, monthly_budget):
                     gridDash=[2, 2]
                 )),
         tooltip=[
-            alt.Tooltip('日付ラベル', title='日付'),
+            alt.Tooltip('日付:T', title='日付', format='%Y-%m-%d'),
             alt.Tooltip('累積金額:Q', title='支出累計', format=',.0f')
         ]
     )
 
     # 予算線
-    budget_line = alt.Chart(daily).mark_line(
-        strokeDash=[8, 4], 
+    budget_line = alt.Chart(budget_df).mark_line(
+        strokeDash=[8, 4],
         color='#EA4335',
         strokeWidth=2,
         opacity=0.7
     ).encode(
-        x='日付ラベル:O',
+        x=x,
         y=alt.Y('予算:Q', title='累積金額（円）'),
         tooltip=[
-            alt.Tooltip('日付ラベル', title='日付'),
+            alt.Tooltip('日付:T', title='日付', format='%Y-%m-%d'),
             alt.Tooltip('予算:Q', title='予算累計', format=',.0f')
         ]
     )
 
+    layers = [line_chart, budget_line]
+
+    # 今日が期間内なら、月末までの支出予測と予測の幅を重ねる
+    band = _forecast_band(ledger, categories, series, today)
+    if band is not None:
+        forecast_base = alt.Chart(band)
+        layers.insert(0, forecast_base.mark_area(
+            color='#769CDF',
+            opacity=0.15
+        ).encode(
+            x=x,
+            y=alt.Y('下限:Q', title='累積金額（円）'),
+            y2='上限:Q',
+            tooltip=[
+                alt.Tooltip('日付:T', title='日付', format='%Y-%m-%d'),
+                alt.Tooltip('下限:Q', title='予測の下限', format=',.0f'),
+                alt.Tooltip('上限:Q', title='予測の上限', format=',.0f')
+            ]
+        ))
+        layers.append(forecast_base.mark_line(
+            strokeDash=[2, 3],
+            color='#769CDF',
+            strokeWidth=2
+        ).encode(
+            x=x,
+            y=alt.Y('予測:Q', title='累積金額（円）'),
+            tooltip=[
+                alt.Tooltip('日付:T', title='日付', format='%Y-%m-%d'),
+                alt.Tooltip('予測:Q', title='月末までの予測', format=',.0f')
+            ]
+        ))
+
     # 予算線と支出線をレイヤーして表示
-    chart = alt.layer(line_chart, budget_line).resolve_scale(y='shared').properties(
+    chart = alt.layer(*layers).resolve_scale(y='shared').properties(
         title=f"{start_of_period.strftime('%Y-%m-%d')} 〜 {end_of_period.strftime('%Y-%m-%d')} の累積支出",
         width=800,
         height=400
@@ -141,13 +168,26 @@ def display_timeline(df, categories, months, monthly_budget):
         color='#1A1A1A'
     )
 
-    st.altair_chart(chart, use_container_width=True)
+    return chart_json(chart)
 
 
+def _forecast_band(ledger, categories, series, today):
     """
-    # データテーブルも表示（任意）
-    table_df = period_df.copy()
-    table_df['日付'] = table_df['日付'].dt.strftime('%Y-%m-%d')
-    st.dataframe(table_df[['日付', '金額', '累積金額', 'メモ']])
+    今日から月末（期間の最終日まで）の累積支出の予測を、チャート用の表で返す。
+    今日が期間外、または学習に使える過去のデータがなければ None
     """
-
+    if not series.dates[0] <= today <= series.dates[-1]:
+        return None
+    forecast = forecast_month(ledger.cube, categories, today)
+    if forecast is None:
+        return None
+
+    # 予測は今月初からの累積なので、期間の初日から先月末までの実績を足す
+    offset = series.actual[int((today - series.dates[0]).astype(int))] - forecast.spent
+    keep = forecast.dates <= series.dates[-1]
+    return pd.DataFrame({
+        '日付': forecast.dates[keep].astype('datetime64[ns]'),
+        '予測': offset + forecast.expected[keep],
+        '下限': offset + forecast.low[keep],
+        '上限': offset + forecast.high[keep],
+    })
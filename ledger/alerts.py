@@ -0,0 +1,307 @@
+import datetime
+import json
+import logging
+import os
+import threading
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import pandas as pd
+
+from .federation import peek_sources
+from .loader import on_ingest
+
+logger = logging.getLogger(__name__)
+
+# 発生したアラートを1行1件のJSONで追記するファイル。環境変数 ALERT_OUTBOX を空にすると無効
+OUTBOX_PATH = os.getenv("ALERT_OUTBOX", os.path.join(".cache", "alerts.jsonl"))
+
+# ルールの種類
+#   over_budget … 今月の支出が月間予算（threshold 円）を超えた
+#   pace        … 今月の支出が「予算 × 経過日数 / 月の日数」の (1 + tolerance) 倍を超えた
+#   frequency   … 前回の購入から threshold 日以内に同じカテゴリで購入した
+RULE_KINDS = ('over_budget', 'pace', 'frequency')
+
+
+@dataclass(frozen=True)
+class Rule:
+    """
+    アラートのルール
+
+    Attributes:
+    - kind: str, RULE_KINDS のいずれか
+    - category: str, 対象カテゴリ
+    - threshold: int, 月間予算（円）または推奨日数
+    - tolerance: float, pace で計画をどれだけ上回ったら知らせるか（0.2 で2割）
+    """
+    kind: str
+    category: str
+    threshold: int
+    tolerance: float = 0.0
+
+
+@dataclass(frozen=True)
+class Alert:
+    """
+    発生したアラート
+
+    Attributes:
+    - key: str, 重複して知らせないための識別子（ルールと対象の月・購入日）
+    - kind: str, ルールの種類
+    - category: str, 対象カテゴリ
+    - value: int, 判定した値（今月の支出または前回からの日数）
+    - threshold: int, 判定の基準（予算・計画の支出または推奨日数）
+    - message: str, 表示用の文
+    - version: str, 判定したデータの版
+    - raised_at: str, 発生した日時（ISO 8601）
+    """
+    key: str
+    kind: str
+    category: str
+    value: int
+    threshold: int
+    message: str
+    version: str
+    raised_at: str
+
+
+def _category_state(cube):
+    """カテゴリごとの全期間の件数と合計（前回の評価から変わったカテゴリの判定に使う）"""
+    return pd.DataFrame({'件数': cube.counts.sum(), '合計': cube.sums.sum()})
+
+
+class AlertEngine:
+    """
+    ルールをカテゴリごとに束ね、データの版が変わるたびに集計から評価する
+
+    明細は走査せず、前回評価した版とカテゴリごとの件数・合計を比べて、
+    変わったカテゴリのルールだけを評価する。日付が変わった場合は経過日数で
+    判定が変わるため全ルールを評価する。予算のルールは対象カテゴリの今月の支出を
+    集計から一度に引いて配列で判定し、頻度のルールは索引の二分探索で判定する。
+
+    同じアラート（同じルール・同じ月または同じ購入日）は一度だけ知らせる。
+    知らせたアラートは outbox に追記し、起動時に読み戻して重複を防ぐ。
+    """
+
+    def __init__(self, rules, outbox=None):
+        self.rules = tuple(rules)
+        self.outbox = OUTBOX_PATH if outbox is None else outbox
+        self._by_category = {}
+        for rule in self.rules:
+            if rule.kind not in RULE_KINDS:
+                raise ValueError(f"未知のアラートの種類です: {rule.kind}")
+            self._by_category.setdefault(rule.category, []).append(rule)
+        self._lock = threading.Lock()
+        self._version = None
+        self._day = None
+        self._state = None
+        self._raised = self._load_keys()
+
+    def _load_keys(self):
+        """outbox に記録済みのアラートの識別子"""
+        if not self.outbox or not os.path.exists(self.outbox):
+            return set()
+        keys = set()
+        with open(self.outbox, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    keys.add(json.loads(line)['key'])
+                except (ValueError, KeyError):
+                    continue
+        return keys
+
+    def evaluate(self, ledger, today=None):
+        """
+        データの版または日付が前回から変わっていれば、影響するルールを評価する
+
+        Parameters:
+        - ledger: Ledger, 家計簿データ（集計と索引を利用）
+        - today: 日付 or None, 基準日（None なら今日）
+
+        Returns:
+        - list[Alert]: 新たに発生したアラート
+        """
+        today = pd.Timestamp(today if today is not None else datetime.date.today()).normalize()
+        with self._lock:
+            if ledger.version == self._version and today == self._day:
+                return []
+            state = _category_state(ledger.cube)
+            if self._state is None or today != self._day:
+                targets = list(self._by_category)
+            else:
+                previous = self._state.reindex(state.index)
+                changed = state.index[(state != previous).any(axis=1)]
+                removed = self._state.index.difference(state.index)
+                targets = [c for c in changed.union(removed) if c in self._by_category]
+            self._version, self._day, self._state = ledger.version, today, state
+
+            rules = [rule for category in targets for rule in self._by_category[category]]
+            alerts = [alert for alert in self._check(rules, ledger, today)
+                      if alert.key not in self._raised]
+            self._raised.update(alert.key for alert in alerts)
+        if alerts:
+            self._write(alerts)
+        return alerts
+
+    def _check(self, rules, ledger, today):
+        """ルールを判定し、条件を満たしたアラートを返す（既に知らせたものを含む）"""
+        raised_at = datetime.datetime.now().isoformat(timespec='seconds')
+        alerts = []
+
+        def alert(rule, subject, value, threshold, message):
+            key = f"{rule.kind}:{rule.category}:{rule.threshold}:{subject}"
+            alerts.append(Alert(key=key, kind=rule.kind, category=rule.category, value=int(value),
+                                threshold=int(threshold), message=message,
+                                version=ledger.version, raised_at=raised_at))
+
+        budget_rules = [rule for rule in rules if rule.kind in ('over_budget', 'pace')]
+        if budget_rules:
+            month = today.to_period('M')
+            sums = ledger.cube.sums
+            this_month = sums.loc[month] if month in sums.index else pd.Series(dtype='int64')
+            spent = this_month.reindex([rule.category for rule in budget_rules], fill_value=0).to_numpy()
+            budgets = np.array([rule.threshold for rule in budget_rules], dtype=np.float64)
+            tolerance = np.array([rule.tolerance for rule in budget_rules])
+            is_pace = np.array([rule.kind == 'pace' for rule in budget_rules])
+            # 予算のルールは予算そのもの、ペースのルールは今日までの計画の支出と比べる
+            limits = np.where(is_pace, budgets * today.day / today.days_in_month * (1 + tolerance), budgets)
+            for i in np.flatnonzero(spent > limits):
+                rule = budget_rules[i]
+                if is_pace[i]:
+                    message = (f"{rule.category}: 今月の支出 ¥{int(spent[i]):,} が"
+                               f"予算のペース ¥{int(limits[i]):,}（{today.day}日時点）を上回っています")
+                else:
+                    message = f"{rule.category}: 今月の支出 ¥{int(spent[i]):,} が予算 ¥{rule.threshold:,} を超えました"
+                alert(rule, month, spent[i], limits[i], message)
+
+        frequency_rules = [rule for rule in rules if rule.kind == 'frequency']
+        if frequency_rules:
+            index = ledger.index
+            today_day = np.datetime64(today, 'D').astype(np.int64)
+            for rule in frequency_rules:
+                gap = _purchase_gap(index, rule.category)
+                if gap is None:
+                    continue
+                latest, days = gap
+                # 直近の購入が推奨日数以内で、その前の購入からも推奨日数以内
+                if today_day - latest <= rule.threshold and days <= rule.threshold:
+                    date = np.datetime64(latest, 'D')
+                    message = f"{rule.category}: 前回の購入から {days} 日で購入しました（目安 {rule.threshold} 日）"
+                    alert(rule, date, days, rule.threshold, message)
+        return alerts
+
+    def _write(self, alerts):
+        """アラートをログと outbox に書き出す"""
+        for alert in alerts:
+            logger.info("アラート: %s", alert.message)
+        if not self.outbox:
+            return
+        lines = ''.join(json.dumps(asdict(alert), ensure_ascii=False) + '\n' for alert in alerts)
+        try:
+            os.makedirs(os.path.dirname(self.outbox) or '.', exist_ok=True)
+            with _outbox_lock, open(self.outbox, 'a', encoding='utf-8') as f:
+                f.write(lines)
+        except OSError:
+            # 書き込めなくても表示は止めない（ログには残っている）
+            logger.warning("アラートを書き込めませんでした: %s", self.outbox, exc_info=True)
+
+
+def _purchase_gap(index, category):
+    """
+    カテゴリの最新の購入日と、それより前の日の最後の購入からの日数
+
+    同じ日の複数の明細は1回の購入とみなす。行位置と日付はどちらも昇順なので、
+    最新の購入日の最初の行を二分探索し、それより前のカテゴリの行を求める。
+
+    Returns:
+    - (int, int) or None: 最新の購入日（1970-01-01 からの日数）と日数。前回がなければ None
+    """
+    rows = index.positions.get(category)
+    if rows is None or len(rows) < 2:
+        return None
+    latest = int(index.days[rows[-1]])
+    first = np.searchsorted(index.days, latest, side='left')
+    before = np.searchsorted(rows, first, side='left')
+    if before == 0:
+        return None
+    return latest, latest - int(index.days[rows[before - 1]])
+
+
+_outbox_lock = threading.Lock()
+
+# 取得元の組 → 評価器（ルールが変わったら置き換える）
+_engines = {}
+# 取得元の組 → (基準月からルールを作る関数, outbox)
+_watches = {}
+_engines_lock = threading.Lock()
+
+
+def alert_engine(sources, rules, outbox=None):
+    """
+    取得元の組ごとに1つの評価器を返す。ルールや outbox が前回と異なれば作り直す
+    （作り直しても、知らせたアラートは outbox から読み戻すため重複しない）
+
+    Parameters:
+    - sources: list[(str, str)], 取得元の (名前, URL)
+    - rules: tuple[Rule], 評価するルール
+    - outbox: str or None, アラートの追記先（None なら OUTBOX_PATH）
+    """
+    key = tuple(sources)
+    rules = tuple(rules)
+    outbox = OUTBOX_PATH if outbox is None else outbox
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None or engine.rules != rules or engine.outbox != outbox:
+            engine = _engines[key] = AlertEngine(rules, outbox)
+        return engine
+
+
+def watch_sources(sources, rules_for, outbox=None):
+    """
+    取得元から新しいデータを取り込むたびに、統合したデータでアラートを評価する。
+    更新スレッドによる取り込みでも、表示中のセッションがなくてもアラートを知らせる
+
+    Parameters:
+    - sources: list[(str, str)], 取得元の (名前, URL)
+    - rules_for: callable, 基準月（pandas Period）を受け取り、その月のルールを返す関数
+    - outbox: str or None, アラートの追記先（None なら OUTBOX_PATH）
+    """
+    with _engines_lock:
+        _watches[tuple(sources)] = (rules_for, outbox)
+
+
+def evaluate_sources(sources, ledger, today=None):
+    """
+    watch_sources で登録した取得元の組について、基準日の月のルールで ledger を評価する
+
+    Parameters:
+    - sources: list[(str, str)], 取得元の (名前, URL)
+    - ledger: Ledger, 統合した家計簿データ
+    - today: 日付 or None, 基準日（None なら今日）
+
+    Returns:
+    - list[Alert]: 新たに発生したアラート（登録がなければ空）
+    """
+    today = pd.Timestamp(today if today is not None else datetime.date.today()).normalize()
+    with _engines_lock:
+        watch = _watches.get(tuple(sources))
+    if watch is None:
+        return []
+    rules_for, outbox = watch
+    engine = alert_engine(sources, rules_for(today.to_period('M')), outbox)
+    return engine.evaluate(ledger, today)
+
+
+def _on_ingest(url, entry):
+    """取り込んだ取得元を含む監視について、統合したデータでルールを評価する"""
+    with _engines_lock:
+        watched = list(_watches)
+    for sources in watched:
+        if all(source_url != url for _, source_url in sources):
+            continue
+        loaded = peek_sources(list(sources))
+        if loaded is not None and loaded.ledger is not None:
+            evaluate_sources(sources, loaded.ledger)
+
+
+on_ingest(_on_ingest)
@@ -0,0 +1,140 @@
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+# 改定履歴より前から有効な予算（[budgets]）の適用開始月
+_BEGINNING = pd.Period('1900-01', freq='M')
+
+
+@dataclass(frozen=True)
+class BudgetHistory:
+    """
+    カテゴリごとの月間予算と、その改定の履歴
+
+    各月には、その月までに適用が始まった最後の予算を使う。過去の月の表示・比較には
+    その月に有効だった予算を使うため、予算を改定しても過去の達成状況は変わらない。
+    集計（AggregateCube.month_matrix）と同じ 年月×カテゴリ の表に展開できるので、
+    任意の月・期間の予算と実績の差は表どうしの引き算1回で求まる。
+
+    Attributes:
+    - entries: tuple[(pandas Period, str, int)], (適用開始月, カテゴリ, 月間予算) の組（適用開始月の昇順）
+    """
+    entries: tuple
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        ダッシュボード定義の [budgets]（最初から有効な予算）と [[budget_history]]
+        （effective の月から適用する予算。記載のないカテゴリは直前の予算のまま）から作る
+
+        Parameters:
+        - config: dict, ダッシュボード定義
+        """
+        entries = [(_BEGINNING, category, int(amount))
+                   for category, amount in config.get('budgets', {}).items()]
+        for change in config.get('budget_history', []):
+            if 'effective' not in change or 'budgets' not in change:
+                raise ValueError("budget_history には effective と budgets が必要です")
+            try:
+                effective = pd.Period(str(change['effective']), freq='M')
+            except ValueError:
+                raise ValueError(f"budget_history の effective が不正です: {change['effective']}") from None
+            entries.extend((effective, category, int(amount))
+                           for category, amount in change['budgets'].items())
+        return cls(tuple(sorted(entries, key=lambda entry: entry[0])))
+
+    @property
+    def categories(self):
+        """予算のあるカテゴリ名のリスト（定義順）"""
+        return list(dict.fromkeys(category for _, category, _ in self.entries))
+
+    @cached_property
+    def _changes(self):
+        """適用開始月×カテゴリ の有効な予算（改定のないカテゴリは直前の値で埋める）"""
+        if not self.entries:
+            return pd.DataFrame(index=pd.PeriodIndex([], freq='M'), dtype='float64')
+        frame = pd.DataFrame(list(self.entries), columns=['適用開始月', 'カテゴリ', '予算'])
+        wide = frame.pivot_table(index='適用開始月', columns='カテゴリ', values='予算',
+                                 aggfunc='last', sort=True)
+        return wide.reindex(columns=self.categories).ffill().fillna(0)
+
+    def matrix(self, months, categories=None):
+        """
+        指定月×指定カテゴリの月間予算の表（予算のないカテゴリ・適用前の月は0）。
+        AggregateCube.month_matrix と同じ形なので、そのまま実績と引き算できる
+
+        Parameters:
+        - months: list[pandas Period] or PeriodIndex, 対象月
+        - categories: list[str] or None, 対象カテゴリ（None なら予算のある全カテゴリ）
+        """
+        months = pd.PeriodIndex(months, freq='M', name='年月')
+        columns = list(categories) if categories is not None else self.categories
+        changes = self._changes
+        # 各月について、その月までに適用が始まった最後の改定の位置
+        positions = changes.index.searchsorted(months, side='right') - 1
+        values = changes.to_numpy()[np.maximum(positions, 0)] if len(changes) else \
+            np.zeros((len(months), 0))
+        values[positions < 0] = 0
+        table = pd.DataFrame(values, index=months, columns=changes.columns)
+        return table.reindex(columns=columns, fill_value=0).astype('int64')
+
+    def period_sums(self, period, categories=None):
+        """
+        分析期間のカテゴリ別予算。月の途中で始まる・終わる期間は、その月の予算を日数で按分する
+
+        Parameters:
+        - period: AnalysisPeriod, 対象期間
+        - categories: list[str] or None, 対象カテゴリ
+
+        Returns:
+        - pandas Series, カテゴリ名 → 予算（float）
+        """
+        weights = period.month_weights()
+        return self.matrix(weights.index, categories).mul(weights, axis=0).sum()
+
+
+def monthly_budgets(budget, months, categories):
+    """
+    各月の月間予算（指定カテゴリの合計）を返す
+
+    Parameters:
+    - budget: int or BudgetHistory, 毎月同じ予算（円）または予算の改定履歴
+    - months: list[pandas Period] or PeriodIndex, 対象月
+    - categories: list[str] or str, 対象カテゴリ（BudgetHistory のときに使う）
+
+    Returns:
+    - pandas Series, 年月 → 月間予算
+    """
+    months = pd.PeriodIndex(months, freq='M', name='年月')
+    if isinstance(budget, BudgetHistory):
+        if isinstance(categories, str):
+            categories = [categories]
+        return budget.matrix(months, categories).sum(axis=1)
+    return pd.Series(budget, index=months)
+
+
+def budget_vs_actual(cube, budgets, period, categories):
+    """
+    指定カテゴリの予算・実績・残予算を、予算の表と集計の表の引き算で求める
+
+    Parameters:
+    - cube: AggregateCube, 集計
+    - budgets: BudgetHistory, 予算の改定履歴（各月に有効だった予算を使う）
+    - period: pandas Period or AnalysisPeriod, 対象月または分析期間
+    - categories: list[str], 対象カテゴリ
+
+    Returns:
+    - pandas DataFrame, index はカテゴリ。列は 予算 / 実績 / 残予算（いずれも int64）
+    """
+    if isinstance(period, pd.Period):
+        months = pd.PeriodIndex([period], freq='M')
+        budget = budgets.matrix(months, categories).iloc[0]
+        actual = cube.month_matrix(months, categories).iloc[0]
+    else:
+        budget = budgets.period_sums(period, categories).round()
+        actual = cube.period_sums(period, categories).reindex(categories, fill_value=0)
+    table = pd.DataFrame({'予算': budget, '実績': actual}).astype('int64')
+    table['残予算'] = table['予算'] - table['実績']
+    return table.rename_axis('カテゴリ')
@@ -0,0 +1,80 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# 移動平均の期間（月）
+WINDOWS = (3, 6, 12)
+# 傾きを求める期間（月）
+TREND_MONTHS = 12
+
+
+@dataclass(frozen=True)
+class Comparison:
+    """
+    基準月における全カテゴリの比較結果
+
+    Attributes:
+    - month: pandas Period, 基準月
+    - table: pandas DataFrame, index はカテゴリ。列は 当月 / 3か月平均 / 6か月平均 / 12か月平均 /
+      前年同月 / 前年差 / 前年比 / 傾き（円/月）
+    - history: pandas DataFrame, 基準月までの直近の月×カテゴリの合計金額（スパークライン用）
+    """
+    month: pd.Period
+    table: pd.DataFrame
+    history: pd.DataFrame
+
+
+def _window_sums(cumsum, end, width):
+    """累積和の行列から、各列の end 行目までの width 行の合計を求める（先頭行は0）"""
+    return cumsum[end + 1] - cumsum[max(end + 1 - width, 0)]
+
+
+def compare_months(cube, month, categories=None, history=12):
+    """
+    月×カテゴリの集計行列から、移動平均・前年比・傾きを全カテゴリまとめて計算する。
+    カテゴリごとのループは使わず、行列の累積和と列方向の演算だけで求める
+
+    データの最初の月より前は0円として扱わず、移動平均は存在する月数で割る。
+
+    Parameters:
+    - cube: AggregateCube, 集計
+    - month: pandas Period or str, 基準月
+    - categories: list[str] or None, 対象カテゴリ（None なら全カテゴリ）
+    - history: int, history に含める月数
+
+    Returns:
+    - Comparison
+    """
+    month = pd.Period(month, freq='M')
+    columns = list(categories) if categories is not None else cube.categories
+    first = cube.sums.index[0] if len(cube.sums.index) else month
+    first = min(first, month)
+    months = pd.period_range(first, month, freq='M', name='年月')
+    matrix = cube.sums.reindex(index=months, columns=columns, fill_value=0).to_numpy(dtype=np.float64)
+
+    t = len(months) - 1
+    cumsum = np.vstack([np.zeros((1, matrix.shape[1])), matrix.cumsum(axis=0)])
+    table = {'当月': matrix[t]}
+    for width in WINDOWS:
+        table[f'{width}か月平均'] = _window_sums(cumsum, t, width) / min(width, t + 1)
+
+    last_year = matrix[t - 12] if t >= 12 else np.full(matrix.shape[1], np.nan)
+    table['前年同月'] = last_year
+    table['前年差'] = matrix[t] - last_year
+    with np.errstate(divide='ignore', invalid='ignore'):
+        table['前年比'] = np.where(last_year > 0, matrix[t] / last_year - 1, np.nan)
+
+    # 直近 TREND_MONTHS か月の最小二乗の傾き（全カテゴリを行列演算で一度に求める）
+    recent = matrix[max(t + 1 - TREND_MONTHS, 0):]
+    x = np.arange(len(recent), dtype=np.float64)
+    x -= x.mean()
+    denominator = (x ** 2).sum()
+    table['傾き'] = x @ (recent - recent.mean(axis=0)) / denominator if denominator else np.zeros(len(columns))
+
+    return Comparison(
+        month=month,
+        table=pd.DataFrame(table, index=pd.Index(columns, name='カテゴリ')),
+        history=pd.DataFrame(matrix[max(t + 1 - history, 0):], index=months[max(t + 1 - history, 0):],
+                             columns=columns),
+    )
@@ -0,0 +1,204 @@
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+
+def _wide(grouped, index):
+    """(カテゴリ, キー) で集計した Series を キー×カテゴリ の表に展開する"""
+    wide = grouped.unstack('カテゴリ', fill_value=0)
+    wide.columns = wide.columns.astype(str)
+    return wide.reindex(index, fill_value=0).astype('int64')
+
+
+class AggregateCube:
+    """
+    カテゴリ×月、カテゴリ×日の集計をまとめて保持する
+
+    データの版ごとに一度だけ groupby で構築し、各ウィジェットは
+    行データを走査せずにこのオブジェクトへ問い合わせる。
+    年単位の集計と日別の累積和は初めて使うときに月・日の集計から作るため、
+    任意の期間の合計も明細を走査せずに求められる。
+
+    Attributes:
+    - sums: pandas DataFrame, 年月（連続したPeriodIndex）×カテゴリ の合計金額
+    - counts: pandas DataFrame, 年月×カテゴリ の件数
+    - daily: pandas DataFrame, 日付（連続したDatetimeIndex）×カテゴリ の合計金額
+    """
+
+    def __init__(self, sums, counts, daily):
+        self.sums = sums
+        self.counts = counts
+        self.daily = daily
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        正規化済みの家計簿から集計を構築する
+
+        Parameters:
+        - df: pandas DataFrame, normalize_ledger の返り値
+        """
+        if df.empty:
+            empty_months = pd.PeriodIndex([], freq='M', name='年月')
+            empty_days = pd.DatetimeIndex([], name='日付')
+            return cls(
+                pd.DataFrame(index=empty_months, dtype='int64'),
+                pd.DataFrame(index=empty_months, dtype='int64'),
+                pd.DataFrame(index=empty_days, dtype='int64'),
+            )
+
+        month = df['日付'].dt.to_period('M').rename('年月')
+        months = pd.period_range(month.min(), month.max(), freq='M', name='年月')
+        by_month = df.groupby([df['カテゴリ'], month], observed=True)['金額']
+        sums = _wide(by_month.sum(), months)
+        counts = _wide(by_month.size(), months)
+
+        day = df['日付'].dt.normalize().rename('日付')
+        days = pd.date_range(day.min(), day.max(), freq='D', name='日付')
+        daily = _wide(df.groupby([df['カテゴリ'], day], observed=True)['金額'].sum(), days)
+        return cls(sums, counts, daily)
+
+    def combine(self, other):
+        """
+        別の集計（追記分など）を足し合わせた新しい集計を返す。自身は変更しない
+
+        Parameters:
+        - other: AggregateCube, 加算する集計
+        """
+        def add(a, b, index):
+            columns = a.columns.union(b.columns, sort=False)
+            a = a.reindex(index=index, columns=columns, fill_value=0)
+            b = b.reindex(index=index, columns=columns, fill_value=0)
+            return (a + b).astype('int64')
+
+        if other.sums.empty:
+            return self
+        if self.sums.empty:
+            return other
+        months = pd.period_range(min(self.sums.index[0], other.sums.index[0]),
+                                 max(self.sums.index[-1], other.sums.index[-1]), freq='M', name='年月')
+        days = pd.date_range(min(self.daily.index[0], other.daily.index[0]),
+                             max(self.daily.index[-1], other.daily.index[-1]), freq='D', name='日付')
+        return AggregateCube(
+            add(self.sums, other.sums, months),
+            add(self.counts, other.counts, months),
+            add(self.daily, other.daily, days),
+        )
+
+    @property
+    def categories(self):
+        """集計に含まれるカテゴリ名のリスト"""
+        return list(self.sums.columns)
+
+    def _columns(self, categories):
+        """指定カテゴリのうち集計に存在する列名を返す（None なら全カテゴリ）"""
+        if categories is None:
+            return list(self.sums.columns)
+        if isinstance(categories, str):
+            categories = [categories]
+        return [c for c in categories if c in self.sums.columns]
+
+    def total(self, period, categories=None):
+        """
+        指定月の合計金額
+
+        Parameters:
+        - period: pandas Period, 対象月
+        - categories: list[str] or str or None, 対象カテゴリ（None なら全カテゴリ）
+        """
+        period = pd.Period(period, freq='M')
+        if period not in self.sums.index:
+            return 0
+        return int(self.sums.loc[period, self._columns(categories)].sum())
+
+    def month_matrix(self, periods, categories=None):
+        """
+        指定月×指定カテゴリの合計金額表（データのない月・カテゴリは0）
+
+        Parameters:
+        - periods: list[pandas Period], 対象月
+        - categories: list[str] or None, 対象カテゴリ
+        """
+        columns = list(categories) if categories is not None else self.categories
+        return self.sums.reindex(index=pd.PeriodIndex(periods, freq='M', name='年月'),
+                                 columns=columns, fill_value=0)
+
+    def monthly(self, category):
+        """
+        指定カテゴリの月別の件数・合計・平均（データのある月のみ）
+
+        Returns:
+        - pandas DataFrame, index は年月、列は 購入回数 / 合計金額 / 平均金額
+        """
+        if category not in self.sums.columns:
+            return pd.DataFrame(columns=['購入回数', '合計金額', '平均金額'],
+                                index=pd.PeriodIndex([], freq='M', name='年月'))
+        summary = pd.DataFrame({
+            '購入回数': self.counts[category],
+            '合計金額': self.sums[category],
+        })
+        summary = summary[summary['購入回数'] > 0]
+        summary['平均金額'] = summary['合計金額'] / summary['購入回数']
+        return summary
+
+    @cached_property
+    def yearly(self):
+        """年×カテゴリ の合計金額（月の集計から作る）"""
+        return self.sums.groupby(self.sums.index.year.rename('年')).sum()
+
+    @cached_property
+    def _daily_cumsum(self):
+        """日別合計の累積和（先頭に0の行を加えた 日数+1 行）"""
+        values = self.daily.to_numpy()
+        return np.vstack([np.zeros((1, values.shape[1]), dtype=np.int64), values.cumsum(axis=0)])
+
+    def range_sums(self, start, end, categories=None):
+        """
+        任意の期間のカテゴリ別合計金額。日別の累積和の差で求めるため、
+        期間の長さに関係なくカテゴリ数に比例した時間で済む
+
+        Parameters:
+        - start, end: 日付, 期間の初日と最終日（両端を含む）
+        - categories: list[str] or str or None, 対象カテゴリ（None なら全カテゴリ）
+
+        Returns:
+        - pandas Series, カテゴリ名 → 合計金額
+        """
+        columns = self._columns(categories)
+        if self.daily.empty:
+            return pd.Series(0, index=columns, dtype='int64')
+        days = self.daily.index
+        lo = days.searchsorted(pd.Timestamp(start).normalize(), side='left')
+        hi = days.searchsorted(pd.Timestamp(end).normalize(), side='right')
+        totals = pd.Series(self._daily_cumsum[max(hi, lo)] - self._daily_cumsum[lo],
+                           index=self.daily.columns, dtype='int64')
+        return totals.reindex(columns, fill_value=0)
+
+    def period_sums(self, period, categories=None):
+        """
+        分析期間のカテゴリ別合計金額。年・月単位の期間は年・月の集計から、
+        それ以外は日別の累積和から求める
+
+        Parameters:
+        - period: AnalysisPeriod, 対象期間
+        - categories: list[str] or str or None, 対象カテゴリ（None なら全カテゴリ）
+
+        Returns:
+        - pandas Series, カテゴリ名 → 合計金額
+        """
+        columns = self._columns(categories)
+        if period.kind == 'year':
+            year = period.start.year
+            if year not in self.yearly.index:
+                return pd.Series(0, index=columns, dtype='int64')
+            return self.yearly.loc[year, columns].astype('int64')
+        if period.kind in ('month', 'quarter'):
+            return self.sums.reindex(period.month_range(), fill_value=0)[columns].sum().astype('int64')
+        return self.range_sums(period.start, period.end, columns)
+
+    def latest_period(self, categories=None):
+        """指定カテゴリのデータが存在する最新の月（なければ None）"""
+        active = self.counts[self._columns(categories)].sum(axis=1)
+        active = active[active > 0]
+        return active.index.max() if not active.empty else None
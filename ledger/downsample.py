@@ -0,0 +1,86 @@
+import os
+
+import numpy as np
+
+# 1本の折れ線に描く点の上限。環境変数 CHART_POINT_BUDGET で上書きできる（0 で間引かない）
+POINT_BUDGET = int(os.getenv("CHART_POINT_BUDGET", "120"))
+
+
+def collinear_mask(x, y):
+    """
+    折れ線の形を変えずに省ける点（前後の点と一直線に並ぶ中間の点）を除いた真偽配列。
+    累積支出の横ばいの区間や、一定の傾きの予算線はそれぞれ両端の2点だけが残る
+
+    Parameters:
+    - x: numpy.ndarray, 横軸の値（昇順、数値）
+    - y: numpy.ndarray, 縦軸の値
+    """
+    keep = np.ones(len(x), dtype=bool)
+    if len(x) <= 2:
+        return keep
+    dx1, dy1 = x[1:-1] - x[:-2], y[1:-1] - y[:-2]
+    dx2, dy2 = x[2:] - x[1:-1], y[2:] - y[1:-1]
+    keep[1:-1] = ~np.isclose(dy1 * dx2, dy2 * dx1)
+    return keep
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets で threshold 点に間引いた点の位置を返す。
+    各区間から、前に選んだ点と次の区間の平均点とで作る三角形が最大になる点を選ぶ
+
+    Parameters:
+    - x, y: numpy.ndarray, 折れ線の点（x は昇順）
+    - threshold: int, 残す点の数（2以下なら両端の2点だけを残す）
+
+    Returns:
+    - numpy.ndarray[int64]: 残す点の位置（昇順、両端を含む）
+    """
+    n = len(x)
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        # 区間を作れないため、折れ線の始点と終点だけを残す
+        return np.array([0, n - 1], dtype=np.int64)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = edges[i + 1], (edges[i + 2] if i + 2 < len(edges) else n)
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        area = np.abs((x[previous] - avg_x) * (y[lo:hi] - y[previous])
+                      - (x[previous] - x[lo:hi]) * (avg_y - y[previous]))
+        previous = lo + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+
+def downsample(x, y, budget=POINT_BUDGET):
+    """
+    折れ線の点を budget 点以内に間引いた位置を返す。
+    まず形の変わらない一直線上の点を除き、それでも多ければ LTTB で間引く
+
+    Parameters:
+    - x: numpy.ndarray, 横軸の値（昇順。datetime64 も可）
+    - y: numpy.ndarray, 縦軸の値
+    - budget: int, 残す点の上限（0以下なら間引かない。1・2 なら両端の2点）
+
+    Returns:
+    - numpy.ndarray[int64]: 残す点の位置（昇順）
+    """
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype('datetime64[D]').astype(np.int64)
+    x = x.astype(np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if budget <= 0:
+        return np.arange(len(x))
+
+    positions = np.flatnonzero(collinear_mask(x, y))
+    if len(positions) > budget:
+        positions = positions[lttb(x[positions], y[positions], budget)]
+    return positions
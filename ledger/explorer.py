@@ -0,0 +1,111 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from .search import search_memos
+
+# 並べ替えの種類 → (キーの列, 降順か)
+SORTS = {
+    'date_desc': ('日付', True),
+    'date_asc': ('日付', False),
+    'amount_desc': ('金額', True),
+    'amount_asc': ('金額', False),
+}
+
+
+@dataclass(frozen=True)
+class Selection:
+    """
+    絞り込み・並べ替え済みの明細の行位置と、キーセット方式のページ送りに使うキー
+
+    (keys, ties) は辞書式の昇順に並んでおり、降順の並べ替えは符号を反転して持つ。
+
+    Attributes:
+    - rows: numpy.ndarray[int64], 表示順の行位置
+    - keys: numpy.ndarray[int64], 並べ替えのキー（日付は日数、金額は円）
+    - ties: numpy.ndarray[int64], 同じキーの中での順序（行位置）
+    """
+    rows: np.ndarray
+    keys: np.ndarray
+    ties: np.ndarray
+
+    def __len__(self):
+        return len(self.rows)
+
+
+@dataclass(frozen=True)
+class Page:
+    """
+    1ページ分の明細
+
+    Attributes:
+    - rows: numpy.ndarray[int64], このページの行位置
+    - offset: int, 先頭の明細が何件目か（0始まり）
+    - next_cursor: tuple or None, 次のページのカーソル（最後のページなら None）
+    """
+    rows: np.ndarray
+    offset: int
+    next_cursor: tuple
+
+
+def select_rows(ledger, categories=None, start=None, end=None, memo=None, sort='date_desc'):
+    """
+    明細を絞り込んで並べ替えた Selection を返す。
+    カテゴリ・期間は索引の二分探索、メモは転置索引で絞り込み、明細全体の走査や
+    文字列の整形はしない
+
+    Parameters:
+    - ledger: Ledger, 家計簿データ
+    - categories: list[str] or None, 対象カテゴリ（None なら全カテゴリ）
+    - start, end: 日付 or None, 期間の初日と最終日
+    - memo: str or None, メモの検索語
+    - sort: str, SORTS のいずれか
+    """
+    if sort not in SORTS:
+        raise ValueError(f"未知の並べ替えです: {sort}")
+    index = ledger.index
+    if categories is None:
+        lo, hi = 0, len(index.days)
+        if len(index.days) and (start is not None or end is not None):
+            lo, hi = index.date_bounds(start if start is not None else ledger.df['日付'].iloc[0],
+                                       end if end is not None else ledger.df['日付'].iloc[-1])
+        rows = np.arange(lo, hi, dtype=np.int64)
+    else:
+        rows = index.rows(categories, start, end)
+    if memo:
+        rows = np.intersect1d(rows, search_memos(ledger, memo, start, end).rows, assume_unique=True)
+
+    column, descending = SORTS[sort]
+    if column == '日付':
+        keys, ties = index.days[rows], rows
+    else:
+        amounts = ledger.df['金額'].to_numpy()[rows].astype(np.int64)
+        order = np.lexsort((rows, amounts))
+        rows, keys, ties = rows[order], amounts[order], rows[order]
+    if descending:
+        rows, keys, ties = rows[::-1], -keys[::-1], -ties[::-1]
+    return Selection(rows=rows, keys=keys, ties=ties)
+
+
+def page_after(selection, cursor=None, size=50):
+    """
+    カーソルの次から size 件を返す（キーセット方式）。
+    カーソルは最後に表示した明細のキーの値で、位置を二分探索で求めるため
+    何ページ目でも同じ時間で済む
+
+    Parameters:
+    - selection: Selection, select_rows の返り値
+    - cursor: tuple or None, 前のページの Page.next_cursor（None なら先頭から）
+    - size: int, 1ページの件数
+    """
+    start = 0
+    if cursor is not None:
+        key, tie = cursor
+        lo = np.searchsorted(selection.keys, key, side='left')
+        hi = np.searchsorted(selection.keys, key, side='right')
+        start = int(lo + np.searchsorted(selection.ties[lo:hi], tie, side='right'))
+    stop = min(start + size, len(selection))
+    next_cursor = None
+    if stop < len(selection):
+        next_cursor = (int(selection.keys[stop - 1]), int(selection.ties[stop - 1]))
+    return Page(rows=selection.rows[start:stop], offset=start, next_cursor=next_cursor)
@@ -0,0 +1,201 @@
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from .loader import fetch_sheet, peek
+from .model import build_ledger
+from .plane import on_evict
+from .schema import DICTIONARY_COLUMNS
+
+# 重複判定に使う列
+DEDUP_COLUMNS = ['日付', 'カテゴリ', '金額', 'メモ']
+# キャッシュにまだない取得元の表示（更新スレッドが取得中、または取得元に接続できない）
+PENDING_MESSAGE = "まだ読み込めていません（取得元に接続中、または接続できません）"
+
+
+@dataclass
+class FederatedLoad:
+    """
+    複数の取得元を読み込んだ結果
+
+    Attributes:
+    - ledger: Ledger or None, 統合した家計簿（全取得元が失敗した場合は None）
+    - statuses: dict[str, str], 取得元名ごとの取得結果（fetch_sheet が返す取得結果）
+    - errors: dict[str, str], 読み込めなかった取得元名とエラー内容
+    """
+    ledger: object
+    statuses: dict = field(default_factory=dict)
+    errors: dict = field(default_factory=dict)
+
+
+def _version(pairs):
+    """(取得元名, 版) の列から統合後の版を求める"""
+    return hashlib.sha1('|'.join(f"{name}:{version}" for name, version in pairs).encode('utf-8')).hexdigest()
+
+
+def parse_sources(value):
+    """
+    取得元の指定を (名前, URL) のリストに変換する
+
+    カンマまたは改行区切りで複数指定でき、「名前=URL」で名前を付けられる。
+    名前を省略した取得元は「シート1」「シート2」… と呼ぶ。
+
+    Parameters:
+    - value: str or None, 例: "カード=https://...,銀行=https://..."
+    """
+    sources = []
+    for i, item in enumerate(part.strip() for part in (value or '').replace('\n', ',').split(',')):
+        if not item:
+            continue
+        name, sep, url = item.partition('=')
+        # URLのクエリ文字列にも '=' があるため、名前は '://' より前にある場合だけ認める
+        if not sep or '://' in name:
+            name, url = f"シート{len(sources) + 1}", item
+        sources.append((name.strip(), url.strip()))
+    return sources
+
+
+# 取得元の版の組み合わせごとの統合結果（直近のものだけ保持）
+_merged = {}
+_merged_lock = threading.Lock()
+_MERGED_MAX = 8
+
+
+def _merge(named):
+    """
+    取得元ごとの Ledger を1つに統合する。取得元名を「ソース」列に付け、
+    複数の取得元に重複して載っている明細は1件にまとめる
+
+    同じ取得元の中の同一内容の明細（同じ日に同じ買い物を2回など）は残すため、
+    取得元内での出現回数を含めて重複を判定する。
+
+    Parameters:
+    - named: list[(str, Ledger)], 取得元名と Ledger
+    """
+    key = tuple((name, ledger.version) for name, ledger in named)
+    with _merged_lock:
+        if key in _merged:
+            return _merged[key]
+
+    frames = []
+    for name, ledger in named:
+        frame = ledger.df.assign(ソース=name)
+        frame['_出現'] = frame.groupby(DEDUP_COLUMNS, sort=False, observed=True).cumcount()
+        frames.append(frame)
+    # 取得元ごとにカテゴリが異なる category 列は、そのまま連結すると object 型になるため、
+    # 全取得元のカテゴリの和集合（整列済み）に揃えてから連結する。行の値は文字列に戻さない
+    for column in DICTIONARY_COLUMNS:
+        categories = frames[0][column].cat.categories
+        for frame in frames[1:]:
+            categories = categories.union(frame[column].cat.categories)
+        frames = [frame.assign(**{column: frame[column].cat.set_categories(categories)})
+                  for frame in frames]
+    df = pd.concat(frames, ignore_index=True)
+    df = df.drop_duplicates(subset=DEDUP_COLUMNS + ['_出現'], keep='first').drop(columns='_出現')
+    df['ソース'] = df['ソース'].astype('category')
+    df = df.sort_values('日付', kind='stable').reset_index(drop=True)
+
+    merged = build_ledger(df, _version(key))
+    with _merged_lock:
+        if len(_merged) >= _MERGED_MAX:
+            _merged.clear()
+        _merged[key] = merged
+    return merged
+
+
+def _forget(version):
+    """どのセッションも表示しなくなった統合結果を破棄する"""
+    with _merged_lock:
+        for key in [key for key, merged in _merged.items() if merged.version == version]:
+            del _merged[key]
+
+
+on_evict(_forget)
+
+
+def _combine(sources, entries, statuses, errors):
+    """取得元ごとのエントリと取得結果から FederatedLoad を作る"""
+    named = [(name, entries[name].ledger) for name, _ in sources if name in entries]
+    if not named:
+        ledger = None
+    elif len(sources) == 1:
+        ledger = named[0][1]
+    else:
+        ledger = _merge(named)
+    return FederatedLoad(ledger=ledger, statuses=statuses, errors=errors)
+
+
+def load_sources(sources, force=False, **kwargs):
+    """
+    複数の取得元を並行して読み込み、統合した家計簿を返す。
+    全体の待ち時間は最も遅い取得元の時間で決まる
+
+    Parameters:
+    - sources: list[(str, str)], parse_sources の返り値
+    - force: bool, TrueならTTLを無視して取得元へ問い合わせる
+    - kwargs: fetch_sheet に渡す追加の引数
+
+    Returns:
+    - FederatedLoad
+    """
+    if not sources:
+        raise ValueError("取得元のURLが指定されていません（GOOGLE_SHEET_CSV_URL）")
+    entries, statuses, errors = {}, {}, {}
+    if len(sources) == 1:
+        name, url = sources[0]
+        entries[name], statuses[name] = fetch_sheet(url, force=force, **kwargs)
+        return _combine(sources, entries, statuses, errors)
+
+    with ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix='sheet-fetch') as pool:
+        futures = {name: pool.submit(fetch_sheet, url, force=force, **kwargs) for name, url in sources}
+        for name, future in futures.items():
+            try:
+                entries[name], statuses[name] = future.result()
+            except Exception as e:
+                errors[name] = str(e)
+    if not entries:
+        raise RuntimeError('; '.join(f"{name}: {message}" for name, message in errors.items()))
+    return _combine(sources, entries, statuses, errors)
+
+
+def peek_sources(sources):
+    """
+    取得元へ問い合わせずに、キャッシュ済みのデータだけで統合結果を返す。
+    まだ読み込めていない取得元は errors に載せて除き、残りの取得元だけで統合する。
+    取得結果は、スナップショットから復元して取得元と突き合わせていなければ 'snapshot'、
+    それ以外は 'hit' とする。どの取得元もキャッシュになければ None
+
+    Parameters:
+    - sources: list[(str, str)], 取得元の (名前, URL)
+
+    Returns:
+    - FederatedLoad or None
+    """
+    entries, statuses, errors = {}, {}, {}
+    for name, url in sources:
+        entry = peek(url)
+        if entry is None:
+            errors[name] = PENDING_MESSAGE
+        else:
+            entries[name] = entry
+            statuses[name] = 'hit' if entry.confirmed else 'snapshot'
+    if not entries:
+        return None
+    return _combine(sources, entries, statuses, errors)
+
+
+def current_version(sources):
+    """
+    キャッシュ済みのデータから求めた統合後の版（peek_sources の版と同じ）。
+    どの取得元もキャッシュになければ None
+    """
+    entries = [(name, peek(url)) for name, url in sources]
+    versions = [(name, entry.version) for name, entry in entries if entry is not None]
+    if not versions:
+        return None
+    if len(sources) == 1:
+        return versions[0][1]
+    return _version(versions)
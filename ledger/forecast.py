@@ -0,0 +1,145 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# 日別の支出パターンを学習する過去の月数
+HISTORY_MONTHS = 12
+# 予測の幅（下限・上限）に使う分位点
+BAND_QUANTILES = (0.1, 0.9)
+
+
+@dataclass(frozen=True)
+class Forecast:
+    """
+    今日から月末までの累積支出の予測
+
+    値はいずれも「今日までの実績からの増分」ではなく、今月初からの累積額。
+
+    Attributes:
+    - dates: numpy.ndarray[datetime64[D]], 今日から月末までの日付
+    - expected: numpy.ndarray[float64], 予測（過去の月の平均的な使い方）
+    - low: numpy.ndarray[float64], 予測の下限
+    - high: numpy.ndarray[float64], 予測の上限
+    - spent: float, 今日までの今月の支出
+    - months: int, 学習に使った過去の月数
+    """
+    dates: np.ndarray
+    expected: np.ndarray
+    low: np.ndarray
+    high: np.ndarray
+    spent: float
+    months: int
+
+
+def month_profiles(cube, month, history=HISTORY_MONTHS):
+    """
+    基準月とその前の history か月について、月×日（1〜31日）×カテゴリ の
+    月初からの累積支出を1つの配列にまとめる。月末より後の日は月末の値で埋める
+
+    Parameters:
+    - cube: AggregateCube, 集計
+    - month: pandas Period, 基準月（配列の最後の月）
+    - history: int, 基準月より前の月数
+
+    Returns:
+    - (numpy.ndarray, list[str]): 形が (history+1, 31, カテゴリ数) の累積支出と、カテゴリ名
+    """
+    month = pd.Period(month, freq='M')
+    months = pd.period_range(month - history, month, freq='M')
+    start = months[0].start_time.normalize()
+    end = months[-1].end_time.normalize()
+    daily = cube.daily.loc[start:end]
+
+    values = np.zeros((len(months), 31, daily.shape[1]))
+    if len(daily):
+        days = daily.index
+        month_pos = np.asarray((days.year - months[0].year) * 12 + (days.month - months[0].month))
+        values[month_pos, np.asarray(days.day) - 1] = daily.to_numpy()
+    return values.cumsum(axis=1), list(daily.columns)
+
+
+def _available(cube, month, history):
+    """基準月より前にデータのある月数（history が上限）"""
+    if len(cube.sums.index) == 0 or cube.sums.index[0] >= month:
+        return 0
+    return min(history, (month - cube.sums.index[0]).n)
+
+
+def forecast_categories(cube, today, history=HISTORY_MONTHS, quantiles=BAND_QUANTILES):
+    """
+    全カテゴリの今月末の支出を一度に予測する
+
+    過去の各月について「今日の日付より後に使った額」を今月の実績に足したものを
+    予測の分布とし、その平均と分位点を求める。全カテゴリ・全ての過去月を
+    配列演算でまとめて計算する。
+
+    Parameters:
+    - cube: AggregateCube, 集計
+    - today: 日付, 基準日
+    - history: int, 学習に使う過去の月数
+    - quantiles: (float, float), 下限・上限の分位点
+
+    Returns:
+    - pandas DataFrame, index はカテゴリ。列は 実績 / 予測 / 下限 / 上限
+      （学習に使える過去のデータがなければ空）
+    """
+    today = pd.Timestamp(today).normalize()
+    history = _available(cube, today.to_period('M'), history)
+    if history == 0:
+        return pd.DataFrame(columns=['実績', '予測', '下限', '上限'],
+                            index=pd.Index([], name='カテゴリ'), dtype='float64')
+    profiles, categories = month_profiles(cube, today.to_period('M'), history)
+    day = today.day - 1
+    last_day = today.days_in_month - 1
+    spent = profiles[-1, day]
+    remaining = profiles[:-1, last_day] - profiles[:-1, day]
+    projected = spent + remaining
+    return pd.DataFrame({
+        '実績': spent,
+        '予測': projected.mean(axis=0),
+        '下限': np.quantile(projected, quantiles[0], axis=0),
+        '上限': np.quantile(projected, quantiles[1], axis=0),
+    }, index=pd.Index(categories, name='カテゴリ'))
+
+
+def forecast_month(cube, categories, today, history=HISTORY_MONTHS, quantiles=BAND_QUANTILES):
+    """
+    指定カテゴリ（の合計）の、今日から月末までの日別の累積支出を予測する
+
+    Parameters:
+    - cube: AggregateCube, 集計
+    - categories: list[str] or str, 対象カテゴリ（複数なら合計を予測する）
+    - today: 日付, 基準日
+    - history: int, 学習に使う過去の月数
+    - quantiles: (float, float), 下限・上限の分位点
+
+    Returns:
+    - Forecast or None: 学習に使える過去のデータがなければ None
+    """
+    if isinstance(categories, str):
+        categories = [categories]
+    today = pd.Timestamp(today).normalize()
+    month = today.to_period('M')
+    history = _available(cube, month, history)
+    if history == 0:
+        return None
+
+    profiles, names = month_profiles(cube, month, history)
+    selected = [i for i, name in enumerate(names) if name in set(categories)]
+    # 複数カテゴリは先に合計してから分布を求める（カテゴリ間の相関を保つ）
+    totals = profiles[:, :, selected].sum(axis=2)
+
+    day = today.day - 1
+    last_day = month.days_in_month - 1
+    spent = totals[-1, day]
+    # 過去の各月の「今日より後の日」までの増分を今月の実績に足す
+    projected = spent + totals[:-1, day:last_day + 1] - totals[:-1, day:day + 1]
+    return Forecast(
+        dates=np.datetime64(today, 'D') + np.arange(last_day - day + 1),
+        expected=projected.mean(axis=0),
+        low=np.quantile(projected, quantiles[0], axis=0),
+        high=np.quantile(projected, quantiles[1], axis=0),
+        spent=float(spent),
+        months=len(projected),
+    )
@@ -0,0 +1,69 @@
+import hashlib
+from dataclasses import dataclass
+
+from .schema import read_ledger_csv
+
+
+@dataclass(frozen=True)
+class Watermark:
+    """
+    取り込み済みのCSV本文の位置とチェックサム
+
+    Attributes:
+    - size: int, 取り込み済みのバイト数
+    - rows: int, 取り込み済みの行数（ヘッダを除く）
+    - digest: str, 取り込み済み部分（先頭 size バイト）のSHA-1
+    - header: bytes, ヘッダ行（改行を含む）
+    """
+    size: int
+    rows: int
+    digest: str
+    header: bytes
+
+
+def _header(body):
+    """CSV本文の先頭行（改行を含む）を返す"""
+    end = body.find(b'\n')
+    return body if end < 0 else body[:end + 1]
+
+
+def make_watermark(body, rows, digest=None):
+    """
+    本文全体を取り込んだ時点の Watermark を作る
+
+    Parameters:
+    - body: bytes, 取り込んだCSV本文
+    - rows: int, 本文に含まれるデータ行数
+    - digest: str or None, 計算済みなら本文のSHA-1
+    """
+    if digest is None:
+        digest = hashlib.sha1(body).hexdigest()
+    return Watermark(size=len(body), rows=rows, digest=digest, header=_header(body))
+
+
+def appended_tail(body, watermark):
+    """
+    新しい本文が、取り込み済みの本文の末尾に行を追加しただけかを判定する
+
+    先頭 watermark.size バイトのチェックサムが一致し、かつ追記部分が
+    行の途中から始まっていない（最終行の書き換えではない）場合のみ、追記部分を返す。
+
+    Returns:
+    - bytes or None: 追記部分。途中の行が変わっている場合は None（全件読み込みが必要）
+    """
+    if watermark is None or len(body) < watermark.size or watermark.size == 0:
+        return None
+    if hashlib.sha1(body[:watermark.size]).hexdigest() != watermark.digest:
+        return None
+    tail = body[watermark.size:]
+    # 既存の最終行が改行で終わっていなかった場合、追記は改行から始まらなければならない
+    if not body[:watermark.size].endswith(b'\n') and tail and not tail.startswith((b'\n', b'\r')):
+        return None
+    return tail
+
+
+def parse_tail(tail, watermark):
+    """追記部分をヘッダ付きでパースする（空なら行数0の DataFrame）"""
+    if not tail.strip():
+        return read_ledger_csv(watermark.header)
+    return read_ledger_csv(watermark.header + tail)
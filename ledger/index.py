@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+
+class LedgerIndex:
+    """
+    日付昇順に並んだ明細に対する、カテゴリ別の行位置の索引
+
+    明細全体への真偽マスクを作らずに、期間の範囲は二分探索、
+    カテゴリの絞り込みは行位置の配列で求める。
+    カテゴリごとの行位置は昇順（＝日付順）なので、カテゴリの最新の明細は末尾の1件になる。
+
+    Attributes:
+    - days: numpy.ndarray[int64], 各行の日付（1970-01-01 からの日数）
+    - positions: dict[str, numpy.ndarray[int64]], カテゴリ名ごとの行位置（昇順）
+    """
+
+    def __init__(self, days, positions):
+        self.days = days
+        self.positions = positions
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        正規化済みの明細から索引を構築する
+
+        Parameters:
+        - df: pandas DataFrame, normalize_ledger の返り値（日付の昇順）
+        """
+        days = df['日付'].to_numpy().astype('datetime64[D]').astype(np.int64)
+
+        # カテゴリコードで安定ソートすると、各カテゴリの行位置が昇順のまま連続する
+        column = df['カテゴリ']
+        codes = column.cat.codes.to_numpy()
+        order = np.argsort(codes, kind='stable')
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(codes[codes >= 0],
+                                                            minlength=len(column.cat.categories)))])
+        start = int(np.count_nonzero(codes < 0))
+        positions = {
+            str(name): order[start + bounds[i]:start + bounds[i + 1]]
+            for i, name in enumerate(column.cat.categories)
+            if bounds[i + 1] > bounds[i]
+        }
+        return cls(days, positions)
+
+    def date_bounds(self, start, end):
+        """
+        [start, end] に含まれる行の位置範囲
+
+        Parameters:
+        - start, end: 日付, 期間の初日と最終日（両端を含む）
+
+        Returns:
+        - (lo, hi): df.iloc[lo:hi] が期間内の行
+        """
+        lo = np.searchsorted(self.days, _day(start), side='left')
+        hi = np.searchsorted(self.days, _day(end) + 1, side='left')
+        return int(lo), int(hi)
+
+    def rows(self, categories, start=None, end=None):
+        """
+        指定カテゴリ（・期間）の行位置を昇順で返す
+
+        Parameters:
+        - categories: list[str] or str, 対象カテゴリ
+        - start, end: 日付 or None, 期間の初日と最終日（None なら制限なし）
+
+        Returns:
+        - numpy.ndarray[int64]
+        """
+        if isinstance(categories, str):
+            categories = [categories]
+        lo, hi = 0, len(self.days)
+        if start is not None:
+            lo = int(np.searchsorted(self.days, _day(start), side='left'))
+        if end is not None:
+            hi = int(np.searchsorted(self.days, _day(end) + 1, side='left'))
+        parts = []
+        for name in dict.fromkeys(categories):
+            rows = self.positions.get(name)
+            if rows is None:
+                continue
+            parts.append(rows[np.searchsorted(rows, lo):np.searchsorted(rows, hi)])
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        if len(parts) == 1:
+            return parts[0]
+        return np.sort(np.concatenate(parts), kind='stable')
+
+    def latest(self, category):
+        """指定カテゴリの最新の明細の行位置（なければ None）"""
+        rows = self.positions.get(category)
+        if rows is None or len(rows) == 0:
+            return None
+        return int(rows[-1])
+
+
+def _day(value):
+    """日付を 1970-01-01 からの日数に変換する"""
+    return int(np.datetime64(pd.Timestamp(value).normalize(), 'D').astype(np.int64))
@@ -0,0 +1,275 @@
+import logging
+import os
+import threading
+import time
+import hashlib
+import urllib.request
+import urllib.error
+from dataclasses import dataclass
+from typing import Optional
+
+from .incremental import Watermark, appended_tail, make_watermark, parse_tail
+from .model import Ledger, build_ledger, extend_ledger
+from .schema import normalize_ledger, read_ledger_csv
+from .snapshot import load_snapshot, save_snapshot
+
+logger = logging.getLogger(__name__)
+
+# キャッシュの有効期間（秒）。環境変数 SHEET_CACHE_TTL で上書きできる
+DEFAULT_TTL = int(os.getenv("SHEET_CACHE_TTL", "300"))
+# 追記のみの更新を差分で取り込むか（環境変数 SHEET_INCREMENTAL=0 で無効）
+INCREMENTAL = os.getenv("SHEET_INCREMENTAL", "1") != "0"
+# HTTPリクエストのタイムアウト（秒）
+REQUEST_TIMEOUT = 30
+
+
+@dataclass
+class SheetData:
+    """
+    取得済みCSVとその検証情報をまとめたキャッシュエントリ
+
+    Attributes:
+    - url: str, 取得元URL
+    - ledger: Ledger, 正規化済みの明細と集計
+    - version: str, 本文のハッシュ値（データの版）
+    - etag: str or None, レスポンスのETag
+    - last_modified: str or None, レスポンスのLast-Modified
+    - checked_at: float, 最後に取得元へ問い合わせた時刻（time.monotonic）
+    - watermark: Watermark, 取り込み済みの本文の位置とチェックサム
+
+    全セッションが共有するため、呼び出しごとの取得結果は持たない（fetch_sheet が返す）。
+    """
+    url: str
+    ledger: Ledger
+    version: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    checked_at: float
+    watermark: Watermark
+
+    @property
+    def confirmed(self):
+        """取得元に問い合わせて内容を確かめたことがあるか（スナップショットから復元した直後は False）"""
+        return self.checked_at != float('-inf')
+
+
+# プロセス内で全セッションが共有するキャッシュ
+_cache = {}
+_locks = {}
+_locks_guard = threading.Lock()
+
+# キャッシュの利用状況（ヒット・ミス・再検証の回数。計測パネルに表示する）
+stats = {'hit': 0, 'fetched': 0, 'appended': 0, 'revalidated': 0, 'stale': 0, 'snapshot': 0}
+
+# 新しいデータを取り込んだときに呼ぶ関数（アラートの評価など）
+_ingest_callbacks = []
+
+
+def _lock_for(url):
+    """URLごとのロックを返す（同じURLへの同時取得を1回にまとめる）"""
+    with _locks_guard:
+        if url not in _locks:
+            _locks[url] = threading.Lock()
+        return _locks[url]
+
+
+def _request(url, etag=None, last_modified=None):
+    """
+    条件付きGETを送信する
+
+    Returns:
+    - (body, etag, last_modified): 304 の場合 body は None
+    """
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    req = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=REQUEST_TIMEOUT) as res:
+            return res.read(), res.headers.get('ETag'), res.headers.get('Last-Modified')
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return None, e.headers.get('ETag') or etag, e.headers.get('Last-Modified') or last_modified
+        raise
+
+
+def _parse(body, version):
+    """
+    CSV本文を正規化し、集計まで済ませた Ledger に変換する
+
+    Returns:
+    - (Ledger, Watermark)
+    """
+    raw = read_ledger_csv(body)
+    return build_ledger(normalize_ledger(raw), version), make_watermark(body, len(raw), version)
+
+
+def _append(entry, body, version):
+    """
+    追記分だけをパースして既存の Ledger に加える。途中の行が変わっていれば None
+
+    Returns:
+    - (Ledger, Watermark) or None
+    """
+    tail = appended_tail(body, entry.watermark)
+    if tail is None:
+        return None
+    raw = parse_tail(tail, entry.watermark)
+    ledger = extend_ledger(entry.ledger, normalize_ledger(raw), version)
+    watermark = Watermark(size=len(body), rows=entry.watermark.rows + len(raw),
+                          digest=version, header=entry.watermark.header)
+    return ledger, watermark
+
+
+def _from_snapshot(url):
+    """ディスク上のスナップショットからキャッシュエントリを復元する（なければ None）"""
+    saved = load_snapshot(url)
+    if saved is None:
+        return None
+    if saved['cube'] is not None:
+        # 保存済みの集計を使い、明細は集計し直さない
+        ledger = Ledger(df=saved['df'], cube=saved['cube'], version=saved['version'])
+    else:
+        ledger = build_ledger(saved['df'], saved['version'])
+    return SheetData(
+        url=url,
+        ledger=ledger,
+        version=saved['version'],
+        etag=saved['etag'],
+        last_modified=saved['last_modified'],
+        # 復元直後は必ず取得元へ問い合わせる
+        checked_at=float('-inf'),
+        watermark=saved['watermark'],
+    )
+
+
+def _in_background(target, *args, **kwargs):
+    """失敗しても表示を止めないよう、例外をログに残してデーモンスレッドで実行する"""
+    def run():
+        try:
+            target(*args, **kwargs)
+        except Exception:
+            logger.warning("バックグラウンド処理に失敗しました: %s", target.__name__, exc_info=True)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def on_ingest(callback):
+    """
+    取得元から新しいデータを取り込んだとき（全件読み込み・追記の取り込み）に呼ぶ関数を登録する。
+    呼び出しは取り込んだスレッドとは別のスレッドで行い、取得元ごとのロックは保持しない
+
+    Parameters:
+    - callback: callable, (url, SheetData) を受け取る関数
+    """
+    with _locks_guard:
+        if callback not in _ingest_callbacks:
+            _ingest_callbacks.append(callback)
+
+
+def _notify_ingest(url, entry):
+    """登録済みの関数に取り込みを通知する（失敗しても他の関数は呼ぶ）"""
+    with _locks_guard:
+        callbacks = list(_ingest_callbacks)
+    for callback in callbacks:
+        try:
+            callback(url, entry)
+        except Exception:
+            logger.warning("取り込み後の処理に失敗しました: %s", url, exc_info=True)
+
+
+def fetch_sheet(url, ttl=DEFAULT_TTL, force=False, incremental=INCREMENTAL, snapshot=True):
+    """
+    ウェブ公開されたCSVを取得する。TTL内ならキャッシュを返し、
+    期限切れならETag/Last-Modifiedで条件付きGETを行い、変更がなければ再パースしない
+
+    Parameters:
+    - url: str, CSVのURL
+    - ttl: int, キャッシュの有効期間（秒）
+    - force: bool, TrueならTTLを無視して取得元へ問い合わせる
+    - incremental: bool, Trueなら末尾への追記は追記分だけを取り込む
+    - snapshot: bool, Trueなら初回はディスク上のスナップショットを即座に返して
+      バックグラウンドで取得元と突き合わせ、取得後はスナップショットを更新する
+
+    Returns:
+    - (SheetData, str): エントリと、この呼び出しの取得結果
+      （'fetched' / 'appended' / 'revalidated' / 'hit' / 'stale' / 'snapshot'）
+    """
+    with _lock_for(url):
+        entry = _cache.get(url)
+        now = time.monotonic()
+
+        if entry is None and snapshot:
+            entry = _from_snapshot(url)
+            if entry is not None:
+                _cache[url] = entry
+                stats['snapshot'] += 1
+                _in_background(fetch_sheet, url, ttl=ttl, force=True, incremental=incremental)
+                return entry, 'snapshot'
+
+        if entry is not None and not force and now - entry.checked_at < ttl:
+            stats['hit'] += 1
+            return entry, 'hit'
+
+        try:
+            if entry is None:
+                body, etag, last_modified = _request(url)
+            else:
+                body, etag, last_modified = _request(url, entry.etag, entry.last_modified)
+        except Exception:
+            # 取得元に届かない場合は手元のキャッシュで継続する
+            if entry is None:
+                raise
+            stats['stale'] += 1
+            return entry, 'stale'
+
+        if body is None:
+            entry.etag, entry.last_modified = etag, last_modified
+            entry.checked_at = now
+            stats['revalidated'] += 1
+            return entry, 'revalidated'
+
+        version = hashlib.sha1(body).hexdigest()
+        if entry is not None and entry.version == version:
+            # 検証ヘッダ非対応の取得元でも、内容が同じなら再パースしない
+            entry.etag, entry.last_modified = etag, last_modified
+            entry.checked_at = now
+            stats['revalidated'] += 1
+            return entry, 'revalidated'
+
+        appended = _append(entry, body, version) if incremental and entry is not None else None
+        if appended is not None:
+            (ledger, watermark), status = appended, 'appended'
+        else:
+            (ledger, watermark), status = _parse(body, version), 'fetched'
+
+        entry = SheetData(
+            url=url,
+            ledger=ledger,
+            version=version,
+            etag=etag,
+            last_modified=last_modified,
+            checked_at=now,
+            watermark=watermark,
+        )
+        _cache[url] = entry
+        stats[status] += 1
+        if snapshot:
+            _in_background(save_snapshot, url, entry)
+        if _ingest_callbacks:
+            _in_background(_notify_ingest, url, entry)
+        return entry, status
+
+
+def peek(url):
+    """
+    取得元へ問い合わせずにキャッシュ済みのエントリを返す（なければ None）
+
+    Parameters:
+    - url: str, CSVのURL
+    """
+    return _cache.get(url)
+
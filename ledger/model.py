@@ -0,0 +1,54 @@
+from dataclasses import dataclass
+from functools import cached_property
+
+import pandas as pd
+
+from .cube import AggregateCube
+from .index import LedgerIndex
+from .schema import concat_ledgers
+
+
+@dataclass(frozen=True)
+class Ledger:
+    """
+    ある版の家計簿データと、その版から導出した集計
+
+    Attributes:
+    - df: pandas DataFrame, 正規化済みの明細（読み取り専用）
+    - cube: AggregateCube, カテゴリ×月・カテゴリ×日の集計
+    - version: str, データの版（CSV本文のハッシュ値）
+    """
+    df: pd.DataFrame
+    cube: AggregateCube
+    version: str
+
+    @cached_property
+    def index(self):
+        """カテゴリ別の行位置の索引（初めて参照したときに構築する）"""
+        return LedgerIndex.from_frame(self.df)
+
+
+def build_ledger(df, version):
+    """正規化済みの明細から Ledger を構築する"""
+    return Ledger(df=df, cube=AggregateCube.from_frame(df), version=version)
+
+
+def extend_ledger(ledger, tail, version, tail_cube=None):
+    """
+    既存の Ledger に追記分の明細を加えた新しい Ledger を返す。
+    集計は追記分だけを集計して加算するため、既存の明細は再集計しない。
+
+    Parameters:
+    - ledger: Ledger, 取り込み済みのデータ
+    - tail: pandas DataFrame, 追記分の正規化済み明細
+    - version: str, 追記後のデータの版
+    - tail_cube: AggregateCube or None, 計算済みなら追記分の集計
+    """
+    if tail.empty:
+        return Ledger(df=ledger.df, cube=ledger.cube, version=version)
+
+    df = concat_ledgers([ledger.df, tail])
+    if tail_cube is None:
+        tail_cube = AggregateCube.from_frame(tail)
+    cube = ledger.cube.combine(tail_cube)
+    return Ledger(df=df, cube=cube, version=version)
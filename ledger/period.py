@@ -0,0 +1,69 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class AnalysisPeriod:
+    """
+    分析対象の期間（月・四半期・年・任意の期間）
+
+    Attributes:
+    - kind: str, 'month' / 'quarter' / 'year' / 'range'
+    - start: pandas Timestamp, 初日
+    - end: pandas Timestamp, 最終日（この日を含む）
+    """
+    kind: str
+    start: pd.Timestamp
+    end: pd.Timestamp
+
+    @property
+    def last_month(self):
+        """期間の最後の月（pandas Period）"""
+        return self.end.to_period('M')
+
+    def month_weights(self):
+        """
+        期間に含まれる各月のうち、期間内の日数の割合（月の全体なら1）
+
+        Returns:
+        - pandas Series, 年月 → 割合
+        """
+        months = self.month_range()
+        first = np.maximum(months.start_time.normalize().to_numpy(), self.start.to_datetime64())
+        last = np.minimum(months.end_time.normalize().to_numpy(), self.end.to_datetime64())
+        days = (last - first) // np.timedelta64(1, 'D') + 1
+        return pd.Series(days / months.days_in_month.to_numpy(), index=months)
+
+    def month_range(self):
+        """期間に含まれる月（pandas PeriodIndex）"""
+        return pd.period_range(self.start, self.end, freq='M', name='年月')
+
+
+def month_period(month):
+    """指定月の期間。month は pandas Period または 'YYYY-MM' 形式の文字列"""
+    month = pd.Period(month, freq='M')
+    return AnalysisPeriod('month', month.start_time.normalize(), month.end_time.normalize())
+
+
+def quarter_period(year, quarter):
+    """指定年の第 quarter 四半期（1〜4）の期間"""
+    if not 1 <= quarter <= 4:
+        raise ValueError(f"四半期は1〜4で指定してください: {quarter}")
+    q = pd.Period(year=year, quarter=quarter, freq='Q')
+    return AnalysisPeriod('quarter', q.start_time.normalize(), q.end_time.normalize())
+
+
+def year_period(year):
+    """指定年の期間"""
+    return AnalysisPeriod('year', pd.Timestamp(year, 1, 1), pd.Timestamp(year, 12, 31))
+
+
+def range_period(start, end):
+    """任意の期間（両端の日を含む）"""
+    start = pd.Timestamp(start).normalize()
+    end = pd.Timestamp(end).normalize()
+    if end < start:
+        raise ValueError("期間の最終日が初日より前です")
+    return AnalysisPeriod('range', start, end)
@@ -0,0 +1,113 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# 版 → 共有の Ledger（どのセッションかが表示中の版だけを持つ）
+_versions = {}
+# セッションID → 表示中の版
+_holders = {}
+_lock = threading.Lock()
+
+# 版が不要になったときに呼ぶ関数（描画結果のキャッシュなどを解放する）
+_evict_callbacks = []
+
+
+def on_evict(callback):
+    """
+    どのセッションからも参照されなくなった版を解放するときに呼ぶ関数を登録する
+
+    Parameters:
+    - callback: callable, 解放する版（str）を受け取る関数
+    """
+    with _lock:
+        if callback not in _evict_callbacks:
+            _evict_callbacks.append(callback)
+
+
+def _collect(candidates):
+    """参照しているセッションがなくなった版を取り除き、その版のリストを返す（_lock 内で呼ぶ）"""
+    held = set(_holders.values())
+    evicted = [v for v in candidates if v is not None and v not in held and v in _versions]
+    for version in evicted:
+        del _versions[version]
+    return evicted
+
+
+def _notify(evicted):
+    """解放した版を登録済みの関数に通知する"""
+    if not evicted:
+        return
+    with _lock:
+        callbacks = list(_evict_callbacks)
+    for version in evicted:
+        for callback in callbacks:
+            try:
+                callback(version)
+            except Exception:
+                logger.warning("版の解放処理に失敗しました: %s", version, exc_info=True)
+
+
+def acquire(session_id, ledger):
+    """
+    セッションが表示する版を登録し、プロセス内で共有する Ledger を返す。
+    同じ版がすでに登録されていれば、渡された Ledger ではなく登録済みのものを返すため、
+    閲覧者が何人いても1つの版の明細と集計はメモリ上に1つだけになる。
+    セッションが前に表示していた版は、他に参照がなければ解放する
+
+    Parameters:
+    - session_id: str, セッションID
+    - ledger: Ledger, このセッションが読み込んだデータ
+
+    Returns:
+    - Ledger
+    """
+    with _lock:
+        shared = _versions.setdefault(ledger.version, ledger)
+        previous = _holders.get(session_id)
+        _holders[session_id] = shared.version
+        evicted = _collect([previous]) if previous != shared.version else []
+    _notify(evicted)
+    return shared
+
+
+def release(session_id):
+    """セッションの参照を外す（他に参照のない版は解放する）"""
+    with _lock:
+        evicted = _collect([_holders.pop(session_id, None)])
+    _notify(evicted)
+
+
+def sweep(is_alive):
+    """
+    終了したセッションの参照をまとめて外す
+
+    Parameters:
+    - is_alive: callable, セッションIDを受け取り、まだ接続中なら True を返す関数
+    """
+    with _lock:
+        sessions = list(_holders)
+    for session_id in sessions:
+        if not is_alive(session_id):
+            release(session_id)
+
+
+def stats():
+    """
+    共有中の版の数・セッション数・明細のメモリ使用量
+
+    Returns:
+    - dict: versions / sessions / bytes / holders（版ごとの参照セッション数）
+    """
+    with _lock:
+        ledgers = list(_versions.values())
+        holders = list(_holders.values())
+    counts = {}
+    for version in holders:
+        counts[version] = counts.get(version, 0) + 1
+    return {
+        'versions': len(ledgers),
+        'sessions': len(holders),
+        'bytes': int(sum(ledger.df.memory_usage(deep=True).sum() for ledger in ledgers)),
+        'holders': counts,
+    }
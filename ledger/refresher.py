@@ -0,0 +1,77 @@
+import logging
+import os
+import threading
+
+from .loader import fetch_sheet
+
+logger = logging.getLogger(__name__)
+
+# 取得元を確認する間隔（秒）。環境変数 SHEET_REFRESH_INTERVAL=0 で無効
+REFRESH_INTERVAL = float(os.getenv("SHEET_REFRESH_INTERVAL", "60"))
+
+
+class RefreshWorker(threading.Thread):
+    """
+    取得元を定期的に確認し、変更があればキャッシュの Ledger を差し替えるスレッド
+
+    差し替えは fetch_sheet がキャッシュの辞書へ新しいエントリを代入するだけなので、
+    表示中のセッションは古い版を最後まで使い、次の再実行から新しい版を読む。
+    """
+
+    def __init__(self, url, interval):
+        super().__init__(name=f"sheet-refresh-{url}", daemon=True)
+        self.url = url
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.is_set():
+            try:
+                fetch_sheet(self.url, force=True)
+            except Exception:
+                logger.warning("データの定期更新に失敗しました: %s", self.url, exc_info=True)
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def request_refresh(self):
+        """次の確認を待たずに取得元を確認する"""
+        self._wake.set()
+
+    def stop(self):
+        """スレッドを終了させる"""
+        self._stopped.set()
+        self._wake.set()
+
+
+_workers = {}
+_workers_lock = threading.Lock()
+
+
+def start_refresher(url, interval=REFRESH_INTERVAL):
+    """
+    URLごとに1つだけ更新スレッドを起動する（起動済みなら何もしない）
+
+    Returns:
+    - RefreshWorker or None: interval が0以下なら None
+    """
+    if interval <= 0:
+        return None
+    with _workers_lock:
+        worker = _workers.get(url)
+        if worker is None or not worker.is_alive():
+            worker = RefreshWorker(url, interval)
+            _workers[url] = worker
+            worker.start()
+        return worker
+
+
+def request_refresh(url):
+    """更新スレッドに即時の確認を依頼する。スレッドがなければ False"""
+    with _workers_lock:
+        worker = _workers.get(url)
+    if worker is None or not worker.is_alive():
+        return False
+    worker.request_refresh()
+    return True
+
@@ -0,0 +1,139 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+# 正規化後の家計簿で必ず存在する列
+REQUIRED_COLUMNS = ['日付', 'カテゴリ', '金額']
+# 辞書エンコード（category 型）で保持する列
+DICTIONARY_COLUMNS = ['カテゴリ', 'メモ']
+# CSVから読み込む列（それ以外の列はパース時に捨てる）と、読み込み時の型
+USE_COLUMNS = ('日付', 'カテゴリ', '金額', 'メモ')
+_CSV_DTYPES = {'カテゴリ': 'category', 'メモ': 'category'}
+
+_INT32 = np.iinfo(np.int32)
+
+
+def _to_yen(series):
+    """金額列を整数（円）に変換する。'¥1,200' のような表記も受け付ける"""
+    if not pd.api.types.is_numeric_dtype(series):
+        series = series.astype(str).str.replace(r'[¥,\s円]', '', regex=True)
+    amounts = pd.to_numeric(series, errors='coerce').fillna(0).round().astype('int64')
+    # 家計簿の金額は int32 に収まるので半分の幅で持つ（収まらない場合だけ int64 のまま）
+    if amounts.empty or (amounts.min() >= _INT32.min and amounts.max() <= _INT32.max):
+        return amounts.astype('int32')
+    return amounts
+
+
+def _to_category(series, strip=True):
+    """
+    文字列の列を category 型（辞書エンコード）にする（欠損は空文字）。
+    読み込み時点で category 型なら、行ではなくカテゴリの一覧だけを変換する
+
+    Parameters:
+    - series: pandas Series, 変換する列
+    - strip: bool, Trueなら前後の空白を除く
+    """
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.fillna('').astype(str)
+        if strip:
+            series = series.str.strip()
+        return series.astype('category')
+
+    labels = series.cat.categories.astype(str)
+    if strip:
+        labels = labels.str.strip()
+    categories = labels.unique()
+    codes = series.cat.codes.to_numpy()
+    if (codes < 0).any() and '' not in categories:
+        categories = categories.append(pd.Index(['']))
+    blank = categories.get_loc('') if '' in categories else -1
+    # 欠損のコード -1 は末尾の空文字の位置を指す（全行が欠損でカテゴリが空の列も扱える）
+    mapping = np.append(categories.get_indexer(labels), blank)
+    new_codes = mapping[codes]
+    return pd.Series(pd.Categorical.from_codes(new_codes, categories),
+                     index=series.index, name=series.name)
+
+
+def read_ledger_csv(body):
+    """
+    CSV本文を、家計簿で使う列だけ型を指定して読み込む。
+    カテゴリ・メモは読み込み時に category 型にするため、全行を object 型で持つ中間データを作らない
+
+    Parameters:
+    - body: bytes, CSV本文（ヘッダ行を含む）
+
+    Returns:
+    - pandas DataFrame, normalize_ledger に渡す生データ
+    """
+    return pd.read_csv(io.BytesIO(body), usecols=lambda column: column in USE_COLUMNS,
+                       dtype=_CSV_DTYPES)
+
+
+def normalize_ledger(raw):
+    """
+    読み込んだ生データを、全コンポーネントが共通で使う型付きの家計簿に変換する
+
+    - 日付: datetime64（解釈できない行は除外）
+    - 金額: int32（円。int32 に収まらない場合のみ int64）
+    - カテゴリ: category
+    - メモ: category（欠損は空文字）
+
+    月単位の集計は AggregateCube が持つため、年月の列は持たない。
+    行は日付の昇順（同日内は元の順序）に並べる。
+    返り値は読み取り専用として扱い、コンポーネント側で列を書き換えないこと
+    （複数のセッション・ウィジェットが同じ DataFrame を参照する）。
+
+    Parameters:
+    - raw: pandas DataFrame, CSVをそのまま読み込んだデータ
+
+    Returns:
+    - pandas DataFrame
+    """
+    missing = [col for col in REQUIRED_COLUMNS if col not in raw.columns]
+    if missing:
+        raise ValueError(f"必要な列がありません: {', '.join(missing)}")
+
+    df = raw.copy()
+    df['日付'] = pd.to_datetime(df['日付'], errors='coerce')
+    df = df.dropna(subset=['日付'])
+    df['金額'] = _to_yen(df['金額'])
+    df['カテゴリ'] = _to_category(df['カテゴリ'])
+    if 'メモ' not in df.columns:
+        df['メモ'] = ''
+    df['メモ'] = _to_category(df['メモ'], strip=False)
+    if '年月' in df.columns:
+        df = df.drop(columns='年月')
+
+    df = df.sort_values('日付', kind='stable').reset_index(drop=True)
+    return df
+
+
+def concat_ledgers(frames):
+    """
+    正規化済みの明細を連結する。category 型の列はカテゴリを揃えてから連結し
+    （揃えないと object 型に戻ってしまう）、日付順が崩れた場合だけ並べ直す
+
+    Parameters:
+    - frames: list[pandas DataFrame], normalize_ledger の返り値（古い順）
+    """
+    frames = [frame for frame in frames if not frame.empty] or frames[:1]
+    if len(frames) == 1:
+        return frames[0]
+
+    for column in DICTIONARY_COLUMNS:
+        categories = frames[0][column].cat.categories
+        for frame in frames[1:]:
+            added = frame[column].cat.categories.difference(categories)
+            if len(added):
+                categories = categories.append(added)
+        frames = [
+            frame if frame[column].cat.categories.equals(categories)
+            else frame.assign(**{column: frame[column].cat.set_categories(categories)})
+            for frame in frames
+        ]
+
+    df = pd.concat(frames, ignore_index=True)
+    if not df['日付'].is_monotonic_increasing:
+        df = df.sort_values('日付', kind='stable').reset_index(drop=True)
+    return df
@@ -0,0 +1,195 @@
+import threading
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .plane import on_evict
+
+# 索引の文字 n-gram の長さ（日本語は単語の区切りがないため文字単位で分割する）
+NGRAM = 2
+# 索引を保持するデータの版の数
+_MAX_VERSIONS = 8
+
+
+def normalize_text(text):
+    """全角・半角や大文字・小文字の違いを吸収した検索用の文字列"""
+    return unicodedata.normalize('NFKC', str(text)).lower()
+
+
+def _grams(text):
+    """文字列に含まれる1文字と NGRAM 文字の部分文字列の集合"""
+    grams = set(text)
+    grams.update(text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1))
+    return grams
+
+
+class MemoIndex:
+    """
+    メモの文字 n-gram から、そのメモのカテゴリコードを引く転置索引
+
+    メモ列は category 型なので、行ではなく異なるメモの文字列だけを索引する。
+    追記ではカテゴリが末尾に加わるだけで既存のコードは変わらないため、
+    1つの索引を複数の版で共有し、増えたメモだけを加えていく。
+    各版は自分のカテゴリ数（size）より小さいコードだけを使う。
+
+    Attributes:
+    - raw: list[str], 登録済みのメモ（コード順、正規化前）
+    - memos: list[str], 登録済みのメモ（コード順、正規化済み）
+    - postings: dict[str, list[int]], n-gram → そのn-gramを含むメモのコード（昇順）
+    """
+
+    def __init__(self):
+        self.raw = []
+        self.memos = []
+        self.postings = {}
+
+    def covers(self, categories):
+        """登録済みのメモが categories の先頭と一致するか（この索引を延長して使えるか）"""
+        n = len(self.raw)
+        return n <= len(categories) and list(categories[:n]) == self.raw
+
+    def extend(self, categories):
+        """
+        categories のうち未登録の末尾のメモを索引に加える
+
+        Parameters:
+        - categories: pandas Index, メモ列のカテゴリ（登録済みの分を先頭に含む）
+        """
+        for code in range(len(self.raw), len(categories)):
+            memo = normalize_text(categories[code])
+            for gram in _grams(memo):
+                self.postings.setdefault(gram, []).append(code)
+            self.memos.append(memo)
+            self.raw.append(categories[code])
+
+    def match(self, query, size):
+        """
+        クエリの語（空白区切り）をすべて含むメモのコードを返す
+
+        各語の n-gram の転置リストの共通部分を候補とし、候補だけを部分一致で確かめる。
+
+        Parameters:
+        - query: str, 検索語
+        - size: int, 対象とするコードの上限（その版のカテゴリ数）
+
+        Returns:
+        - numpy.ndarray[int64]: 一致したメモのコード（昇順）
+        """
+        terms = [term for term in normalize_text(query).split() if term]
+        if not terms:
+            return np.empty(0, dtype=np.int64)
+        candidates = None
+        for term in terms:
+            grams = {term} if len(term) < NGRAM else {term[i:i + NGRAM] for i in range(len(term) - NGRAM + 1)}
+            # 該当の少ない n-gram から絞り込む
+            for gram in sorted(grams, key=lambda g: len(self.postings.get(g, ()))):
+                codes = np.asarray(self.postings.get(gram, ()), dtype=np.int64)
+                codes = codes[:np.searchsorted(codes, size)]
+                candidates = codes if candidates is None else np.intersect1d(candidates, codes, assume_unique=True)
+                if len(candidates) == 0:
+                    return candidates
+        # n-gram がすべて含まれていても連続しているとは限らないため確かめる
+        return np.array([code for code in candidates
+                         if all(term in self.memos[code] for term in terms)], dtype=np.int64)
+
+
+# データの版 → (索引, その版のカテゴリ数)
+_versions = OrderedDict()
+_lock = threading.Lock()
+
+
+def _forget(version):
+    """どのセッションも表示しなくなった版の登録を外す（共有の索引は他の版が使っていれば残る）"""
+    with _lock:
+        _versions.pop(version, None)
+
+
+on_evict(_forget)
+
+
+def memo_index(ledger):
+    """
+    Ledger のメモの転置索引と、その版で使うコードの上限を返す。
+    版ごとに一度だけ用意し、追記で版が変わった場合は前の版の索引に
+    増えたメモだけを加える
+
+    Parameters:
+    - ledger: Ledger, 家計簿データ
+
+    Returns:
+    - (MemoIndex, int)
+    """
+    categories = ledger.df['メモ'].cat.categories
+    with _lock:
+        if ledger.version in _versions:
+            _versions.move_to_end(ledger.version)
+            return _versions[ledger.version]
+
+        index = next((index for index, _ in reversed(_versions.values()) if index.covers(categories)), None)
+        if index is None:
+            index = MemoIndex()
+        index.extend(categories)
+        _versions[ledger.version] = (index, len(categories))
+        while len(_versions) > _MAX_VERSIONS:
+            _versions.popitem(last=False)
+        return index, len(categories)
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    """
+    メモ検索の結果
+
+    Attributes:
+    - rows: numpy.ndarray[int64], 一致した明細の行位置（新しい順）
+    - by_memo: pandas DataFrame, 一致したメモごとの 件数 / 合計金額（合計金額の降順）
+    - count: int, 一致した明細の件数
+    - total: int, 一致した明細の合計金額
+    """
+    rows: np.ndarray
+    by_memo: pd.DataFrame
+    count: int
+    total: int
+
+
+def search_memos(ledger, query, start=None, end=None):
+    """
+    メモに検索語を含む明細を、転置索引で探して集計する
+
+    Parameters:
+    - ledger: Ledger, 家計簿データ
+    - query: str, 検索語（空白区切りの語をすべて含むメモが一致する）
+    - start, end: 日付 or None, 期間の初日と最終日（None なら制限なし）
+
+    Returns:
+    - SearchResult
+    """
+    index, size = memo_index(ledger)
+    matched = index.match(query, size)
+
+    lo, hi = 0, len(ledger.df)
+    if hi and (start is not None or end is not None):
+        lo, hi = ledger.index.date_bounds(start if start is not None else ledger.df['日付'].iloc[0],
+                                          end if end is not None else ledger.df['日付'].iloc[-1])
+    codes = ledger.df['メモ'].cat.codes.to_numpy()[lo:hi]
+    rows = np.flatnonzero(np.isin(codes, matched)) + lo if len(matched) else np.empty(0, dtype=np.int64)
+
+    amounts = ledger.df['金額'].to_numpy()[rows].astype(np.int64)
+    row_codes = codes[rows - lo]
+    counts = np.bincount(row_codes, minlength=size)[matched] if len(rows) else np.zeros(len(matched), np.int64)
+    sums = np.bincount(row_codes, weights=amounts, minlength=size)[matched] if len(rows) else np.zeros(len(matched))
+    by_memo = pd.DataFrame({
+        'メモ': [index.raw[code] for code in matched],
+        '件数': counts.astype(np.int64),
+        '合計金額': sums.astype(np.int64),
+    })
+    by_memo = by_memo[by_memo['件数'] > 0].sort_values('合計金額', ascending=False, kind='stable')
+    return SearchResult(
+        rows=rows[::-1],
+        by_memo=by_memo.reset_index(drop=True),
+        count=len(rows),
+        total=int(amounts.sum()),
+    )
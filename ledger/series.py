@@ -0,0 +1,77 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class CumulativeSeries:
+    """
+    期間内の日別累積支出と累積予算
+
+    Attributes:
+    - dates: numpy.ndarray[datetime64[D]], 期間内の全日付
+    - actual: numpy.ndarray[int64], 日別の累積支出
+    - budget: numpy.ndarray[float64], 日別の累積予算（各月の予算をその月の日数で按分）
+    - rows: int, 期間・カテゴリに該当した明細の件数
+    """
+    dates: np.ndarray
+    actual: np.ndarray
+    budget: np.ndarray
+    rows: int
+
+
+def cumulative_series(ledger, categories, start, end, monthly_budgets):
+    """
+    指定カテゴリ・期間の累積支出と累積予算を、日付オフセットの bincount と
+    cumsum で一度に計算する。該当する行は索引から二分探索で求める。
+    予算は月ごとに異なってよく、各月の予算をその月の1日あたりの額で積み上げる
+
+    Parameters:
+    - ledger: Ledger, 家計簿データ
+    - categories: list[str], 対象カテゴリ
+    - start, end: 日付, 期間の初日と最終日（両端を含む）
+    - monthly_budgets: pandas Series, 年月 → その月の月間予算（期間内の月。ない月は0）
+
+    Returns:
+    - CumulativeSeries
+    """
+    start = np.datetime64(pd.Timestamp(start).normalize(), 'D')
+    end = np.datetime64(pd.Timestamp(end).normalize(), 'D')
+    n_days = int((end - start).astype(int)) + 1
+
+    index = ledger.index
+    rows = index.rows(categories, start, end)
+    offsets = index.days[rows] - start.astype(np.int64)
+    amounts = ledger.df['金額'].to_numpy()[rows]
+
+    daily = np.bincount(offsets, weights=amounts, minlength=n_days)[:n_days]
+    dates = start + np.arange(n_days)
+    return CumulativeSeries(
+        dates=dates,
+        actual=np.cumsum(daily).astype(np.int64),
+        budget=_cumulative_budget(dates, monthly_budgets),
+        rows=len(rows),
+    )
+
+
+def _cumulative_budget(dates, monthly_budgets):
+    """
+    日別の累積予算。各日にその月の予算 / その月の日数 を割り当てて積み上げる。
+    月内は「前月までの累積 + 1日あたりの額 × 月内の経過日数」で求める
+
+    Parameters:
+    - dates: numpy.ndarray[datetime64[D]], 連続した日付
+    - monthly_budgets: pandas Series, 年月 → 月間予算
+    """
+    months = pd.period_range(pd.Timestamp(dates[0]), pd.Timestamp(dates[-1]), freq='M')
+    budgets = monthly_budgets.reindex(months, fill_value=0).to_numpy(dtype=np.float64)
+    rate = budgets / months.days_in_month.to_numpy()
+
+    # 各日が何番目の月か、各月の最初の日の位置、期間内の日数
+    month_of_day = (dates.astype('datetime64[M]') - dates[0].astype('datetime64[M]')).astype(np.int64)
+    firsts = np.searchsorted(month_of_day, np.arange(len(months)))
+    covered = np.diff(np.append(firsts, len(dates)))
+    before = np.concatenate([[0.0], np.cumsum(rate * covered)[:-1]])
+    elapsed = np.arange(len(dates)) - firsts[month_of_day] + 1
+    return before[month_of_day] + rate[month_of_day] * elapsed
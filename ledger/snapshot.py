@@ -0,0 +1,191 @@
+import base64
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from .cube import AggregateCube
+from .incremental import Watermark
+from .schema import DICTIONARY_COLUMNS
+
+# スナップショットの保存先。環境変数 SNAPSHOT_DIR を空にすると無効
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join(".cache", "snapshots"))
+
+# スキーマのメタデータに格納するキー
+_META_KEY = b'kakeibo'
+
+
+def snapshot_path(url, directory=None):
+    """URLに対応するスナップショットファイルのパス（無効なら None）"""
+    directory = SNAPSHOT_DIR if directory is None else directory
+    if not directory:
+        return None
+    name = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(directory, f"{name}.arrow")
+
+
+def _cube_path(path):
+    """スナップショットに対応する集計のファイルのパス"""
+    return path[:-len('.arrow')] + '.cube.arrow'
+
+
+def _write_atomic(path, table):
+    """Arrow IPC 形式で一時ファイルに書き、path へ置き換える"""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f, pa.ipc.new_file(f, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _cube_table(cube, version):
+    """
+    集計（月別の合計・件数と日別の合計）を、0でないセルの (表, 行, 列, 値) の表にする。
+    行・列の並びはメタデータに持たせる
+    """
+    frames = (cube.sums, cube.counts, cube.daily)
+    kinds, rows, columns, values = [], [], [], []
+    for kind, frame in enumerate(frames):
+        matrix = frame.to_numpy()
+        r, c = np.nonzero(matrix)
+        kinds.append(np.full(len(r), kind, dtype=np.int8))
+        rows.append(r.astype(np.int32))
+        columns.append(c.astype(np.int32))
+        values.append(matrix[r, c].astype(np.int64))
+    meta = {
+        'version': version,
+        'first_month': str(cube.sums.index[0]),
+        'months': len(cube.sums.index),
+        'first_day': cube.daily.index[0].strftime('%Y-%m-%d'),
+        'days': len(cube.daily.index),
+        'columns': [list(frame.columns) for frame in frames],
+    }
+    table = pa.table({
+        '表': np.concatenate(kinds),
+        '行': np.concatenate(rows),
+        '列': np.concatenate(columns),
+        '値': np.concatenate(values),
+    })
+    return table.replace_schema_metadata({_META_KEY: json.dumps(meta).encode('utf-8')})
+
+
+def _cube_from_table(table):
+    """_cube_table の表から集計を復元する。返り値は (版, AggregateCube)"""
+    meta = json.loads(table.schema.metadata[_META_KEY])
+    months = pd.period_range(meta['first_month'], periods=meta['months'], freq='M', name='年月')
+    days = pd.date_range(meta['first_day'], periods=meta['days'], freq='D', name='日付')
+    kinds, rows, columns, values = (table[name].to_numpy() for name in ('表', '行', '列', '値'))
+    frames = []
+    for kind, index in enumerate((months, months, days)):
+        labels = meta['columns'][kind]
+        matrix = np.zeros((len(index), len(labels)), dtype=np.int64)
+        selected = kinds == kind
+        matrix[rows[selected], columns[selected]] = values[selected]
+        frames.append(pd.DataFrame(matrix, index=index, columns=pd.Index(labels, dtype=object, name='カテゴリ')))
+    return meta['version'], AggregateCube(*frames)
+
+
+def save_snapshot(url, sheet, directory=None):
+    """
+    正規化済みの明細と取得情報、集計を Arrow IPC 形式でディスクに保存する。
+    集計は別のファイルに保存し、起動時に明細を集計し直さずに済むようにする。
+    書き込みは一時ファイル経由で置き換えるため、読み込み中のプロセスを壊さない
+
+    Parameters:
+    - url: str, 取得元URL
+    - sheet: SheetData, 保存するキャッシュエントリ
+    - directory: str or None, 保存先（None なら SNAPSHOT_DIR）
+    """
+    path = snapshot_path(url, directory)
+    if path is None:
+        return None
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    df = sheet.ledger.df
+    watermark = sheet.watermark
+    meta = {
+        'url': url,
+        'version': sheet.version,
+        'etag': sheet.etag,
+        'last_modified': sheet.last_modified,
+        'watermark': {
+            'size': watermark.size,
+            'rows': watermark.rows,
+            'digest': watermark.digest,
+            'header': base64.b64encode(watermark.header).decode('ascii'),
+        },
+    }
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        _META_KEY: json.dumps(meta).encode('utf-8'),
+    })
+
+    # 集計を先に置き換える（明細と版が合わない集計は読み込み時に使わない）
+    cube = sheet.ledger.cube
+    if not cube.sums.empty:
+        _write_atomic(_cube_path(path), _cube_table(cube, sheet.version))
+    _write_atomic(path, table)
+    return path
+
+
+def load_snapshot(url, directory=None):
+    """
+    保存済みのスナップショットをメモリマップで読み込む
+
+    Returns:
+    - dict or None: df / cube / version / etag / last_modified / watermark を持つ辞書。
+      ファイルがない・壊れている場合は None。cube は保存済みの集計
+      （ない・明細と版が合わない場合は None で、呼び出し側が明細から集計する）
+    """
+    path = snapshot_path(url, directory)
+    if path is None or not os.path.exists(path):
+        return None
+    try:
+        with pa.memory_map(path, 'r') as source:
+            table = pa.ipc.open_file(source).read_all()
+        meta = json.loads(table.schema.metadata[_META_KEY])
+        if meta.get('url') != url:
+            return None
+        df = table.to_pandas()
+    except (OSError, KeyError, ValueError, pa.ArrowException):
+        return None
+
+    for column in DICTIONARY_COLUMNS:
+        # 辞書エンコード導入前に保存されたスナップショットも読めるようにする
+        if not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].fillna('').astype(str).astype('category')
+    wm = meta['watermark']
+    return {
+        'df': df,
+        'cube': _load_cube(_cube_path(path), meta['version']),
+        'version': meta['version'],
+        'etag': meta['etag'],
+        'last_modified': meta['last_modified'],
+        'watermark': Watermark(
+            size=wm['size'],
+            rows=wm['rows'],
+            digest=wm['digest'],
+            header=base64.b64decode(wm['header']),
+        ),
+    }
+
+
+def _load_cube(path, version):
+    """保存済みの集計を読み込む（ない・壊れている・版が合わない場合は None）"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with pa.memory_map(path, 'r') as source:
+            saved, cube = _cube_from_table(pa.ipc.open_file(source).read_all())
+    except (OSError, KeyError, TypeError, ValueError, pa.ArrowException):
+        return None
+    return cube if saved == version else None
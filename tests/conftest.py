@@ -0,0 +1,101 @@
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from ledger import loader, snapshot
+from ledger.model import build_ledger
+from ledger.schema import normalize_ledger
+
+
+class SheetServer:
+    """
+    ウェブ公開されたCSVの代わりにローカルで本文を返すHTTPサーバ
+
+    Attributes:
+    - bodies: dict[str, bytes], パス → 返す本文
+    - etag: bool, True なら ETag を返し If-None-Match に 304 で応える
+    - delay: dict[str, float], パス → 応答までの待ち時間（秒）
+    - down: bool, True なら 503 を返す
+    - requests: list[(str, dict)], 受け取った (パス, ヘッダ)
+    """
+
+    def __init__(self):
+        self.bodies = {}
+        self.etag = True
+        self.delay = {}
+        self.down = False
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append((self.path, dict(self.headers)))
+                time.sleep(server.delay.get(self.path, 0))
+                if server.down or self.path not in server.bodies:
+                    self.send_response(503 if server.down else 404)
+                    self.end_headers()
+                    return
+                body = server.bodies[self.path]
+                tag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                if server.etag and self.headers.get('If-None-Match') == tag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/csv; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                if server.etag:
+                    self.send_header('ETag', tag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self._httpd.server_port}{path}"
+
+    def count(self, path):
+        """path へのリクエスト数"""
+        return sum(1 for requested, _ in self.requests if requested == path)
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def sheet_server():
+    server = SheetServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """テストごとに取得キャッシュを空にし、スナップショットは一時ディレクトリに置く"""
+    monkeypatch.setattr(snapshot, 'SNAPSHOT_DIR', str(tmp_path / 'snapshots'))
+    loader._cache.clear()
+    yield
+    loader._cache.clear()
+
+
+def csv_body(rows):
+    """(日付, カテゴリ, 金額, メモ) の行から家計簿のCSV本文を作る"""
+    lines = ['日付,カテゴリ,金額,メモ'] + [','.join(str(value) for value in row) for row in rows]
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def ledger_from_rows(rows, version='test'):
+    """(日付, カテゴリ, 金額, メモ) の行から正規化・集計済みの Ledger を作る"""
+    raw = pd.DataFrame(list(rows), columns=['日付', 'カテゴリ', '金額', 'メモ'])
+    return build_ledger(normalize_ledger(raw), version)
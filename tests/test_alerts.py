@@ -0,0 +1,159 @@
+import json
+
+import pandas as pd
+import pytest
+
+from ledger import alerts, loader
+from ledger.alerts import AlertEngine, Rule, alert_engine, evaluate_sources, watch_sources
+from tests.conftest import csv_body, ledger_from_rows
+
+TODAY = '2024-05-10'
+ROWS = [
+    ('2024/05/02', '食料', 6000, 'スーパー'),
+    ('2024/05/08', '食料', 4000, 'スーパー'),
+    ('2024/05/03', '日用品', 500, '洗剤'),
+]
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return str(tmp_path / 'alerts.jsonl')
+
+
+def _spy(engine):
+    """engine が評価したルールを記録する"""
+    evaluated = []
+    check = engine._check
+
+    def spy(rules, ledger, today):
+        evaluated.append(sorted(rule.category for rule in rules))
+        return check(rules, ledger, today)
+
+    engine._check = spy
+    return evaluated
+
+
+def test_only_changed_categories_are_reevaluated(outbox):
+    engine = AlertEngine([Rule('over_budget', '食料', 100_000), Rule('over_budget', '日用品', 100_000),
+                          Rule('over_budget', '交通費', 100_000)], outbox)
+    evaluated = _spy(engine)
+    engine.evaluate(ledger_from_rows(ROWS, 'v1'), TODAY)
+    assert evaluated == [['交通費', '日用品', '食料']]
+
+    # 同じ版・同じ日なら評価しない
+    engine.evaluate(ledger_from_rows(ROWS, 'v1'), TODAY)
+    assert len(evaluated) == 1
+
+    engine.evaluate(ledger_from_rows(ROWS + [('2024/05/09', '日用品', 300, '')], 'v2'), TODAY)
+    assert evaluated[-1] == ['日用品']
+
+    # 版が変わっても集計が変わらなければ評価するルールはない
+    engine.evaluate(ledger_from_rows(ROWS + [('2024/05/09', '日用品', 300, '')], 'v3'), TODAY)
+    assert evaluated[-1] == []
+
+    # 日付が変わると経過日数が変わるため全ルールを評価する
+    engine.evaluate(ledger_from_rows(ROWS + [('2024/05/09', '日用品', 300, '')], 'v3'), '2024-05-11')
+    assert evaluated[-1] == ['交通費', '日用品', '食料']
+
+
+def test_over_budget_is_raised_once_across_restarts(outbox):
+    rules = [Rule('over_budget', '食料', 9000)]
+    ledger = ledger_from_rows(ROWS, 'v1')
+    raised = AlertEngine(rules, outbox).evaluate(ledger, TODAY)
+    assert [(alert.kind, alert.category, alert.value, alert.threshold) for alert in raised] == \
+        [('over_budget', '食料', 10000, 9000)]
+    with open(outbox, encoding='utf-8') as f:
+        assert [json.loads(line)['key'] for line in f] == [raised[0].key]
+
+    # 再起動後も outbox から読み戻して同じアラートは知らせない
+    assert AlertEngine(rules, outbox).evaluate(ledger, TODAY) == []
+    # 翌月は別のアラート
+    june = ledger_from_rows(ROWS + [('2024/06/01', '食料', 9500, '')], 'v2')
+    assert len(AlertEngine(rules, outbox).evaluate(june, '2024-06-02')) == 1
+
+
+@pytest.mark.parametrize('spent, tolerance, expected', [
+    # 31日の月の10日時点: 計画は 31,000 × 10/31 = 10,000
+    (10000, 0.0, False),
+    (10001, 0.0, True),
+    (12000, 0.2, False),
+    (12001, 0.2, True),
+])
+def test_pace_tolerance(outbox, spent, tolerance, expected):
+    ledger = ledger_from_rows([('2024/05/01', '食料', spent, '')])
+    raised = AlertEngine([Rule('pace', '食料', 31000, tolerance)], outbox).evaluate(ledger, TODAY)
+    assert bool(raised) == expected
+    if expected:
+        assert raised[0].threshold == int(10000 * (1 + tolerance))
+
+
+@pytest.mark.parametrize('rows, today, expected', [
+    # 同じ日の複数の明細は1回の購入（前回は5月1日で9日前）
+    ([('2024/05/01', '外食', 1000, ''), ('2024/05/10', '外食', 800, ''), ('2024/05/10', '外食', 300, '')],
+     TODAY, None),
+    # 5月6日 → 5月10日 の4日で購入
+    ([('2024/05/01', '外食', 1000, ''), ('2024/05/06', '外食', 800, ''), ('2024/05/10', '外食', 300, '')],
+     TODAY, 4),
+    # 直近の購入が推奨日数より前なら知らせない
+    ([('2024/05/01', '外食', 1000, ''), ('2024/05/03', '外食', 800, '')], '2024-05-20', None),
+    # 購入が1日だけなら前回がない
+    ([('2024/05/10', '外食', 1000, ''), ('2024/05/10', '外食', 800, '')], TODAY, None),
+])
+def test_frequency_counts_same_day_entries_once(outbox, rows, today, expected):
+    ledger = ledger_from_rows(rows)
+    raised = AlertEngine([Rule('frequency', '外食', 7)], outbox).evaluate(ledger, today)
+    assert [alert.value for alert in raised] == ([] if expected is None else [expected])
+
+
+def test_unknown_rule_kind(outbox):
+    with pytest.raises(ValueError):
+        AlertEngine([Rule('weekly', '食料', 1)], outbox)
+
+
+def test_watched_sources_use_the_rules_of_the_current_month(outbox, monkeypatch):
+    monkeypatch.setattr(alerts, '_engines', {})
+    monkeypatch.setattr(alerts, '_watches', {})
+    sources = [('シート1', 'http://127.0.0.1/alerts.csv')]
+    budgets = {'2024-05': 20000, '2024-06': 9000}
+    months = []
+
+    def rules_for(month):
+        months.append(str(month))
+        return (Rule('over_budget', '食料', budgets[str(month)]),)
+
+    watch_sources(sources, rules_for, outbox)
+    ledger = ledger_from_rows(ROWS + [('2024/06/01', '食料', 10000, '')], 'v1')
+    assert evaluate_sources(sources, ledger, TODAY) == []
+    may = alerts._engines[tuple(sources)]
+
+    # 月が変わったらその月のルールで評価し、評価器は置き換える（増やさない）
+    raised = evaluate_sources(sources, ledger, '2024-06-02')
+    assert [alert.threshold for alert in raised] == [9000]
+    assert months == ['2024-05', '2024-06']
+    assert list(alerts._engines) == [tuple(sources)]
+    assert alerts._engines[tuple(sources)] is not may
+
+    # ルールが同じなら同じ評価器を使う
+    engine = alert_engine(sources, rules_for(pd.Period('2024-06', 'M')), outbox)
+    assert engine is alerts._engines[tuple(sources)]
+
+
+def test_ingest_hook_evaluates_watched_sources(outbox, monkeypatch, sheet_server):
+    monkeypatch.setattr(alerts, '_engines', {})
+    monkeypatch.setattr(alerts, '_watches', {})
+    # 取り込み時の評価は今日を基準にする
+    today = pd.Timestamp.today().strftime('%Y/%m/%d')
+    sheet_server.bodies['/a.csv'] = csv_body([(today, '食料', 30000, '')])
+    url = sheet_server.url('/a.csv')
+    sources = [('シート1', url)]
+    watch_sources(sources, lambda month: (Rule('over_budget', '食料', 20000),), outbox)
+
+    # 取り込みの通知はバックグラウンドで行われるため、ここでは直接呼ぶ
+    monkeypatch.setattr(loader, '_ingest_callbacks', [])
+    entry, _ = loader.fetch_sheet(url, snapshot=False)
+    alerts._on_ingest(url, entry)
+    with open(outbox, encoding='utf-8') as f:
+        assert [json.loads(line)['category'] for line in f] == ['食料']
+    # 監視していない取得元の取り込みでは評価しない
+    alerts._on_ingest('http://127.0.0.1/other.csv', entry)
+    assert len(alerts._engines) == 1
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ledger.budget import BudgetHistory, budget_vs_actual, monthly_budgets
+from ledger.period import month_period, quarter_period, range_period
+from ledger.series import cumulative_series
+from tests.conftest import ledger_from_rows
+
+CONFIG = {
+    'budgets': {'食料': 30000, '日用品': 10000},
+    'budget_history': [
+        {'effective': '2024-04', 'budgets': {'食料': 36000, '趣味': 5000}},
+        {'effective': '2024-07', 'budgets': {'日用品': 8000}},
+    ],
+}
+CATEGORIES = ['食料', '日用品', '趣味', '交通費']
+ROWS = [
+    ('2024/03/20', '食料', 5000, ''),
+    ('2024/03/31', '趣味', 1000, ''),
+    ('2024/04/03', '食料', 12000, ''),
+    ('2024/04/10', '日用品', 3000, ''),
+    ('2024/04/20', '食料', 30000, ''),
+]
+
+
+@pytest.fixture
+def budgets():
+    return BudgetHistory.from_config(CONFIG)
+
+
+@pytest.mark.parametrize('month, expected', [
+    # 改定前は [budgets]、趣味はまだ予算がない
+    ('2024-03', [30000, 10000, 0, 0]),
+    # 2024-04 から食料・趣味を改定。記載のない日用品はそのまま
+    ('2024-04', [36000, 10000, 5000, 0]),
+    # 改定のない月は直前の改定を引き継ぐ
+    ('2024-06', [36000, 10000, 5000, 0]),
+    ('2024-07', [36000, 8000, 5000, 0]),
+    ('2025-01', [36000, 8000, 5000, 0]),
+])
+def test_matrix_carries_budgets_forward(budgets, month, expected):
+    table = budgets.matrix([pd.Period(month, freq='M')], CATEGORIES)
+    assert table.iloc[0].tolist() == expected
+    assert list(table.columns) == CATEGORIES
+
+
+def test_matrix_without_initial_budget_is_zero_before_effective_month():
+    budgets = BudgetHistory.from_config({
+        'budget_history': [{'effective': '2024-04', 'budgets': {'趣味': 5000}}],
+    })
+    table = budgets.matrix(pd.period_range('2024-02', '2024-05', freq='M'))
+    assert table['趣味'].tolist() == [0, 0, 5000, 5000]
+    assert budgets.categories == ['趣味']
+
+
+def test_invalid_effective_month_is_rejected():
+    with pytest.raises(ValueError):
+        BudgetHistory.from_config({'budget_history': [{'effective': '2024-13', 'budgets': {}}]})
+
+
+@pytest.mark.parametrize('period, expected', [
+    (month_period('2024-04'), {'食料': 36000, '日用品': 10000, '趣味': 5000}),
+    (quarter_period(2024, 1), {'食料': 90000, '日用品': 30000, '趣味': 0}),
+    # 3月は 15/31、4月は 15/30 を按分する
+    (range_period('2024-03-17', '2024-04-15'),
+     {'食料': 30000 * 15 / 31 + 18000, '日用品': 10000 * 15 / 31 + 5000, '趣味': 2500}),
+    # 1か月に収まる期間は、その月の日数で按分する
+    (range_period('2024-04-11', '2024-04-20'), {'食料': 12000, '日用品': 10000 / 3, '趣味': 5000 / 3}),
+])
+def test_period_sums_prorate_partial_months(budgets, period, expected):
+    sums = budgets.period_sums(period, list(expected))
+    for category, value in expected.items():
+        assert sums[category] == pytest.approx(value)
+
+
+def test_monthly_budgets_sum_categories_or_repeat_a_constant(budgets):
+    months = pd.period_range('2024-03', '2024-04', freq='M')
+    assert monthly_budgets(budgets, months, ['食料', '趣味']).tolist() == [30000, 41000]
+    assert monthly_budgets(budgets, months, '日用品').tolist() == [10000, 10000]
+    assert monthly_budgets(20000, months, '食料').tolist() == [20000, 20000]
+
+
+@pytest.mark.parametrize('period, expected', [
+    (pd.Period('2024-04', freq='M'),
+     {'食料': (36000, 42000), '日用品': (10000, 3000), '趣味': (5000, 0)}),
+    (month_period('2024-03'),
+     {'食料': (30000, 5000), '日用品': (10000, 0), '趣味': (0, 1000)}),
+    # 予算は按分して円未満を四捨五入する（32516.1 / 9838.7 / 2500）
+    (range_period('2024-03-17', '2024-04-15'),
+     {'食料': (32516, 17000), '日用品': (9839, 3000), '趣味': (2500, 1000)}),
+])
+def test_budget_vs_actual(budgets, period, expected):
+    ledger = ledger_from_rows(ROWS)
+    table = budget_vs_actual(ledger.cube, budgets, period, list(expected))
+    assert table.index.name == 'カテゴリ'
+    for category, (budget, actual) in expected.items():
+        assert table.loc[category].tolist() == [budget, actual, budget - actual]
+
+
+def test_cumulative_series_across_a_month_boundary():
+    ledger = ledger_from_rows([
+        ('2024/03/29', '食料', 100, '期間前'),
+        ('2024/03/30', '食料', 500, ''),
+        ('2024/03/31', '日用品', 700, '対象外'),
+        ('2024/04/01', '食料', 300, ''),
+        ('2024/04/01', '食料', 200, ''),
+        ('2024/04/03', '食料', 999, '期間後'),
+    ])
+    # 3月は1日2000円、4月は1日1000円
+    budgets = pd.Series([62000, 30000], index=pd.period_range('2024-03', '2024-04', freq='M'))
+    series = cumulative_series(ledger, ['食料'], '2024-03-30', '2024-04-02', budgets)
+
+    np.testing.assert_array_equal(series.dates, np.arange('2024-03-30', '2024-04-03', dtype='datetime64[D]'))
+    np.testing.assert_array_equal(series.actual, [500, 500, 1000, 1000])
+    np.testing.assert_allclose(series.budget, [2000, 4000, 5000, 6000])
+    assert series.rows == 3
+
+
+def test_cumulative_budget_is_zero_for_months_without_budget():
+    ledger = ledger_from_rows([('2024/02/10', '食料', 100, '')])
+    budgets = pd.Series([29000], index=pd.PeriodIndex(['2024-02'], freq='M'))
+    series = cumulative_series(ledger, ['食料'], '2024-01-30', '2024-02-02', budgets)
+    np.testing.assert_allclose(series.budget, [0, 0, 1000, 2000])
+    np.testing.assert_array_equal(series.actual, [0, 0, 0, 0])
+    assert series.rows == 0
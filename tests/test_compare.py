@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ledger.compare import compare_months
+from tests.conftest import ledger_from_rows
+
+
+def _ledger():
+    # 食料は 2023-01 から毎月1000円ずつ増える（1000, 2000, ..., 14000）。1か月分は2件に分ける
+    rows = []
+    for i, month in enumerate(pd.period_range('2023-01', '2024-02', freq='M')):
+        amount = 1000 * (i + 1)
+        rows.append((f"{month.year}/{month.month}/05", '食料', amount // 4, ''))
+        rows.append((f"{month.year}/{month.month}/20", '食料', amount - amount // 4, ''))
+    # 日用品は最近の3か月だけ（600, 0, 300）
+    rows.append(('2023/12/10', '日用品', 600, ''))
+    rows.append(('2024/02/10', '日用品', 300, ''))
+    return ledger_from_rows(rows)
+
+
+def test_rolling_windows_yoy_and_slope():
+    table = compare_months(_ledger().cube, '2024-02', ['食料', '日用品']).table
+
+    food = table.loc['食料']
+    assert food['当月'] == 14000
+    assert food['3か月平均'] == pytest.approx((12000 + 13000 + 14000) / 3)
+    assert food['6か月平均'] == pytest.approx(sum(range(9000, 15000, 1000)) / 6)
+    assert food['12か月平均'] == pytest.approx(sum(range(3000, 15000, 1000)) / 12)
+    assert food['前年同月'] == 2000
+    assert food['前年差'] == 12000
+    assert food['前年比'] == pytest.approx(14000 / 2000 - 1)
+    assert food['傾き'] == pytest.approx(1000)
+
+    goods = table.loc['日用品']
+    assert goods['3か月平均'] == pytest.approx(300)
+    assert goods['6か月平均'] == pytest.approx(150)
+    assert goods['12か月平均'] == pytest.approx(75)
+    # 前年同月が0円なら前年比は出さないが、差は出す
+    assert goods['前年差'] == 300
+    assert np.isnan(goods['前年比'])
+    recent = [0] * 9 + [600, 0, 300]
+    assert goods['傾き'] == pytest.approx(np.polyfit(np.arange(12), recent, 1)[0])
+
+
+@pytest.mark.parametrize('month, averages', [
+    # データの最初の月は、存在する1か月で割る
+    ('2023-01', (1000, 1000, 1000)),
+    # 最初の月より前の月は0円として数えない
+    ('2023-02', (1500, 1500, 1500)),
+    ('2023-05', (4000, 3000, 3000)),
+])
+def test_windows_are_averaged_over_the_months_that_exist(month, averages):
+    table = compare_months(_ledger().cube, month, ['食料']).table
+    assert tuple(table.loc['食料', ['3か月平均', '6か月平均', '12か月平均']]) == pytest.approx(averages)
+    # 1年前のデータがなければ前年同月・前年差・前年比は欠損
+    assert table.loc['食料', ['前年同月', '前年差', '前年比']].isna().all()
+
+
+def test_slope_is_zero_for_a_single_month_and_history_is_trimmed():
+    comparison = compare_months(_ledger().cube, '2023-01', ['食料'])
+    assert comparison.table.loc['食料', '傾き'] == 0
+
+    history = compare_months(_ledger().cube, '2024-02', ['食料', '日用品'], history=3).history
+    assert list(history.index.astype(str)) == ['2023-12', '2024-01', '2024-02']
+    assert history['食料'].tolist() == [12000, 13000, 14000]
+    assert history['日用品'].tolist() == [600, 0, 300]
+
+
+def test_months_after_the_data_roll_the_windows_forward():
+    table = compare_months(_ledger().cube, '2024-04', ['食料']).table
+    assert table.loc['食料', '当月'] == 0
+    assert table.loc['食料', '3か月平均'] == pytest.approx(14000 / 3)
+    assert table.loc['食料', '前年差'] == -4000
+    assert table.loc['食料', '前年比'] == pytest.approx(-1)
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ledger.cube import AggregateCube
+from ledger.period import month_period, quarter_period, range_period, year_period
+from ledger.schema import normalize_ledger
+
+CATEGORIES = ['食料', '日用品', '交通費', '趣味']
+
+
+def _frame(seed, start='2023-11-01', days=500, rows=400):
+    """乱数で作った正規化済みの明細（日付順とは限らない）"""
+    rng = np.random.default_rng(seed)
+    raw = pd.DataFrame({
+        '日付': pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, days, rows), unit='D'),
+        'カテゴリ': rng.choice(CATEGORIES[:3] if seed % 2 else CATEGORIES, rows),
+        '金額': rng.integers(1, 20000, rows),
+        'メモ': '',
+    })
+    return normalize_ledger(raw)
+
+
+def _expected(df, start, end, categories=CATEGORIES):
+    """期間内の明細を groupby で集計した、カテゴリ別の合計金額"""
+    dates = df['日付'].dt.normalize()
+    inside = df[(dates >= pd.Timestamp(start)) & (dates <= pd.Timestamp(end))]
+    sums = inside.groupby(inside['カテゴリ'].astype(str))['金額'].sum()
+    return sums.reindex(categories, fill_value=0).astype('int64')
+
+
+def _compare(actual, expected):
+    pd.testing.assert_series_equal(actual.reindex(expected.index, fill_value=0), expected,
+                                   check_names=False, check_dtype=False)
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_range_sums_match_groupby(seed):
+    df = _frame(seed)
+    cube = AggregateCube.from_frame(df)
+    rng = np.random.default_rng(100 + seed)
+    for _ in range(30):
+        start, end = sorted(pd.Timestamp('2023-10-01') + pd.to_timedelta(rng.integers(0, 560, 2), unit='D'))
+        _compare(cube.range_sums(start, end, CATEGORIES), _expected(df, start, end))
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_period_sums_match_groupby(seed):
+    df = _frame(seed)
+    cube = AggregateCube.from_frame(df)
+    periods = ([month_period(m) for m in pd.period_range('2023-10', '2025-04', freq='M')]
+               + [quarter_period(y, q) for y in (2023, 2024, 2025) for q in (1, 2, 3, 4)]
+               + [year_period(y) for y in (2022, 2023, 2024, 2025)]
+               + [range_period('2024-02-10', '2024-05-03'), range_period('2023-12-31', '2024-01-01')])
+    for period in periods:
+        _compare(cube.period_sums(period, CATEGORIES), _expected(df, period.start, period.end))
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_monthly_tables_and_yearly_match_groupby(seed):
+    df = _frame(seed)
+    cube = AggregateCube.from_frame(df)
+    category = df['カテゴリ'].astype(str)
+    by_month = df.groupby([df['日付'].dt.to_period('M'), category])['金額']
+    sums = by_month.sum().unstack(fill_value=0)
+    counts = by_month.size().unstack(fill_value=0)
+    yearly = df.groupby([df['日付'].dt.year, category])['金額'].sum().unstack(fill_value=0)
+
+    pd.testing.assert_frame_equal(cube.sums.reindex(index=sums.index, columns=sums.columns), sums,
+                                  check_names=False, check_dtype=False, check_index_type=False)
+    pd.testing.assert_frame_equal(cube.counts.reindex(index=counts.index, columns=counts.columns), counts,
+                                  check_names=False, check_dtype=False, check_index_type=False)
+    pd.testing.assert_frame_equal(cube.yearly.reindex(columns=yearly.columns), yearly,
+                                  check_names=False, check_dtype=False, check_index_type=False)
+    # データのない月・日も0の行として連続している
+    assert cube.sums.index.equals(pd.period_range(sums.index.min(), sums.index.max(), freq='M'))
+    assert len(cube.daily) == (df['日付'].max().normalize() - df['日付'].min().normalize()).days + 1
+    assert int(cube.daily.to_numpy().sum()) == int(df['金額'].sum())
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_combine_matches_building_from_the_whole_frame(seed):
+    # 後半は別の期間・別のカテゴリ構成（趣味の有無）でも同じ結果になる
+    head, tail = _frame(seed, '2023-11-01'), _frame(seed + 1, '2024-09-15', days=200, rows=150)
+    combined = AggregateCube.from_frame(head).combine(AggregateCube.from_frame(tail))
+    whole = AggregateCube.from_frame(pd.concat([head, tail], ignore_index=True))
+    for name in ('sums', 'counts', 'daily'):
+        expected = getattr(whole, name)
+        actual = getattr(combined, name).reindex(columns=expected.columns)
+        pd.testing.assert_frame_equal(actual, expected, check_freq=False)
+
+
+def test_combine_with_an_empty_cube_returns_the_other():
+    cube = AggregateCube.from_frame(_frame(0))
+    empty = AggregateCube.from_frame(_frame(0).iloc[:0])
+    assert cube.combine(empty) is cube
+    assert empty.combine(cube) is cube
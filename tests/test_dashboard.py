@@ -0,0 +1,27 @@
+import pandas as pd
+
+from components import dashboard
+from ledger.alerts import Rule
+
+CONFIG = {
+    'budgets': {'食料': 30000},
+    'budget_history': [{'effective': '2024-04', 'budgets': {'趣味': 5000}}],
+    'sections': [{'title': '明細', 'widgets': [{'type': 'explorer'}]}],
+}
+
+
+def test_explorer_offers_every_budgeted_category(monkeypatch):
+    shown = []
+    monkeypatch.setattr(dashboard, 'display_explorer',
+                        lambda ledger, categories, size, period=None: shown.append(categories))
+    plan = dashboard.compile_plan(CONFIG)
+    plan[0].widgets[0](None, None)
+    # [[budget_history]] で追加したカテゴリも、予算表と同じく選択肢に含める
+    assert shown == [['食料', '趣味']]
+
+
+def test_alert_rules_use_the_budgets_of_the_month():
+    march = dashboard.compile_alerts(CONFIG, pd.Period('2024-03', freq='M'))
+    april = dashboard.compile_alerts(CONFIG, pd.Period('2024-04', freq='M'))
+    assert Rule('over_budget', '趣味', 5000) not in march
+    assert Rule('over_budget', '趣味', 5000) in april
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from ledger.downsample import downsample, lttb
+
+
+def _line(n=500):
+    rng = np.random.default_rng(0)
+    x = np.arange(n, dtype=np.float64)
+    return x, np.cumsum(rng.integers(0, 1000, n)).astype(np.float64)
+
+
+@pytest.mark.parametrize('budget', [1, 2])
+def test_tiny_budget_keeps_only_endpoints(budget):
+    x, y = _line()
+    np.testing.assert_array_equal(lttb(x, y, budget), [0, len(x) - 1])
+    np.testing.assert_array_equal(downsample(x, y, budget), [0, len(x) - 1])
+
+
+@pytest.mark.parametrize('budget', [3, 10, 120])
+def test_budget_is_respected_and_keeps_endpoints(budget):
+    x, y = _line()
+    kept = downsample(x, y, budget)
+    assert len(kept) == budget
+    assert kept[0] == 0 and kept[-1] == len(x) - 1
+    assert np.all(np.diff(kept) > 0)
+
+
+def test_no_budget_and_short_lines_keep_every_point():
+    x, y = _line(5)
+    np.testing.assert_array_equal(downsample(x, y, 0), np.arange(5))
+    np.testing.assert_array_equal(lttb(x, y, 10), np.arange(5))
+
+
+def test_collinear_points_are_dropped_first():
+    x = np.arange(10, dtype=np.float64)
+    y = np.array([0, 0, 0, 0, 5, 10, 15, 15, 15, 15], dtype=np.float64)
+    np.testing.assert_array_equal(downsample(x, y, 120), [0, 3, 6, 9])
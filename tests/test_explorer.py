@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import components.explorer as component
+from ledger.explorer import SORTS, page_after, select_rows
+from ledger.model import build_ledger
+from ledger.schema import normalize_ledger
+
+
+def _ledger():
+    # 同じ日付・同じ金額の明細を多く含む（キーの重複をまたいでページが切れる）
+    rng = np.random.default_rng(0)
+    rows = 97
+    raw = pd.DataFrame({
+        '日付': pd.Timestamp('2024-05-01') + pd.to_timedelta(rng.integers(0, 6, rows), unit='D'),
+        'カテゴリ': rng.choice(['食料', '日用品', '交通費'], rows),
+        '金額': rng.choice([100, 250, 500], rows),
+        'メモ': rng.choice(['スーパー', 'コンビニ', '電車'], rows),
+    })
+    return build_ledger(normalize_ledger(raw), 'test')
+
+
+def _expected(ledger, rows, sort):
+    """pandas の安定な並べ替えで求めた表示順（同じキーは行位置の順、降順なら逆順）"""
+    column, descending = SORTS[sort]
+    frame = pd.DataFrame({'key': ledger.df[column].to_numpy()[rows], 'row': rows})
+    order = frame.sort_values(['key', 'row'], ascending=not descending)
+    return order['row'].to_numpy()
+
+
+def _walk(selection, size):
+    pages, cursor = [], None
+    while True:
+        page = page_after(selection, cursor, size=size)
+        assert page.offset == sum(len(p) for p in pages)
+        pages.append(page.rows)
+        cursor = page.next_cursor
+        if cursor is None:
+            return np.concatenate(pages)
+
+
+@pytest.mark.parametrize('sort', list(SORTS))
+@pytest.mark.parametrize('size', [1, 7, 50, 200])
+def test_pages_follow_sort_order_across_ties(sort, size):
+    ledger = _ledger()
+    selection = select_rows(ledger, sort=sort)
+    walked = _walk(selection, size)
+    np.testing.assert_array_equal(walked, _expected(ledger, np.arange(len(ledger.df)), sort))
+
+
+@pytest.mark.parametrize('sort', list(SORTS))
+def test_filtered_pages(sort):
+    ledger = _ledger()
+    start, end = pd.Timestamp('2024-05-02'), pd.Timestamp('2024-05-04')
+    selection = select_rows(ledger, categories=['食料', '交通費'], start=start, end=end,
+                            memo='スーパー', sort=sort)
+    df = ledger.df
+    mask = (df['カテゴリ'].isin(['食料', '交通費']) & df['日付'].between(start, end)
+            & (df['メモ'] == 'スーパー'))
+    expected = _expected(ledger, np.flatnonzero(mask.to_numpy()), sort)
+    assert len(expected) > 0
+    np.testing.assert_array_equal(_walk(selection, 4), expected)
+
+
+def test_cursor_on_last_page_and_empty_selection():
+    ledger = _ledger()
+    selection = select_rows(ledger, sort='amount_desc')
+    page = page_after(selection, size=len(selection))
+    assert page.next_cursor is None and len(page.rows) == len(selection)
+
+    empty = select_rows(ledger, memo='該当なし')
+    page = page_after(empty)
+    assert len(page.rows) == 0 and page.next_cursor is None
+
+
+def test_unknown_sort():
+    with pytest.raises(ValueError):
+        select_rows(_ledger(), sort='memo_asc')
+
+
+def test_selections_are_kept_in_a_small_cache_of_their_own(monkeypatch):
+    monkeypatch.setattr(component, '_selections', component.OrderedDict())
+    monkeypatch.setattr(component, 'SELECTION_CACHE_SIZE', 3)
+    ledger = _ledger()
+    first = component._select(ledger, ((), '', 'date_desc', None))
+    assert component._select(ledger, ((), '', 'date_desc', None)) is first
+    # メモの入力ごとの結果は古いものから捨て、上限を超えて保持しない
+    for memo in ('ス', 'スー', 'スーパ', 'スーパー'):
+        component._select(ledger, (('食料',), memo, 'amount_desc', None))
+    assert len(component._selections) == 3
+    assert component._select(ledger, ((), '', 'date_desc', None)) is not first
+
+    component._forget(ledger.version)
+    assert len(component._selections) == 0
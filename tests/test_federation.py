@@ -0,0 +1,68 @@
+import time
+
+import pandas as pd
+
+from ledger import federation, loader
+from tests.conftest import csv_body, ledger_from_rows
+
+CARD = [('2024/05/01', '食料', 1200, 'スーパー'), ('2024/05/03', '日用品', 800, '洗剤')]
+BANK = [('2024/05/02', '光熱費', 5000, '電気')]
+
+
+def test_peek_sources_merges_cached_sources_and_reports_missing(sheet_server):
+    sheet_server.bodies['/card.csv'] = csv_body(CARD)
+    sources = [('カード', sheet_server.url('/card.csv')), ('銀行', sheet_server.url('/bank.csv'))]
+    assert federation.peek_sources(sources) is None
+    assert federation.current_version(sources) is None
+
+    loader.fetch_sheet(sources[0][1], snapshot=False)
+    loaded = federation.peek_sources(sources)
+    assert list(loaded.errors) == ['銀行']
+    assert list(loaded.ledger.df['ソース'].astype(str).unique()) == ['カード']
+    assert federation.current_version(sources) == loaded.ledger.version
+
+    # 残りの取得元が取れたら版が変わり、両方を統合する
+    sheet_server.bodies['/bank.csv'] = csv_body(BANK)
+    loader.fetch_sheet(sources[1][1], snapshot=False)
+    merged = federation.peek_sources(sources)
+    assert merged.errors == {}
+    assert len(merged.ledger.df) == 3
+    assert merged.ledger.version != loaded.ledger.version
+    assert federation.current_version(sources) == merged.ledger.version
+
+
+def test_peek_sources_does_not_wait_on_hanging_source(sheet_server):
+    sheet_server.bodies['/card.csv'] = csv_body(CARD)
+    sheet_server.bodies['/bank.csv'] = csv_body(BANK)
+    sheet_server.delay['/bank.csv'] = 2
+    sources = [('カード', sheet_server.url('/card.csv')), ('銀行', sheet_server.url('/bank.csv'))]
+    loader.fetch_sheet(sources[0][1], snapshot=False)
+
+    start = time.perf_counter()
+    loaded = federation.peek_sources(sources)
+    assert time.perf_counter() - start < 0.5
+    assert loaded.ledger is not None and '銀行' in loaded.errors
+    assert sheet_server.count('/bank.csv') == 0
+
+
+def test_merge_keeps_dictionary_columns_categorical():
+    card = ledger_from_rows([
+        ('2024/05/01', '食料', 500, 'パン'),
+        ('2024/05/01', '食料', 500, 'パン'),
+        ('2024/05/03', '日用品', 300, '洗剤'),
+    ], 'card-v1')
+    bank = ledger_from_rows([
+        ('2024/05/01', '食料', 500, 'パン'),
+        ('2024/05/02', '交通費', 200, '電車'),
+    ], 'bank-v1')
+    merged = federation._merge([('カード', card), ('銀行', bank)])
+    df = merged.df
+
+    for column in ('カテゴリ', 'メモ'):
+        assert isinstance(df[column].dtype, pd.CategoricalDtype)
+    assert list(df['カテゴリ'].cat.categories) == sorted(['食料', '日用品', '交通費'])
+    # 取得元内の重複（同じ日に同じ買い物2回）は残し、取得元をまたぐ重複は1件にまとめる
+    assert df[['カテゴリ', '金額', 'メモ']].astype(str).agg('/'.join, axis=1).tolist() == [
+        '食料/500/パン', '食料/500/パン', '交通費/200/電車', '日用品/300/洗剤']
+    assert df['ソース'].tolist() == ['カード', 'カード', '銀行', 'カード']
+    assert merged.cube.total('2024-05') == 1500
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from ledger.forecast import forecast_categories, forecast_month, month_profiles
+from tests.conftest import ledger_from_rows
+
+TODAY = '2024-05-10'
+ROWS = [
+    # 過去の月の「10日より後」の支出は 2月 2500、3月 5000、4月 4000
+    ('2024/02/05', '食料', 1000, ''),
+    ('2024/02/15', '食料', 2000, ''),
+    ('2024/02/29', '食料', 500, ''),
+    ('2024/03/08', '食料', 1000, ''),
+    ('2024/03/20', '食料', 4000, ''),
+    ('2024/03/31', '食料', 1000, ''),
+    ('2024/04/12', '食料', 3000, ''),
+    ('2024/04/30', '食料', 1000, ''),
+    # 今月は10日までに 2000
+    ('2024/05/02', '食料', 1500, ''),
+    ('2024/05/10', '食料', 500, ''),
+    # 過去の月に支出のないカテゴリ
+    ('2024/05/03', '日用品', 700, ''),
+]
+
+
+@pytest.fixture
+def cube():
+    return ledger_from_rows(ROWS).cube
+
+
+def test_month_profiles_fill_days_after_month_end(cube):
+    profiles, categories = month_profiles(cube, '2024-03', history=1)
+    food = profiles[:, :, categories.index('食料')]
+    assert profiles.shape == (2, 31, len(categories))
+    assert food[0, 3] == 0 and food[0, 4] == 1000 and food[0, 14] == 3000
+    # 2月は29日まで。30・31日は月末の値のまま
+    np.testing.assert_array_equal(food[0, 28:], [3500, 3500, 3500])
+    np.testing.assert_array_equal(food[1, [6, 7, 19, 30]], [0, 1000, 5000, 6000])
+
+
+def test_forecast_categories(cube):
+    table = forecast_categories(cube, TODAY)
+    # 予測の分布は 2000 + (2500, 5000, 4000) = (4500, 7000, 6000)
+    food = table.loc['食料']
+    assert food['実績'] == 2000
+    assert food['予測'] == pytest.approx(17500 / 3)
+    assert food['下限'] == pytest.approx(4800)   # 10%点: 4500 + 0.2 × 1500
+    assert food['上限'] == pytest.approx(6800)   # 90%点: 6000 + 0.8 × 1000
+    # 過去の支出がないカテゴリは、今日までの実績がそのまま月末の予測になる
+    assert table.loc['日用品'].tolist() == [700, 700, 700, 700]
+
+
+def test_forecast_month(cube):
+    forecast = forecast_month(cube, '食料', TODAY)
+    assert forecast.months == 3
+    assert forecast.spent == 2000
+    assert forecast.dates[0] == np.datetime64('2024-05-10')
+    assert forecast.dates[-1] == np.datetime64('2024-05-31')
+    assert forecast.expected[0] == forecast.low[0] == forecast.high[0] == 2000
+    # 20日までの増分は (2000, 4000, 3000)
+    assert forecast.expected[10] == pytest.approx(5000)
+    assert forecast.expected[-1] == pytest.approx(17500 / 3)
+    assert forecast.low[-1] == pytest.approx(4800)
+    assert forecast.high[-1] == pytest.approx(6800)
+    assert np.all(forecast.low <= forecast.expected) and np.all(forecast.expected <= forecast.high)
+
+
+def test_forecast_month_sums_categories_before_the_distribution(cube):
+    forecast = forecast_month(cube, ['食料', '日用品'], TODAY)
+    assert forecast.spent == 2700
+    assert forecast.expected[-1] == pytest.approx(17500 / 3 + 700)
+    assert forecast.low[-1] == pytest.approx(5500)
+    assert forecast.high[-1] == pytest.approx(7500)
+
+
+@pytest.mark.parametrize('today', ['2024-02-20', '2023-12-01'])
+def test_no_forecast_without_earlier_months(cube, today):
+    # データの最初の月（とそれより前）には学習に使える過去の月がない
+    assert forecast_categories(cube, today).empty
+    assert forecast_month(cube, '食料', today) is None
+
+
+def test_history_is_limited_to_available_months(cube):
+    assert forecast_month(cube, '食料', TODAY, history=1).months == 1
+    # 4月だけなら 2000 + 4000
+    assert forecast_month(cube, '食料', TODAY, history=1).expected[-1] == pytest.approx(6000)
@@ -0,0 +1,110 @@
+import io
+
+import pandas as pd
+
+from ledger import loader
+from ledger.incremental import appended_tail, make_watermark
+from ledger.model import build_ledger
+from ledger.schema import normalize_ledger
+from tests.conftest import csv_body
+
+ROWS = [
+    ('2024/05/01', '食料', 1200, 'スーパー'),
+    ('2024/05/03', '日用品', 800, '洗剤'),
+    ('2024/05/04', '食料', 300, 'パン'),
+]
+APPENDED = [('2024/05/06', '交通費', 420, '電車'), ('2024/04/30', '新カテゴリ', 100, '過去の日付')]
+
+
+def _full(body):
+    return build_ledger(normalize_ledger(pd.read_csv(io.BytesIO(body))), 'full')
+
+
+def _assert_same(ledger, body):
+    full = _full(body)
+    pd.testing.assert_frame_equal(ledger.df, full.df, check_categorical=False)
+    for name in ('sums', 'counts'):
+        actual, expected = getattr(ledger.cube, name), getattr(full.cube, name)
+        pd.testing.assert_frame_equal(actual[sorted(actual.columns)], expected[sorted(expected.columns)])
+
+
+def test_appended_tail_returns_only_new_rows():
+    body = csv_body(ROWS)
+    watermark = make_watermark(body, len(ROWS))
+    grown = csv_body(ROWS + APPENDED)
+    assert appended_tail(grown, watermark) == grown[len(body):]
+    assert appended_tail(body, watermark) == b''
+
+
+def test_changed_prefix_falls_back_to_full_parse():
+    body = csv_body(ROWS)
+    watermark = make_watermark(body, len(ROWS))
+    edited = csv_body([ROWS[0], ('2024/05/03', '日用品', 900, '洗剤'), ROWS[2]] + APPENDED)
+    assert appended_tail(edited, watermark) is None
+    assert appended_tail(body[:-5], watermark) is None
+
+
+def test_unterminated_last_row():
+    body = csv_body(ROWS).rstrip(b'\n')
+    watermark = make_watermark(body, len(ROWS))
+    # 改行のない最終行が書き足された（メモ「パン」→「パン0」）なら追記ではない
+    assert appended_tail(body + b'0', watermark) is None
+    # 改行から始まる追記は取り込める
+    tail = '\n2024/05/06,交通費,420,電車\n'.encode('utf-8')
+    assert appended_tail(body + tail, watermark) == tail
+
+
+def test_fetch_sheet_appends_and_matches_full_parse(sheet_server):
+    url = sheet_server.url('/a.csv')
+    sheet_server.bodies['/a.csv'] = csv_body(ROWS)
+    loader.fetch_sheet(url, ttl=0, snapshot=False)
+
+    sheet_server.bodies['/a.csv'] = grown = csv_body(ROWS + APPENDED)
+    entry, status = loader.fetch_sheet(url, ttl=0, snapshot=False)
+    assert status == 'appended'
+    assert entry.watermark.rows == len(ROWS) + len(APPENDED)
+    _assert_same(entry.ledger, grown)
+
+    sheet_server.bodies['/a.csv'] = edited = csv_body(ROWS[1:] + APPENDED)
+    entry, status = loader.fetch_sheet(url, ttl=0, snapshot=False)
+    assert status == 'fetched'
+    _assert_same(entry.ledger, edited)
+
+
+def test_fetch_sheet_reparses_rewritten_last_row(sheet_server):
+    url = sheet_server.url('/a.csv')
+    sheet_server.bodies['/a.csv'] = body = csv_body(ROWS).rstrip(b'\n')
+    loader.fetch_sheet(url, ttl=0, snapshot=False)
+
+    sheet_server.bodies['/a.csv'] = rewritten = body + b'0\n'
+    entry, status = loader.fetch_sheet(url, ttl=0, snapshot=False)
+    assert status == 'fetched'
+    assert entry.ledger.df['メモ'].iloc[-1] == 'パン0'
+    _assert_same(entry.ledger, rewritten)
+
+
+def test_typed_parse_matches_plain_read_and_drops_unused_columns(sheet_server):
+    # 余分な列・空のメモ・前後に空白のあるカテゴリを含む本文
+    lines = ['日付,カテゴリ,金額,備考,メモ', '2024/05/01, 食料 ,1200,x,スーパー', '2024/05/02,日用品,800,,',
+             '2024/05/03,食料,"¥1,500",y,']
+    body = ('\n'.join(lines) + '\n').encode('utf-8')
+    plain = pd.read_csv(io.BytesIO(body)).drop(columns='備考')
+
+    parsed, watermark = loader._parse(body, 'v1')
+    pd.testing.assert_frame_equal(parsed.df, normalize_ledger(plain), check_categorical=False)
+    assert list(parsed.df.columns) == ['日付', 'カテゴリ', '金額', 'メモ']
+    assert watermark.rows == 3
+
+    url = sheet_server.url('/a.csv')
+    sheet_server.bodies['/a.csv'] = body
+    loader.fetch_sheet(url, ttl=0, snapshot=False)
+    sheet_server.bodies['/a.csv'] = grown = body + '2024/05/04,交通費,420,z,電車\n'.encode('utf-8')
+    entry, status = loader.fetch_sheet(url, ttl=0, snapshot=False)
+    assert status == 'appended'
+    assert list(entry.ledger.df.columns) == ['日付', 'カテゴリ', '金額', 'メモ']
+    pd.testing.assert_frame_equal(entry.ledger.df, loader._parse(grown, 'v2')[0].df, check_categorical=False)
+
+
+def test_all_blank_memo_column():
+    parsed, _ = loader._parse('日付,カテゴリ,金額,メモ\n2024/05/01,食料,100,\n'.encode('utf-8'), 'v1')
+    assert parsed.df['メモ'].tolist() == ['']
@@ -0,0 +1,90 @@
+from ledger import federation, loader
+from tests.conftest import csv_body
+
+ROWS = [('2024/05/01', '食料', 1200, 'スーパー'), ('2024/05/03', '日用品', 800, '洗剤')]
+
+
+def test_ttl_hit_does_not_contact_source(sheet_server):
+    sheet_server.bodies['/a.csv'] = csv_body(ROWS)
+    url = sheet_server.url('/a.csv')
+    first, status = loader.fetch_sheet(url, ttl=300, snapshot=False)
+    assert status == 'fetched'
+    second, status = loader.fetch_sheet(url, ttl=300, snapshot=False)
+    assert status == 'hit'
+    assert second is first
+    assert sheet_server.count('/a.csv') == 1
+
+
+def test_not_modified_revalidates_without_reparsing(sheet_server):
+    sheet_server.bodies['/a.csv'] = csv_body(ROWS)
+    url = sheet_server.url('/a.csv')
+    first, _ = loader.fetch_sheet(url, ttl=0, snapshot=False)
+    second, status = loader.fetch_sheet(url, ttl=0, snapshot=False)
+    assert status == 'revalidated'
+    assert second is first and second.ledger is first.ledger
+    assert sheet_server.requests[-1][1].get('If-None-Match') == first.etag
+
+
+def test_same_body_revalidates_without_validators(sheet_server):
+    sheet_server.etag = False
+    sheet_server.bodies['/a.csv'] = csv_body(ROWS)
+    url = sheet_server.url('/a.csv')
+    first, _ = loader.fetch_sheet(url, ttl=0, snapshot=False)
+    second, status = loader.fetch_sheet(url, ttl=0, snapshot=False)
+    assert status == 'revalidated'
+    assert second.ledger is first.ledger
+    assert sheet_server.count('/a.csv') == 2
+
+
+def test_changed_body_is_fetched(sheet_server):
+    sheet_server.bodies['/a.csv'] = csv_body(ROWS)
+    url = sheet_server.url('/a.csv')
+    first, _ = loader.fetch_sheet(url, ttl=0, snapshot=False, incremental=False)
+    sheet_server.bodies['/a.csv'] = csv_body(ROWS[::-1])
+    second, status = loader.fetch_sheet(url, ttl=0, snapshot=False, incremental=False)
+    assert status == 'fetched'
+    assert second.version != first.version
+    assert loader.peek(url) is second
+
+
+def test_stale_on_network_error(sheet_server):
+    sheet_server.bodies['/a.csv'] = csv_body(ROWS)
+    url = sheet_server.url('/a.csv')
+    first, _ = loader.fetch_sheet(url, ttl=0, snapshot=False)
+    sheet_server.down = True
+    second, status = loader.fetch_sheet(url, ttl=0, snapshot=False)
+    assert status == 'stale'
+    assert second is first
+
+
+def test_status_is_per_call_not_shared(sheet_server):
+    sheet_server.bodies['/a.csv'] = csv_body(ROWS)
+    url = sheet_server.url('/a.csv')
+    sources = [('シート1', url)]
+    loader.fetch_sheet(url, ttl=0, snapshot=False)
+    sheet_server.down = True
+    _, status = loader.fetch_sheet(url, ttl=0, snapshot=False)
+    assert status == 'stale'
+    # 別のセッションの結果は、他のセッションの表示に影響しない
+    assert federation.peek_sources(sources).statuses == {'シート1': 'hit'}
+    sheet_server.down = False
+    assert federation.load_sources(sources, ttl=300, snapshot=False).statuses == {'シート1': 'hit'}
+
+
+def test_snapshot_is_reported_until_confirmed(sheet_server):
+    sheet_server.bodies['/a.csv'] = csv_body(ROWS)
+    url = sheet_server.url('/a.csv')
+    fetched, _ = loader.fetch_sheet(url, ttl=0)
+    loader.save_snapshot(url, fetched)
+    loader._cache.clear()
+
+    sheet_server.down = True
+    restored, status = loader.fetch_sheet(url, ttl=0, incremental=False)
+    assert status == 'snapshot'
+    assert restored.version == fetched.version
+    assert federation.peek_sources([('シート1', url)]).statuses == {'シート1': 'snapshot'}
+
+    sheet_server.down = False
+    _, status = loader.fetch_sheet(url, ttl=0)
+    assert status == 'revalidated'
+    assert federation.peek_sources([('シート1', url)]).statuses == {'シート1': 'hit'}
@@ -0,0 +1,16 @@
+from components.monthly_list import _build_table
+from ledger.period import month_period
+from tests.conftest import ledger_from_rows
+
+
+def test_months_are_listed_in_calendar_order_across_digit_boundaries():
+    ledger = ledger_from_rows([
+        ('2024/12/05', '食料', 300, ''),
+        ('2024/09/10', '食料', 100, ''),
+        ('2024/10/01', '食料', 200, ''),
+        ('2024/10/20', '食料', 400, ''),
+        ('2024/11/03', '日用品', 999, ''),
+    ])
+    table = _build_table(ledger, '食料', 5, period=month_period('2025-01')).data
+    assert table['月'].tolist() == ['2024年9月', '2024年10月', '2024年12月']
+    assert table['詳細'].tolist() == ['¥100 × 1 = ¥100', '¥300 × 2 = ¥600', '¥300 × 1 = ¥300']
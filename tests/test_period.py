@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ledger.period import month_period, quarter_period, range_period, year_period
+
+
+@pytest.mark.parametrize('period, months, weights', [
+    (month_period('2024-02'), ['2024-02'], [1.0]),
+    (quarter_period(2024, 4), ['2024-10', '2024-11', '2024-12'], [1.0, 1.0, 1.0]),
+    (range_period('2024-01-31', '2024-03-01'), ['2024-01', '2024-02', '2024-03'], [1 / 31, 1.0, 1 / 31]),
+    (range_period('2023-02-11', '2023-02-20'), ['2023-02'], [10 / 28]),
+])
+def test_month_weights(period, months, weights):
+    actual = period.month_weights()
+    assert list(actual.index.astype(str)) == months
+    np.testing.assert_allclose(actual.to_numpy(), weights)
+    assert period.last_month == pd.Period(months[-1], freq='M')
+
+
+def test_period_bounds():
+    assert (month_period('2024-02').start, month_period('2024-02').end) == \
+        (pd.Timestamp('2024-02-01'), pd.Timestamp('2024-02-29'))
+    assert quarter_period(2024, 3).end == pd.Timestamp('2024-09-30')
+    assert year_period(2024).month_range().size == 12
+    with pytest.raises(ValueError):
+        quarter_period(2024, 5)
+    with pytest.raises(ValueError):
+        range_period('2024-03-02', '2024-03-01')
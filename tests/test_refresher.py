@@ -0,0 +1,27 @@
+from ledger import refresher
+
+
+def test_stop_then_restart(monkeypatch):
+    calls = []
+    monkeypatch.setattr(refresher, 'fetch_sheet', lambda url, force: calls.append(url))
+    url = 'http://127.0.0.1/test-refresher.csv'
+
+    worker = refresher.start_refresher(url, interval=60)
+    assert worker.is_alive()
+    assert refresher.start_refresher(url, interval=60) is worker
+
+    worker.stop()
+    worker.join(timeout=5)
+    assert not worker.is_alive()
+    assert not refresher.request_refresh(url)
+
+    # 停止したスレッドは作り直す
+    restarted = refresher.start_refresher(url, interval=60)
+    try:
+        assert restarted is not worker
+        assert restarted.is_alive()
+        assert refresher.request_refresh(url)
+    finally:
+        restarted.stop()
+        restarted.join(timeout=5)
+    assert calls and set(calls) == {url}
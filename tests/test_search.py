@@ -0,0 +1,81 @@
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from ledger.model import build_ledger, extend_ledger
+from ledger.schema import normalize_ledger
+from ledger.search import memo_index, normalize_text, search_memos
+
+
+def _frame(rows):
+    return normalize_ledger(pd.DataFrame(rows, columns=['日付', 'カテゴリ', '金額', 'メモ']))
+
+
+BASE = [
+    ('2024/05/01', '食料', 1200, 'スーパー まとめ買い'),
+    ('2024/05/02', '食料', 300, 'コンビニ'),
+    ('2024/05/03', '日用品', 800, 'ドラッグストア'),
+    ('2024/05/04', '食料', 500, 'ｽｰﾊﾟｰ'),
+]
+APPENDED = [
+    ('2024/05/05', '食料', 700, 'スーパー 特売'),
+    ('2024/05/06', '交通費', 420, '電車'),
+]
+
+
+def _expected(ledger, query, start=None, end=None):
+    """メモを1行ずつ正規化して部分一致で探した行位置（新しい順。語がなければ一致なし）"""
+    df = ledger.df
+    terms = normalize_text(query).split()
+    if not terms:
+        return np.empty(0, dtype=np.int64)
+    memos = df['メモ'].astype(str).map(normalize_text)
+    mask = memos.map(lambda memo: all(term in memo for term in terms)).to_numpy()
+    if start is not None:
+        mask &= (df['日付'] >= start).to_numpy()
+    if end is not None:
+        mask &= (df['日付'] <= end).to_numpy()
+    return np.flatnonzero(mask)[::-1]
+
+
+def test_search_matches_brute_force():
+    ledger = build_ledger(_frame(BASE + APPENDED), uuid.uuid4().hex)
+    for query in ['スーパー', 'ｽｰﾊﾟｰ', 'スーパー 特売', 'ー', 'コンビニ', '該当なし', '']:
+        result = search_memos(ledger, query)
+        np.testing.assert_array_equal(result.rows, _expected(ledger, query))
+        assert result.count == len(result.rows)
+        assert result.total == int(ledger.df['金額'].to_numpy()[result.rows].sum())
+    start, end = pd.Timestamp('2024/05/02'), pd.Timestamp('2024/05/04')
+    np.testing.assert_array_equal(search_memos(ledger, 'スーパー', start, end).rows,
+                                  _expected(ledger, 'スーパー', start, end))
+
+
+def test_index_is_reused_across_appends():
+    before = build_ledger(_frame(BASE), uuid.uuid4().hex)
+    index, size = memo_index(before)
+    assert memo_index(before) == (index, size)
+    indexed = len(index.raw)
+
+    after = extend_ledger(before, _frame(APPENDED), uuid.uuid4().hex)
+    extended, extended_size = memo_index(after)
+    # 同じ索引に増えたメモだけを加える
+    assert extended is index
+    assert extended_size == len(after.df['メモ'].cat.categories) > size
+    assert index.raw[:indexed] == list(before.df['メモ'].cat.categories)
+
+    # 前の版は自分のカテゴリ数までのコードだけを使う
+    np.testing.assert_array_equal(search_memos(before, 'スーパー').rows, _expected(before, 'スーパー'))
+    np.testing.assert_array_equal(search_memos(after, 'スーパー').rows, _expected(after, 'スーパー'))
+    np.testing.assert_array_equal(search_memos(after, '電車').rows, _expected(after, '電車'))
+    assert len(search_memos(before, '電車').rows) == 0
+
+
+def test_reordered_memos_build_a_new_index():
+    first = build_ledger(_frame(BASE), uuid.uuid4().hex)
+    index, _ = memo_index(first)
+    # 全件読み込みでメモの順序が変わると、既存の索引は延長できない
+    reparsed = build_ledger(_frame(BASE[::-1] + APPENDED), uuid.uuid4().hex)
+    other, _ = memo_index(reparsed)
+    assert other is not index
+    np.testing.assert_array_equal(search_memos(reparsed, 'スーパー').rows, _expected(reparsed, 'スーパー'))